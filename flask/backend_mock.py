@@ -1,171 +1,284 @@
 # backend_mock.py
-import this
+import os
+import threading
+import time
 
-from flask import Flask, jsonify
+_STARTED = time.perf_counter()
+
+from flask import Flask, jsonify, request
 from flask_cors import CORS
-import random # 用于随机选择走法
-import requests
-from sympy.physics.units import action
 
-from chess_ai import invertToFen
-from chess_ai import movesChange
-from chess_ai.utils.board_utils import initial_board, apply_move, board_to_matrix
-from chess_ai.model.chess_model import ChessModel
+from chess_ai.utils.board_engine import BLACK
+from chess_ai.api.session_store import SessionStore, SQLiteSessionStore, DEFAULT_GAME
+from chess_ai.utils import metrics
 
-import chess_ai.invertToFen
-import chess_ai.movesChange
+# 模型、开局库、chessdb 客户端（以及它们依赖的 numpy / requests）都在后台线程中导入和加载，
+# 路由在导入本模块时就已注册；模型就绪前 /api/suggest/<走法> 直接用搜索回答，并带上 "status": "warming"
+MODEL_DIR = "./chess_ai/model"
+WARMING_SEARCH_TIME = 0.5  # 模型未就绪时回退搜索的时间预算（秒）
+# 统计模型没有记录时回退搜索使用的进程数，大于 1 时启用多进程并行搜索（Lazy SMP）。
+# 并行搜索器同一时刻只服务一个请求，其余并发请求不排队，改用各自线程的单进程搜索：
+# 延迟仍是一次搜索的时间预算，代价是这些请求搜不了那么深
+SEARCH_PROCESSES = int(os.environ.get("CHESS_SEARCH_PROCESSES", "1"))
 
-import pickle
+app = Flask(__name__)
+CORS(app, resources={r"/api/*": {"origins": "*"}})
+# /metrics 路由、每个请求的 Server-Timing 耗时分解；CHESS_PROFILE_SLOW_MS 开启慢请求采样
+metrics.install_flask(app)
 
+# 对局状态按 game 参数区分（缺省为 "default"），新对局从初始局面开始；
+# 设置 CHESS_SESSION_DB 时使用 SQLite 存储，多个 worker 进程共享对局
+session_db = os.environ.get("CHESS_SESSION_DB")
+sessions = SQLiteSessionStore(session_db) if session_db else SessionStore()
 
+# 后台加载状态：warming（加载中）/ ready / failed（模型文件不存在或加载失败，一直使用搜索）
+loaded = {"status": "warming", "model": None, "book": None, "error": None}
+# 启动各阶段耗时（毫秒）
+startup_report = {"imports": round((time.perf_counter() - _STARTED) * 1000, 1)}
+
+_chessdb = None
+_chessdb_lock = threading.Lock()
+
+
+def get_chessdb():
+    """chessdb.cn 查询客户端：带缓存、连接池和超时，相同 FEN 的并发请求只查一次（首次使用时创建）"""
+    global _chessdb
+    with _chessdb_lock:
+        if _chessdb is None:
+            from chess_ai.utils.chessdb_client import ChessDBClient
+            _chessdb = ChessDBClient()
+            client = _chessdb
+            metrics.REGISTRY.collect('chess_chessdb_lookups_total', 'counter', "chessdb 查询次数，按命中的缓存层",
+                                     lambda: {(('result', k),): v for k, v in client.stats.items()})
+        return _chessdb
+
+
+def _timed(name, func):
+    started = time.perf_counter()
+    result = func()
+    startup_report[name] = round((time.perf_counter() - started) * 1000, 1)
+    return result
 
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+
+def load_evaluation():
+    """棋谱拟合的评估表（python -m chess_ai.tools.texel_tune 生成）；文件只有 1 KB 多，
+    在启动后台线程之前同步加载，保证任何搜索（包括模型就绪前的回退搜索）都用同一张表"""
+    eval_path = os.path.join(MODEL_DIR, "evaluation.cxe")
+    if os.path.exists(eval_path):
+        from chess_ai.search.evaluate import use_weights
+        _timed("evaluation", lambda: use_weights(eval_path))
+        print(f"已加载评估表：{eval_path}")
 
 
 def load_model():
-    model_path = "./chess_ai/model/chess_ai_model.pkl"
+    """后台线程：导入依赖，加载开局库和模型并预热，完成后打印启动报告"""
+    started = time.perf_counter()
+
+    def import_modules():
+        import chess_ai.utils.board_utils
+        import chess_ai.utils.notation
+        import chess_ai.search.alphabeta
+
+    _timed("background_imports", import_modules)
+    _timed("chessdb_client", get_chessdb)
+
+    # 离线开局库（python -m chess_ai.model.opening_book 编译得到），在统计模型、搜索和网络查询之前使用
+    book_path = os.path.join(MODEL_DIR, "opening_book.cxb")
+    if os.path.exists(book_path):
+        from chess_ai.model.opening_book import OpeningBook
+        loaded["book"] = _timed("opening_book", lambda: OpeningBook(book_path))
+        print(f"已加载开局库：{len(loaded['book'])} 个走法")
+
+    model_path = os.path.join(MODEL_DIR, "chess_ai_model.pkl")
+    # 优先使用可 mmap 的二进制模型（python -m chess_ai.model.model_store 转换得到）
+    if os.path.exists(os.path.join(MODEL_DIR, "chess_ai_model.cxm")):
+        model_path = os.path.join(MODEL_DIR, "chess_ai_model.cxm")
     try:
-        with open(model_path, 'rb') as f:
-            model_data = pickle.load(f)
+        from chess_ai.model.chess_model import ChessModel
+        from chess_ai.search.transposition import shared_table
+        model = _timed("model_load", lambda: ChessModel.load(model_path))
+        model.search_processes = SEARCH_PROCESSES
+        if SEARCH_PROCESSES > 1:
+            # 提前启动辅助进程，第一次回退搜索不用等进程启动
+            from chess_ai.search.parallel import parallel_searcher
+            _timed("parallel_search", lambda: parallel_searcher(SEARCH_PROCESSES))
+        # 预热：访问一次统计表，并提前分配置换表
+        _timed("warm_up", lambda: (model.predict_book(sessions.get(DEFAULT_GAME)), shared_table()))
+        loaded["model"] = model
+        loaded["status"] = "ready"
         print(f"已加载模型：{model_path}")
-    except FileNotFoundError:
-        print(f"模型文件未找到，请确保模型已训练并保存到 {model_path}")
-        return
+    except FileNotFoundError as e:
+        loaded["error"] = str(e)
+        loaded["status"] = "failed"
+        print(f"模型文件未找到，请确保模型已训练并保存到 {model_path}；将一直使用搜索走棋")
+    except Exception as e:
+        loaded["error"] = str(e)
+        loaded["status"] = "failed"
+        print(f"模型加载失败：{e}；将一直使用搜索走棋")
 
-    # 从字典数据中重新构建ChessModel实例
-    model = ChessModel(model_type=model_data['model_type'])
-    model.move_stats = model_data['move_stats']
-    model.win_stats = model_data['win_stats']
-
-    # 初始化棋盘
-    global a
-    board_state = initial_board()
-    a = board_state
-    print("初始棋盘状态：")
-    print(board_state)
-
-    @app.route('/api/suggest/<current_board_status>')
-    def model_move_mock(current_board_status):
-        print(f"用户走法：{current_board_status}")
-        global a
-        print('走之前棋盘状态：',a)
-        board_state = apply_move(a,current_board_status)
-        a = board_state
-        response_payload = {}
-        try:
-            ai_move = model.predict(board_state)
-            print(ai_move)
-            if ai_move is None:
-                print("AI无法找到合法走法，游戏结束")
-                response_payload = {
-                    "code": 404,
-                    "data": None,
-                    "message": "AI没有可建议的走法 (测试序列结束)"
-                }
-            print(f"AI走法：{ai_move}")
-            response_payload = {
-                "code": 200,
-                "data": ai_move
-            }
-        except ValueError as e:
-            print(f"AI走法出错：{e}")
+    startup_report["background_total"] = round((time.perf_counter() - started) * 1000, 1)
+    print("启动报告（毫秒）：" + "，".join(f"{name} {ms}" for name, ms in startup_report.items()))
+
+
+_loader_pid = None
+_loader_lock = threading.Lock()
+
+
+def start():
+    """启动后台加载线程；每个进程只启动一次（gunicorn --preload fork 出的 worker 在第一个请求时各自启动）"""
+    global _loader_pid
+    if _loader_pid == os.getpid():
+        return
+    with _loader_lock:
+        if _loader_pid != os.getpid():
+            _loader_pid = os.getpid()
+            load_evaluation()
+            threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+
+
+def suggest_move(board_state):
+    """开局库 -> 统计模型 -> 搜索；模型未就绪时跳过统计模型"""
+    book = loaded["book"]
+    with metrics.span('opening_book'):
+        ai_move = book.best_move(board_state) if book is not None else None
+    if ai_move is not None:
+        metrics.BOOK_HITS.inc(source='opening_book')
+        return ai_move
+    model = loaded["model"]
+    if model is not None:
+        return model.predict(board_state)
+    from chess_ai.search.alphabeta import search_best_move
+    metrics.FALLBACKS.inc()
+    with metrics.span('fallback_search'):
+        return search_best_move(board_state, BLACK, WARMING_SEARCH_TIME)
+
+
+@app.route('/api/suggest/status')
+def status():
+    return jsonify({"code": 200, "data": loaded["status"], "startup": startup_report})
+
+
+@app.route('/api/suggest/<current_board_status>')
+def model_move_mock(current_board_status):
+    from chess_ai.utils.board_utils import apply_move
+
+    print(f"用户走法：{current_board_status}")
+    game_id = request.args.get('game', DEFAULT_GAME)
+    with metrics.span('apply_move'):
+        board_state = sessions.update(game_id, lambda state: apply_move(state, current_board_status))
+    print('走之后棋盘状态：', board_state)
+    try:
+        ai_move = suggest_move(board_state)
+        if ai_move is None:
+            print("AI无法找到合法走法，游戏结束")
             response_payload = {
                 "code": 404,
                 "data": None,
                 "message": "AI没有可建议的走法 (测试序列结束)"
             }
+        else:
+            print(f"AI走法：{ai_move}")
+            response_payload = {
+                "code": 200,
+                "data": ai_move
+            }
+    except ValueError as e:
+        print(f"AI走法出错：{e}")
+        response_payload = {
+            "code": 404,
+            "data": None,
+            "message": "AI没有可建议的走法 (测试序列结束)"
+        }
+    if loaded["status"] != "ready":
+        response_payload["status"] = loaded["status"]
+
+    return jsonify(response_payload)
 
-        return jsonify(response_payload)
 
-    @app.route('/api/suggest/restart')
-    def restart():
-        global a
-        a = initial_board()
-        return jsonify({"code": 200, "data": "restart"})
+@app.route('/api/suggest/restart')
+def restart():
+    sessions.reset(request.args.get('game', DEFAULT_GAME))
+    return jsonify({"code": 200, "data": "restart"})
 
-    @app.route('/api/suggest/current_apply_ai_step')
-    def apply_ai_step():
-        global a
-        current_apply_ai_step = request.args.get('move')
-        a = apply_move(a, current_apply_ai_step)
-        return jsonify({"code": 200, "data": "applyOK"})
 
-    api = "https://www.chessdb.cn/chessdb.php"
+@app.route('/api/suggest/current_apply_ai_step')
+def apply_ai_step():
+    from chess_ai.utils.board_utils import apply_move
 
-    from flask import request, jsonify
+    current_apply_ai_step = request.args.get('move')
+    sessions.update(request.args.get('game', DEFAULT_GAME), lambda state: apply_move(state, current_apply_ai_step))
+    return jsonify({"code": 200, "data": "applyOK"})
+
+
+@app.route('/api/suggest/getApiMove')
+def getApiMove():
     import requests
+    from chess_ai.utils.notation import board_to_fen, iccs_to_dp
+
+    # 1. 获取前端传来的 board 参数(传回来的是走步，不是棋局状态)
+    board_dp = request.args.get('board')  # 这个就是前端传过来的 currentBoardString
+    if not board_dp:
+        return jsonify({"code": 400, "error": "缺少 board 参数"}), 400
+
+    with metrics.span('session'):
+        a = sessions.get(request.args.get('game', DEFAULT_GAME))
+
+    # 开局库命中时直接返回，不访问网络
+    book = loaded["book"]
+    with metrics.span('opening_book'):
+        book_move = book.best_move(a) if book is not None else None
+    if book_move is not None:
+        metrics.BOOK_HITS.inc(source='opening_book')
+        print(f"[DEBUG] 开局库走法: {book_move}")
+        return jsonify({
+            "code": 200,
+            "data": book_move
+        })
+
+    # 2. 使用这个 board_dp 作为输入的东萍棋局状态
+    with metrics.span('to_fen'):
+        b = board_to_fen(a)  # 东萍转 FEN 格式（黑方走棋）
+    b = b + " "
+    print(f"[DEBUG] 接收到的 board 字符串: {board_dp}")
+    print(f"[DEBUG] 转换后的 FEN 格式: {b}")
+
+    # 3. 发送请求给 AI API
+    try:
+        # querybest 查不到时客户端会再查 queryall
+        with metrics.span('chessdb'):
+            move_part, res = get_chessdb().best_move(b)
 
-    @app.route('/api/suggest/getApiMove')
-    def getApiMove():
-        # 1. 获取前端传来的 board 参数(传回来的是走步，不是棋局状态)
-        board_dp = request.args.get('board')  # 这个就是前端传过来的 currentBoardString
-        if not board_dp:
-            return jsonify({"code": 400, "error": "缺少 board 参数"}), 400
+        if move_part is None:
+            metrics.UPSTREAM_MISSES.inc()
+            return jsonify({
+                "code": 400,
+                "data": '9999'
+            })
 
-        print(board_dp)
+        best_move = iccs_to_dp(move_part)
 
-        # # 改变棋盘状态
-        # chess_from = board_dp[0] + board_dp[1]
-        # chess_to = board_dp[2] + board_dp[3]
-        # # 对棋子位置进行处理
-        # a.replace(str(chess_from), str(chess_to))
+        print(f"[DEBUG] AI 返回的原始结果: {res}")
+        print(f"[DEBUG] 最终返回的东萍走法: {best_move}")
 
-        global  a
+        # 4. 返回东萍格式的走法给前端
+        return jsonify({
+            "code": 200,
+            "data": best_move
+        })
 
-        print(a)
+    except requests.exceptions.RequestException as e:
+        return jsonify({"code": 500, "error": str(e)})
 
 
-        # 2. 使用这个 board_dp 作为输入的东萍棋局状态
-        b = invertToFen.changetoFen(a)  # 东萍转 FEN 格式
-        b = b + " "
-        # 3. 构造 AI 查询参数
-        params = {
-            "action": "querybest",
-            "board": b
-        }
-        print(f"[DEBUG] 接收到的 board 字符串: {board_dp}")
-        print(f"[DEBUG] 转换后的 FEN 格式: {b}")
-
-        # 4. 发送请求给 AI API
-        try:
-            ai_api_url = api  # 替换为实际的 AI 接口地址
-            response = requests.get(ai_api_url, params=params)
-            response.raise_for_status()
-
-            res = response.text
-            parts = res.split(':')
-            print(parts)
-            move_part = parts[1] if len(parts) > 1 else None
-            if move_part is None:
-                response = requests.get("https://www.chessdb.cn/chessdb.php?action=queryall&board="+b)
-                res = response.text
-                parts = res.split(':')
-                move_part = parts[1] if len(parts) > 1 else None
-
-            if move_part is None:
-                return jsonify({
-                    "code": 400,
-                    "data": '9999'
-                })
-
-            best_move = movesChange.movesToDP(move_part[0:4])
-
-            print(f"[DEBUG] 接收到的 board 字符串: {board_dp}")
-            print(f"[DEBUG] 转换后的 FEN 格式: {b}")
-            print(f"[DEBUG] AI 返回的原始结果: {res}")
-            print(f"[DEBUG] 最终返回的东萍走法: {best_move}")
-
-            # 5. 返回东萍格式的走法给前端
-            return jsonify({
-                "code": 200,
-                "data": best_move
-            })
+startup_report["routes_ready"] = round((time.perf_counter() - _STARTED) * 1000, 1)
 
-        except requests.exceptions.RequestException as e:
-            return jsonify({"code": 500, "error": str(e)})
+# WSGI 服务器导入本模块时就开始加载；以脚本运行（debug 模式）时，重载器的父进程只负责监视文件，
+# 模型只在实际处理请求的子进程（WERKZEUG_RUN_MAIN=true）中加载
+if __name__ != '__main__' or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    start()
+app.before_request(start)
 
 
 if __name__ == '__main__':
-    load_model()
+    print(f"路由已就绪：{startup_report['routes_ready']} 毫秒（模型在后台加载，GET /api/suggest/status 查看进度）")
     app.run(host='0.0.0.0', port=8080, debug=True)
@@ -1,28 +1,63 @@
-from flask import Flask, request, jsonify
-from model.chess_model import ChessModel
+from flask import Flask, Response, request, jsonify
 import os
 import sys
+import threading
 
-# 添加父目录到路径
+# 添加父目录（chess_ai）和项目根目录（flask）到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from chess_ai.model.chess_model import ChessModel
+from chess_ai.api.batch import parse_batch, iter_ndjson
+from chess_ai.utils import metrics
 
 app = Flask(__name__)
+# /metrics 路由和每个请求的耗时分解（Server-Timing 响应头）
+metrics.install_flask(app)
 
-# 加载模型
 MODEL_TYPE = os.getenv('MODEL_TYPE', 'winrate')  # 默认使用胜率模型
-if MODEL_TYPE == 'freq':
-    model = ChessModel.load('../model/freq_model.pkl')
-else:
-    model = ChessModel.load('../model/winrate_model.pkl')
+# 回退搜索的进程数，大于 1 时启用多进程并行搜索（Lazy SMP）；并行搜索器同一时刻只服务一个请求，
+# 其余并发请求改用单进程搜索而不排队（延迟不累加，但搜得浅一些）。
+# 辅助进程以 spawn 方式启动，会把以脚本运行的本文件重新导入为 __mp_main__，所以导入时不加载模型
+SEARCH_PROCESSES = int(os.getenv('CHESS_SEARCH_PROCESSES', '1'))
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """加载模型（首次调用时加载，之后复用）"""
+    global _model
+    if _model is not None:
+        return _model
+    with _model_lock:
+        if _model is None:
+            if MODEL_TYPE == 'freq':
+                model = ChessModel.load('../model/freq_model.pkl')
+            else:
+                model = ChessModel.load('../model/winrate_model.pkl')
+            model.search_processes = SEARCH_PROCESSES
+            _model = model
+        return _model
 
 @app.route('/suggest/<board_state>', methods=['GET'])
 def suggest_move(board_state):
     """API: 获取机器走法建议"""
-    move = model.predict(board_state)
+    move = get_model().predict(board_state)
     if not move:
         return jsonify({"error": "No move found for this board state"}), 404
     return jsonify({"move": move})
 
+@app.route('/suggest/batch', methods=['POST'])
+def suggest_batch():
+    """API: 批量获取走法建议，结果以 NDJSON 逐行返回"""
+    model = get_model()
+    try:
+        items = parse_batch(request.get_json(force=True), model.search_time)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+    return Response(iter_ndjson(model, items), mimetype='application/x-ndjson')
+
 @app.route('/move', methods=['GET'])
 def make_move():
     """API: 执行人类走法"""
@@ -52,4 +87,5 @@ def memorize_move():
     return jsonify({"status": "learned", "move": move})
 
 if __name__ == '__main__':
+    get_model()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,287 @@
+"""异步（ASGI）服务模式
+
+与 backend_mock.py（/api/suggest/*）和 chess_ai/api/app.py（/suggest、/move、/memorize）相同的路由和 JSON 返回，区别在于：
+    - chessdb 查询使用 AsyncChessDBClient（httpx 连接池），等待网络时不占用线程
+    - ChessModel.predict（可能回退到搜索）放到进程池执行，每个请求有截止时间
+    - 开局库查询、内存会话读写直接在事件循环中完成（微秒级）；SQLite 会话放到线程中执行
+启动：python -m chess_ai.api.asgi_app --port 8080 [--workers 4] [--deadline 5]
+或：uvicorn --factory chess_ai.api.asgi_app:create_app
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+CHESS_AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(CHESS_AI_DIR))
+
+from chess_ai.utils.board_engine import BLACK
+from chess_ai.utils.board_utils import apply_move
+from chess_ai.utils.notation import board_to_fen, iccs_to_dp
+from chess_ai.utils.chessdb_client import API_URL, DEFAULT_CACHE_PATH, AsyncChessDBClient
+from chess_ai.model.chess_model import ChessModel
+from chess_ai.search.alphabeta import search_best_move
+from chess_ai.model.opening_book import OpeningBook
+from chess_ai.api.session_store import SessionStore, SQLiteSessionStore, DEFAULT_GAME
+
+NO_MOVE_PAYLOAD = {"code": 404, "data": None, "message": "AI没有可建议的走法 (测试序列结束)"}
+TIMEOUT_PAYLOAD = {"code": 504, "data": None, "message": "AI 计算超时"}
+
+
+def default_model_path():
+    """与 backend_mock 相同：优先使用二进制模型"""
+    model_dir = os.path.join(CHESS_AI_DIR, 'model')
+    binary = os.path.join(model_dir, 'chess_ai_model.cxm')
+    return binary if os.path.exists(binary) else os.path.join(model_dir, 'chess_ai_model.pkl')
+
+
+# 进程池 worker 中的模型（每个进程加载一次）；加载失败时为 None，与 backend_mock 相同一直使用搜索走棋
+_worker_model = None
+_worker_search_time = 1.0
+
+
+def _init_worker(model_path, search_time):
+    global _worker_model, _worker_search_time
+    _worker_search_time = search_time
+    try:
+        _worker_model = ChessModel.load(model_path)
+        _worker_model.search_time = search_time
+    except FileNotFoundError:
+        print(f"模型文件未找到：{model_path}；将一直使用搜索走棋")
+    except Exception as e:
+        print(f"模型加载失败：{e}；将一直使用搜索走棋")
+
+
+def _predict(board_state, side):
+    if _worker_model is None:
+        return search_best_move(board_state, side, _worker_search_time)
+    return _worker_model.predict(board_state, side)
+
+
+class SuggestServer:
+    """ASGI 应用：路由表 + JSON 响应"""
+
+    def __init__(self, model_path=None, book_path=None, workers=None, deadline=5.0, search_time=1.0,
+                 session_db=None, chessdb_url=API_URL, chessdb_cache=DEFAULT_CACHE_PATH):
+        self.model_path = model_path or default_model_path()
+        book_path = book_path or os.path.join(CHESS_AI_DIR, 'model', 'opening_book.cxb')
+        self.book = OpeningBook(book_path) if os.path.exists(book_path) else None
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.deadline = deadline
+        self.search_time = search_time
+        self.sessions = SQLiteSessionStore(session_db) if session_db else SessionStore()
+        self.chessdb_url = chessdb_url
+        self.chessdb_cache = chessdb_cache
+        self._pool = None
+        self._chessdb = None
+
+        self.routes = [
+            ('GET', r'/api/suggest/restart', self.restart),
+            ('GET', r'/api/suggest/current_apply_ai_step', self.apply_ai_step),
+            ('GET', r'/api/suggest/getApiMove', self.get_api_move),
+            ('GET', r'/api/suggest/(?P<move>[^/]+)', self.model_move),
+            ('GET', r'/suggest/(?P<board_state>[^/]+)', self.suggest_move),
+            ('GET', r'/move', self.make_move),
+            ('POST', r'/memorize', self.memorize_move),
+        ]
+        self.routes = [(method, re.compile(pattern + '$'), handler) for method, pattern, handler in self.routes]
+
+    # ---------- 资源 ----------
+
+    @property
+    def pool(self):
+        """预测用的执行器：workers > 0 时为进程池，否则为单线程（同一进程内加载模型）"""
+        if self._pool is None:
+            if self.workers > 0:
+                self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                 initargs=(self.model_path, self.search_time))
+            else:
+                self._pool = ThreadPoolExecutor(1, initializer=_init_worker,
+                                                initargs=(self.model_path, self.search_time))
+        return self._pool
+
+    @property
+    def chessdb(self):
+        if self._chessdb is None:
+            self._chessdb = AsyncChessDBClient(self.chessdb_url, cache_path=self.chessdb_cache)
+        return self._chessdb
+
+    async def shutdown(self):
+        if self._chessdb is not None:
+            await self._chessdb.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def predict(self, board_state, side=BLACK):
+        """在执行器中预测，超过截止时间抛出 asyncio.TimeoutError"""
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(loop.run_in_executor(self.pool, _predict, board_state, side), self.deadline)
+
+    async def session(self, method, *args):
+        """会话读写：SQLite 存储可能等锁，放到线程中执行"""
+        func = getattr(self.sessions, method)
+        if isinstance(self.sessions, SQLiteSessionStore):
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    # ---------- backend_mock 的路由 ----------
+
+    async def model_move(self, params, query, body):
+        move = params['move']
+        print(f"用户走法：{move}")
+        # 与 backend_mock 相同，非法走法不单独处理（由 __call__ 返回 500）
+        board_state = await self.session('update', query.get('game', DEFAULT_GAME),
+                                         lambda state: apply_move(state, move))
+
+        ai_move = self.book.best_move(board_state) if self.book is not None else None
+        try:
+            if ai_move is None:
+                ai_move = await self.predict(board_state)
+        except asyncio.TimeoutError:
+            return 200, TIMEOUT_PAYLOAD
+        except ValueError as e:
+            print(f"AI走法出错：{e}")
+            return 200, NO_MOVE_PAYLOAD
+        if ai_move is None:
+            print("AI无法找到合法走法，游戏结束")
+            return 200, NO_MOVE_PAYLOAD
+        print(f"AI走法：{ai_move}")
+        return 200, {"code": 200, "data": ai_move}
+
+    async def restart(self, params, query, body):
+        await self.session('reset', query.get('game', DEFAULT_GAME))
+        return 200, {"code": 200, "data": "restart"}
+
+    async def apply_ai_step(self, params, query, body):
+        move = query.get('move', '')
+        await self.session('update', query.get('game', DEFAULT_GAME), lambda state: apply_move(state, move))
+        return 200, {"code": 200, "data": "applyOK"}
+
+    async def get_api_move(self, params, query, body):
+        import httpx
+
+        if not query.get('board'):
+            return 400, {"code": 400, "error": "缺少 board 参数"}
+        board_state = await self.session('get', query.get('game', DEFAULT_GAME))
+
+        # 开局库命中时直接返回，不访问网络
+        book_move = self.book.best_move(board_state) if self.book is not None else None
+        if book_move is not None:
+            return 200, {"code": 200, "data": book_move}
+
+        fen = board_to_fen(board_state) + " "
+        try:
+            move_part, _ = await self.chessdb.best_move(fen)
+        except httpx.HTTPError as e:
+            return 200, {"code": 500, "error": str(e)}
+        if move_part is None:
+            return 200, {"code": 400, "data": '9999'}
+        return 200, {"code": 200, "data": iccs_to_dp(move_part)}
+
+    # ---------- chess_ai/api/app.py 的路由 ----------
+
+    async def suggest_move(self, params, query, body):
+        try:
+            move = await self.predict(params['board_state'])
+        except asyncio.TimeoutError:
+            return 504, {"error": "Prediction timed out"}
+        if not move:
+            return 404, {"error": "No move found for this board state"}
+        return 200, {"move": move}
+
+    async def make_move(self, params, query, body):
+        board_state, action = query.get('board'), query.get('action')
+        if not board_state or not action:
+            return 400, {"error": "Missing board or action parameter"}
+        try:
+            return 200, {"new_board": apply_move(board_state, action)}
+        except Exception as e:
+            return 400, {"error": str(e)}
+
+    async def memorize_move(self, params, query, body):
+        try:
+            data = json.loads(body or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            return 400, {"error": f"请求体不是合法的 JSON：{e}"}
+        if not isinstance(data, dict):
+            return 400, {"error": "请求体需要 JSON 对象"}
+        return 200, {"status": "learned", "move": data.get('move')}
+
+    # ---------- ASGI ----------
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await self.shutdown()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+
+        method, path = scope['method'], scope['path']
+        if method == 'OPTIONS':
+            await self._send(send, 204, None)
+            return
+        query = {k: v[0] for k, v in parse_qs(scope.get('query_string', b'').decode()).items()}
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match and route_method == method:
+                try:
+                    status, payload = await handler(match.groupdict(), query, body)
+                except Exception as e:
+                    # 与 Flask 未处理的异常相同返回 500，但保持 JSON 格式，且不影响之后的请求
+                    print(f"处理 {method} {path} 出错：{e!r}")
+                    status, payload = 500, {"code": 500, "error": str(e)}
+                break
+        else:
+            status, payload = 404, {"error": "Not Found"}
+        await self._send(send, status, payload)
+
+    @staticmethod
+    async def _send(send, status, payload):
+        body = b'' if payload is None else json.dumps(payload).encode()
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'access-control-allow-origin', b'*'),
+            (b'access-control-allow-headers', b'*'),
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def create_app(**kwargs):
+    """uvicorn --factory 使用的入口"""
+    return SuggestServer(**kwargs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="异步（ASGI）建议服务")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--model', default=None, help="模型文件（默认与 backend_mock 相同）")
+    parser.add_argument('--workers', type=int, default=None, help="预测进程数，0 表示在本进程的线程中预测")
+    parser.add_argument('--deadline', type=float, default=5.0, help="每个预测请求的截止时间（秒）")
+    parser.add_argument('--search-time', type=float, default=1.0, help="回退搜索的时间预算（秒）")
+    parser.add_argument('--session-db', default=os.environ.get("CHESS_SESSION_DB"), help="共享会话的 SQLite 文件")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(SuggestServer(args.model, workers=args.workers, deadline=args.deadline,
+                              search_time=args.search_time, session_db=args.session_db),
+                host=args.host, port=args.port)
@@ -0,0 +1,104 @@
+"""批量走法建议
+
+请求体：{"positions": ["东萍棋盘", {"board": "东萍棋盘", "time": 0.5, "side": "red"}, ...], "time": 1.0}
+    time 为单个局面的搜索时间（秒），side 为走棋方（缺省黑方）
+处理：相同局面（同类棋子换槽位也算相同）只算一次；统计模型有记录的直接返回，其余放到进程池并行搜索。
+结果按完成顺序逐行输出（NDJSON），每行对应请求中的一个局面：
+    {"index": 0, "board": "...", "move": "7062", "source": "book"}      source 为 book / search
+    {"index": 1, "board": "...", "error": "..."}
+最后一行为汇总：{"done": true, "count": ..., "unique": ..., "book_hits": ..., "elapsed": ...}
+"""
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from chess_ai.utils.board_engine import RED, BLACK
+from chess_ai.utils.board_utils import normalize_board
+from chess_ai.search.alphabeta import search_best_move
+
+MAX_TIME = 10.0  # 单个局面的搜索时间上限（秒）
+SIDES = {'red': RED, 'black': BLACK, 'w': RED, 'b': BLACK, RED: RED, BLACK: BLACK}
+
+_pool = None
+
+
+def batch_pool(workers=None):
+    """批量搜索用的进程池（首次调用时创建）"""
+    global _pool
+    if _pool is None:
+        # 与 search.parallel 相同：调用方是多线程的 Flask 进程，不用 fork
+        _pool = ProcessPoolExecutor(workers or os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def parse_batch(payload, default_time=1.0):
+    """解析请求体，返回 [(index, board, side, time_limit)]；格式错误抛出 ValueError"""
+    if isinstance(payload, list):
+        payload = {"positions": payload}
+    if not isinstance(payload, dict) or not isinstance(payload.get('positions'), list):
+        raise ValueError("请求体需要 positions 列表")
+    default_time = float(payload.get('time', default_time))
+
+    items = []
+    for index, entry in enumerate(payload['positions']):
+        if isinstance(entry, str):
+            entry = {"board": entry}
+        if not isinstance(entry, dict):
+            raise ValueError(f"第 {index} 个局面格式错误")
+        side = SIDES.get(entry.get('side', BLACK))
+        if side is None:
+            raise ValueError(f"第 {index} 个局面的走棋方无效：{entry.get('side')}")
+        time_limit = min(max(float(entry.get('time', default_time)), 0.01), MAX_TIME)
+        items.append((index, entry.get('board'), side, time_limit))
+    return items
+
+
+def _valid_board(board):
+    return isinstance(board, str) and len(board) == 64 and board.isdigit()
+
+
+def iter_batch(model, items, pool=None):
+    """逐个产出结果字典（完成一个输出一个），最后产出汇总"""
+    started = time.perf_counter()
+    groups = {}  # (规范化局面, 走棋方) -> [(index, board, time_limit)]
+    for index, board, side, time_limit in items:
+        if not _valid_board(board):
+            yield {"index": index, "board": board, "error": "东萍棋盘需要 64 位数字"}
+            continue
+        groups.setdefault((normalize_board(board), side), []).append((index, board, time_limit))
+
+    # 先提交全部搜索，再输出统计模型命中的结果，搜索在客户端读取期间已经在进行
+    book_results, futures = [], {}
+    pool = pool or batch_pool()
+    for (_, side), entries in groups.items():
+        board = entries[0][1]
+        move = model.predict_book(board, side)
+        if move is not None:
+            book_results.extend({"index": index, "board": original, "move": move, "source": "book"}
+                                for index, original, _ in entries)
+            continue
+        time_limit = max(time_limit for _, _, time_limit in entries)
+        futures[pool.submit(search_best_move, board, side, time_limit)] = entries
+    book_hits = len(groups) - len(futures)
+    yield from book_results
+
+    for future in as_completed(futures):
+        entries = futures[future]
+        try:
+            move = future.result()
+            results = [{"index": index, "board": original, "move": move, "source": "search"}
+                       for index, original, _ in entries]
+        except Exception as e:
+            results = [{"index": index, "board": original, "error": str(e)} for index, original, _ in entries]
+        yield from results
+
+    yield {"done": True, "count": len(items), "unique": len(groups), "book_hits": book_hits,
+           "elapsed": round(time.perf_counter() - started, 3)}
+
+
+def iter_ndjson(model, items, pool=None):
+    """把 iter_batch 的结果编码为 NDJSON 行"""
+    for result in iter_batch(model, items, pool):
+        yield json.dumps(result) + "\n"
@@ -0,0 +1,109 @@
+"""对局会话存储
+
+每局棋按 game_id 保存当前的东萍棋盘字符串，替代 backend_mock 中的全局变量 a：
+    SessionStore        进程内存储，LRU 上限 + 空闲超时淘汰，线程安全
+    SQLiteSessionStore  多个 worker 进程共享的 SQLite 存储，读改写在一个写事务内完成
+两者接口相同：get / put / reset / update。
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from chess_ai.utils.board_engine import INITIAL_STATE
+
+DEFAULT_GAME = "default"
+
+
+class SessionStore:
+    def __init__(self, max_sessions=10000, idle_timeout=3600):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._games = OrderedDict()  # game_id -> (棋盘, 最后访问时间)
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._games)
+
+    def get(self, game_id=DEFAULT_GAME):
+        """当前棋盘；新对局或已被淘汰的对局从初始局面开始"""
+        with self._lock:
+            return self._touch(game_id, self._games.get(game_id, (None, 0))[0] or INITIAL_STATE)
+
+    def put(self, game_id, board_state):
+        with self._lock:
+            self._touch(game_id, board_state)
+
+    def reset(self, game_id=DEFAULT_GAME):
+        self.put(game_id, INITIAL_STATE)
+
+    def update(self, game_id, func):
+        """原子地把 func 应用到当前棋盘并保存，返回新棋盘（func 抛异常时不修改）"""
+        with self._lock:
+            board_state = self._games.get(game_id, (None, 0))[0] or INITIAL_STATE
+            return self._touch(game_id, func(board_state))
+
+    def _touch(self, game_id, board_state):
+        now = time.time()
+        self._games[game_id] = (board_state, now)
+        self._games.move_to_end(game_id)
+        # 淘汰超过上限的最久未用对局，以及空闲超时的对局（最久未用的在最前面）
+        while self._games:
+            oldest_id, (_, last_seen) = next(iter(self._games.items()))
+            if len(self._games) <= self.max_sessions and now - last_seen <= self.idle_timeout:
+                break
+            del self._games[oldest_id]
+            self.evicted += 1
+        return board_state
+
+
+class SQLiteSessionStore:
+    def __init__(self, path, idle_timeout=3600, timeout=10.0):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS sessions (game_id TEXT PRIMARY KEY, board TEXT, updated REAL)")
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+
+    def _connect(self):
+        # sqlite3 连接不能跨线程使用，每个线程一个
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        return db
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def get(self, game_id=DEFAULT_GAME):
+        row = self._connect().execute("SELECT board, updated FROM sessions WHERE game_id=?", (game_id,)).fetchone()
+        if row is None or time.time() - row[1] > self.idle_timeout:
+            return INITIAL_STATE
+        return row[0]
+
+    def put(self, game_id, board_state):
+        db = self._connect()
+        now = time.time()
+        db.execute("INSERT OR REPLACE INTO sessions (game_id, board, updated) VALUES (?, ?, ?)",
+                   (game_id, board_state, now))
+        db.execute("DELETE FROM sessions WHERE updated < ?", (now - self.idle_timeout,))
+
+    def reset(self, game_id=DEFAULT_GAME):
+        self.put(game_id, INITIAL_STATE)
+
+    def update(self, game_id, func):
+        """在 BEGIN IMMEDIATE 写事务内完成读改写，多个进程同时走同一局时不会互相覆盖"""
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            board_state = func(self.get(game_id))
+            self.put(game_id, board_state)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        return board_state
@@ -1,109 +1,376 @@
+import math
 import pickle
+import threading
 from collections import defaultdict
 import numpy as np
-import random
 from tqdm import tqdm
-from chess_ai.utils.board_utils import generate_legal_moves  # 新增函数
+from chess_ai.utils.board_utils import zobrist_hashes, apply_move_with_hashes, normalize_board, mirror_board
+from chess_ai.utils.board_engine import Board, RED, BLACK
+from chess_ai.search.alphabeta import Searcher
+from chess_ai.search.transposition import shared_table
+from chess_ai.search.parallel import parallel_searcher
+from chess_ai.model.model_store import ModelStore, is_model_store, write_model_store
+from chess_ai.utils import metrics
+from concurrent.futures import ProcessPoolExecutor
+
+
+def game_outcome(result):
+    """红方得分: 1=红胜, 0=黑胜, 0.5=平局"""
+    return 1 if result == 'red_win' else 0 if result == 'black_win' else 0.5
+
+
+def mirror_move(move):
+    """东萍走法左右镜像（横坐标 x -> 8-x）"""
+    return f"{8 - int(move[0])}{move[1]}{8 - int(move[2])}{move[3]}"
+
+
+class WinStat:
+    """走法胜率的累计量：访问次数、红胜局数、和棋局数，O(1) 更新"""
+
+    __slots__ = ('visits', 'wins', 'draws')
+
+    def __init__(self, visits=0, wins=0, draws=0):
+        self.visits = visits
+        self.wins = wins
+        self.draws = draws
+
+    @classmethod
+    def from_outcomes(cls, outcomes):
+        """由旧模型的结果列表（1/0.5/0）汇总"""
+        return cls(len(outcomes), sum(1 for o in outcomes if o == 1), sum(1 for o in outcomes if o == 0.5))
+
+    def add(self, outcome):
+        self.visits += 1
+        if outcome == 1:
+            self.wins += 1
+        elif outcome == 0.5:
+            self.draws += 1
+
+    def __add__(self, other):
+        return WinStat(self.visits + other.visits, self.wins + other.wins, self.draws + other.draws)
+
+    @property
+    def score_sum(self):
+        return self.wins + 0.5 * self.draws
+
+    def mean(self, side=RED):
+        """side 方的平均得分"""
+        if not self.visits:
+            return 0.0
+        p = self.score_sum / self.visits
+        return p if side == RED else 1 - p
+
+    def lower_bound(self, z=1.96, side=RED):
+        """side 方得分的 Wilson 置信区间下界，样本少的走法会被压低"""
+        n = self.visits
+        if not n:
+            return 0.0
+        p = self.mean(side)
+        z2 = z * z
+        return (p + z2 / (2 * n) - z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n))) / (1 + z2 / n)
+
+    def to_tuple(self):
+        return self.visits, self.wins, self.draws
+
+
+def _load_win_stats(win_stats):
+    """把保存的胜率数据（旧版结果列表或 (visits, wins, draws) 元组）转为 WinStat"""
+    return {k: {move: WinStat(*value) if isinstance(value, tuple) else WinStat.from_outcomes(value)
+                for move, value in moves.items()}
+            for k, moves in win_stats.items()}
 
 
 class ChessModel:
-    def __init__(self, model_type='freq'):
+    def __init__(self, model_type='freq', check_collisions=False, rank='mean', search_time=1.0, search_processes=1):
         self.model_type = model_type
+        # 统计模型没有记录时，回退到 alpha-beta 搜索，每次搜索的时间预算（秒）
+        self.search_time = search_time
+        # 回退搜索使用的进程数，大于 1 时用 Lazy SMP 并行搜索（search.parallel）
+        self.search_processes = search_processes
+        # 搜索器（杀手走法/历史表）每个线程一份，置换表整个进程共享
+        self._local = threading.local()
+        # winrate 模型的排序方式：'mean' 按平均得分，'lcb' 按置信下界
+        self.rank = rank
+        # 统计表以局面的 64 位 Zobrist 哈希为键；局面与其左右镜像共用一个规范方向的键
         self.move_stats = defaultdict(lambda: defaultdict(int))
-        self.win_stats = defaultdict(lambda: defaultdict(list))
-
-    def augment_board_state(board_state):
-        """通过对称变换增强棋盘状态"""
-        augmented = []
-
-        # 原始状态
-        augmented.append(board_state)
-
-        # 水平翻转
-        flipped = ""
-        for i in range(0, len(board_state), 2):
-            pos_str = board_state[i:i + 2]
-            if pos_str == "99":
-                flipped += "99"
-            else:
-                x, y = int(pos_str[0]), int(pos_str[1])
-                flipped += f"{8 - x}{y}"  # 水平翻转
-        augmented.append(flipped)
-
-        return augmented
-
-    def train(self, games):
-        """训练模型"""
+        self.win_stats = defaultdict(lambda: defaultdict(WinStat))
+        # 开启碰撞检查时额外保存 哈希 -> 规范化的东萍棋盘字符串
+        self.check_collisions = check_collisions
+        self.positions = {}
+        self.collisions = 0
+        # 从二进制模型文件加载时，统计数据留在 mmap 中按需查询
+        self.store = None
+
+    def position_key(self, board_state, key=None, mirror_key=None):
+        """返回规范方向的局面键 (key, 是否镜像)：局面与其左右镜像取哈希较小者
+
+        开启碰撞检查时记录规范方向的局面并统计哈希碰撞。
+        """
+        if key is None or mirror_key is None:
+            key, mirror_key = zobrist_hashes(board_state)
+        mirrored = mirror_key < key
+        if mirrored:
+            key = mirror_key
+        if self.check_collisions:
+            self._record_position(key, normalize_board(mirror_board(board_state) if mirrored else board_state))
+        return key, mirrored
+
+    def _record_position(self, key, canonical_state):
+        known = self.positions.setdefault(key, canonical_state)
+        if known != canonical_state:
+            self.collisions += 1
+            print(f"Zobrist 哈希碰撞：{known} / {canonical_state}")
+
+    def lookup_key(self, board_state):
+        """预测时使用的局面键 (key, 是否镜像)，碰撞检查不通过时 key 为 None"""
+        key, mirror_key = zobrist_hashes(board_state)
+        mirrored = mirror_key < key
+        if mirrored:
+            key = mirror_key
+        if self.check_collisions:
+            canonical_state = normalize_board(mirror_board(board_state) if mirrored else board_state)
+            if self.positions.get(key, canonical_state) != canonical_state:
+                return None, mirrored
+        return key, mirrored
+
+    def train(self, games, workers=1, shard_size=1000):
+        """训练模型（workers > 1 时按 map-reduce 并行训练，结果与单进程完全一致）"""
         print(f"Training {self.model_type} model with {len(games)} games...")
+        if self.store is not None:
+            self.materialize()
+
+        if workers > 1:
+            shards = [games[i:i + shard_size] for i in range(0, len(games), shard_size)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(_train_shard, [(self.check_collisions, shard) for shard in shards])
+                for partial in tqdm(results, total=len(shards), desc="Merging shards"):
+                    self.merge(partial)
+            return
 
         for game in tqdm(games, desc="Processing games"):
-            result = game['result']
-            boards = game['board_states']
-            moves = game['moves']
+            self.add_game(game)
+
+    def add_game(self, game):
+        """把一局棋的每一步计入统计表"""
+        boards = game['board_states']
+        outcome = game_outcome(game['result'])
 
-            # 红方胜率: 1=红胜, 0=黑胜, 0.5=平局
-            outcome = 1 if result == 'red_win' else 0 if result == 'black_win' else 0.5
+        key, mirror_key = zobrist_hashes(boards[0]) if boards else (0, 0)
+        for i, move in enumerate(game['moves']):
+            board_state = boards[i]
+            self.add_sample(*self.canonical_sample(board_state, move, key, mirror_key), outcome)
 
-            for i, move in enumerate(moves):
-                board_state = boards[i]
+            # 增量更新下一个局面的哈希
+            _, key, mirror_key = apply_move_with_hashes(board_state, move, key, mirror_key)
 
-                # 使用数据增强
-                for augmented_state in self.augment_board_state():
-                    self.move_stats[augmented_state][move] += 1
-                    self.win_stats[augmented_state][move].append(outcome)
+    def canonical_sample(self, board_state, move, key=None, mirror_key=None):
+        """一个局面产生的训练样本 (规范局面键, 规范方向的走法)：局面被镜像时走法也一并镜像"""
+        key, mirrored = self.position_key(board_state, key, mirror_key)
+        return key, mirror_move(move) if mirrored else move
 
-                # 记录走法频率
-                self.move_stats[board_state][move] += 1
+    def add_sample(self, key, move, outcome):
+        """记录走法频率和胜率"""
+        self.move_stats[key][move] += 1
+        self.win_stats[key][move].add(outcome)
 
-                # 记录胜率
-                self.win_stats[board_state][move].append(outcome)
+    def train_stream(self, samples):
+        """从 (局面键, 走法, 红方得分) 样本流训练，不需要保存每局的棋盘历史"""
+        if self.store is not None:
+            self.materialize()
+        count = 0
+        for key, move, outcome in samples:
+            self.add_sample(key, move, outcome)
+            count += 1
+        print(f"Trained {self.model_type} model with {count} samples")
 
-    def predict(self, board_state):
-        """预测下一步走法"""
+    def shard_stats(self):
+        """导出可跨进程传递的部分统计量 (move_stats, win_stats, positions)"""
+        return ({k: dict(v) for k, v in self.move_stats.items()},
+                {k: {m: stat.to_tuple() for m, stat in v.items()} for k, v in self.win_stats.items()},
+                self.positions)
+
+    def merge(self, partial):
+        """合并另一份分片统计（shard_stats() 的返回值），计数直接相加"""
+        move_stats, win_stats, positions = partial
+        for key, moves in move_stats.items():
+            target = self.move_stats[key]
+            for move, count in moves.items():
+                target[move] += count
+        for key, moves in win_stats.items():
+            target = self.win_stats[key]
+            for move, (visits, wins, draws) in moves.items():
+                stat = target[move]
+                stat.visits += visits
+                stat.wins += wins
+                stat.draws += draws
+        if self.check_collisions:
+            for key, canonical_state in positions.items():
+                self._record_position(key, canonical_state)
+
+    def predict(self, board_state, side=BLACK):
+        """预测下一步走法（side 为走棋方，AI 在本项目中执黑）"""
         # 首先尝试统计模型
-        if board_state in self.move_stats:
+        with metrics.span('predict_book'):
+            move = self.predict_book(board_state, side)
+        if move is not None:
+            metrics.BOOK_HITS.inc(source='model')
+            return move
+
+        # 如果统计模型中没有记录，使用搜索回退策略
+        metrics.FALLBACKS.inc()
+        with metrics.span('fallback_search'):
+            return self.fallback_strategy(board_state, side)
+
+    def predict_book(self, board_state, side=BLACK):
+        """只查统计模型：按规范方向查询，选出的走法映射回原方向；没有记录或走法不合法返回 None"""
+        key, mirrored = self.lookup_key(board_state)
+        move = self.predict_canonical(key, side)
+        if move is not None:
+            move = mirror_move(move) if mirrored else move
+            # 统计走法可能来自哈希碰撞或另一方走棋的同一局面，不合法时交给搜索
+            if self.is_legal(board_state, move, side):
+                return move
+        return None
+
+    @staticmethod
+    def is_legal(board_state, move, side):
+        board = Board(board_state, side)
+        move = int(move)
+        return move in board.generate_moves(side) and board.is_legal(move, side)
+
+    def predict_canonical(self, key, side=BLACK):
+        """按规范局面键从统计表中选出 side 方的走法，没有记录返回 None"""
+        if self.store is not None:
+            return self.predict_from_store(key, side)
+        # 分数相同时取数值最小的走法，与二进制模型（走法按升序存放、取第一个最大值）一致
+        if key in self.move_stats:
             if self.model_type == 'freq':
-                moves = self.move_stats[board_state]
-                return max(moves, key=moves.get)
+                moves = self.move_stats[key]
+                return max(sorted(moves), key=moves.get)
             elif self.model_type == 'winrate':
                 best_move, best_winrate = None, -1
-                for move, outcomes in self.win_stats[board_state].items():
-                    winrate = np.mean(outcomes)
+                use_lcb = self.rank == 'lcb'
+                for move, stat in sorted(self.win_stats[key].items()):
+                    winrate = stat.lower_bound(side=side) if use_lcb else stat.mean(side)
                     if winrate > best_winrate:
                         best_winrate = winrate
                         best_move = move
                 return best_move
+        return None
 
-        # 如果统计模型中没有记录，使用基于规则的回退策略
-        return self.fallback_strategy(board_state)
+    def predict_from_store(self, key, side=BLACK):
+        """在二进制模型中二分查找局面并选出走法"""
+        rows = self.store.lookup(key) if key is not None else None
+        if rows is None or not len(rows):
+            return None
+        if self.model_type == 'freq':
+            best = int(np.argmax(rows['count']))
+        else:
+            n = np.maximum(rows['count'].astype(np.float64), 1)
+            winrate = (rows['wins'] + 0.5 * rows['draws']) / n
+            if side != RED:
+                winrate = 1 - winrate
+            if self.rank == 'lcb':
+                z2 = 1.96 * 1.96
+                spread = np.sqrt(np.clip(winrate * (1 - winrate), 0, None) / n + z2 / (4 * n * n))
+                winrate = (winrate + z2 / (2 * n) - 1.96 * spread) / (1 + z2 / n)
+            best = int(np.argmax(winrate))
+        return f"{int(rows['move'][best]):04d}"
 
-    def fallback_strategy(self, board_state):
-        """基于规则的回退策略"""
-        # 1. 尝试生成所有合法走法并随机选择
-        legal_moves = generate_legal_moves(board_state)
-        if legal_moves:
-            return random.choice(legal_moves)
+    def fallback_strategy(self, board_state, side=BLACK):
+        """搜索回退策略：在时间预算内用 alpha-beta 搜索走棋方的最佳走法；
+        并行搜索器正被其他请求占用时改用本线程的单进程搜索，不排队等待"""
+        board = Board(board_state, side)
+        result = None
+        if self.search_processes > 1:
+            result = parallel_searcher(self.search_processes).search(board, time_limit=self.search_time,
+                                                                     blocking=False)
+        if result is None:
+            searcher = getattr(self._local, 'searcher', None)
+            if searcher is None:
+                searcher = self._local.searcher = Searcher(shared_table())
+            result = searcher.search(board, time_limit=self.search_time)
 
-        # 2. 极端情况：没有合法走法（将死局面）
-        return None
+        # 极端情况：没有合法走法（将死/困毙局面）
+        if result.move is None:
+            return None
+        return f"{result.move:04d}"
 
     def save(self, filename):
         """保存模型"""
         with open(filename, 'wb') as f:
             pickle.dump({
                 'model_type': self.model_type,
-                'move_stats': dict(self.move_stats),
-                'win_stats': dict(self.win_stats)
+                'move_stats': {k: dict(v) for k, v in self.move_stats.items()},
+                'win_stats': {k: {m: stat.to_tuple() for m, stat in v.items()}
+                              for k, v in self.win_stats.items()},
+                'positions': self.positions if self.check_collisions else None
             }, f)
 
+    def save_store(self, filename):
+        """保存为可 mmap 的二进制模型文件"""
+        if self.store is not None:
+            self.materialize()
+        write_model_store(filename, self.model_type, self.move_stats, self.win_stats)
+
+    def materialize(self):
+        """把 mmap 中的统计数据展开到内存字典（继续训练前调用）"""
+        move_stats, win_stats = self.store.to_dicts()
+        self.move_stats = defaultdict(lambda: defaultdict(int),
+                                      {k: defaultdict(int, v) for k, v in move_stats.items()})
+        self.win_stats = defaultdict(lambda: defaultdict(WinStat),
+                                     {k: defaultdict(WinStat, v) for k, v in _load_win_stats(win_stats).items()})
+        self.store = None
+
     @classmethod
-    def load(cls, filename):
-        """加载模型"""
+    def load(cls, filename, check_collisions=False):
+        """加载模型（自动识别二进制模型；兼容以东萍字符串为键的旧模型）"""
+        if is_model_store(filename):
+            if check_collisions:
+                raise ValueError(f"二进制模型不保存局面字符串，无法做碰撞检查：{filename}（请加载 pickle 模型）")
+            store = ModelStore(filename)
+            model = cls(store.model_type)
+            model.store = store
+            return model
+
         with open(filename, 'rb') as f:
             data = pickle.load(f)
-            model = cls(data['model_type'])
+            model = cls(data['model_type'], check_collisions)
+            positions = data.get('positions') or {}
+            move_stats, win_stats = data['move_stats'], _load_win_stats(data['win_stats'])
+            if any(isinstance(k, str) for k in move_stats):
+                move_stats = cls._rekey(move_stats, positions)
+                win_stats = cls._rekey(win_stats, positions)
+            if check_collisions:
+                model.positions = positions
             model.move_stats = defaultdict(lambda: defaultdict(int),
-                                           {k: defaultdict(int, v) for k, v in data['move_stats'].items()})
-            model.win_stats = defaultdict(lambda: defaultdict(list),
-                                          {k: defaultdict(list, v) for k, v in data['win_stats'].items()})
-            return model
\ No newline at end of file
+                                           {k: defaultdict(int, v) for k, v in move_stats.items()})
+            model.win_stats = defaultdict(lambda: defaultdict(WinStat),
+                                          {k: defaultdict(WinStat, v) for k, v in win_stats.items()})
+            return model
+
+    @staticmethod
+    def _rekey(stats, positions):
+        """把旧模型的东萍字符串键换成规范方向的 Zobrist 哈希，镜像局面与同一局面的统计合并"""
+        rekeyed = {}
+        for board_state, moves in stats.items():
+            key, mirror_key = zobrist_hashes(board_state)
+            mirrored = mirror_key < key
+            if mirrored:
+                key = mirror_key
+            positions.setdefault(key, normalize_board(mirror_board(board_state) if mirrored else board_state))
+            merged = rekeyed.setdefault(key, {})
+            for move, value in moves.items():
+                if mirrored:
+                    move = mirror_move(move)
+                merged[move] = merged[move] + value if move in merged else value
+        return rekeyed
+
+
+def _train_shard(args):
+    """子进程任务：对一个分片的棋局构建部分统计量"""
+    check_collisions, games = args
+    model = ChessModel(check_collisions=check_collisions)
+    for game in games:
+        model.add_game(game)
+    return model.shard_stats()
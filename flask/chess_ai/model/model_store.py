@@ -0,0 +1,133 @@
+"""紧凑的二进制模型文件（可 mmap）
+
+文件布局（小端）：
+    头部 64 字节      魔数 b'CXQM'、版本、模型类型、局面数、走法数
+    局面表            按 key 升序排列的 POSITION_DTYPE 结构化数组
+    走法表            MOVE_DTYPE 结构化数组，每个局面的走法连续存放
+读取时用 np.memmap 映射整个文件，predict 通过二分查找定位局面，不需要反序列化。
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b'CXQM'
+VERSION = 1
+HEADER_FORMAT = '<4sIIQQ'
+HEADER_SIZE = 64
+MODEL_TYPES = ('freq', 'winrate')
+
+# key：局面 Zobrist 哈希；start/length：该局面在走法表中的区间
+POSITION_DTYPE = np.dtype([('key', '<u8'), ('start', '<u4'), ('length', '<u4')])
+# move：东萍走法 int('8987')；count：出现次数；wins：红胜局数；draws：和棋局数
+MOVE_DTYPE = np.dtype([('move', '<u2'), ('count', '<u4'), ('wins', '<u4'), ('draws', '<u4')])
+
+
+def is_model_store(filename):
+    """判断文件是否为二进制模型格式"""
+    with open(filename, 'rb') as f:
+        return f.read(4) == MAGIC
+
+
+def _move_counters(move_stats, win_stats, key, move):
+    """汇总单个走法的 (count, wins, draws)"""
+    stat = win_stats.get(key, {}).get(move)
+    if stat is None:
+        return move_stats[key][move], 0, 0
+    return move_stats[key][move], stat.wins, stat.draws
+
+
+def write_model_store(filename, model_type, move_stats, win_stats):
+    """把统计表写成二进制模型文件"""
+    keys = sorted(move_stats)
+    positions = np.zeros(len(keys), dtype=POSITION_DTYPE)
+    n_moves = sum(len(move_stats[key]) for key in keys)
+    moves = np.zeros(n_moves, dtype=MOVE_DTYPE)
+
+    cursor = 0
+    for i, key in enumerate(keys):
+        entries = move_stats[key]
+        positions[i] = (key, cursor, len(entries))
+        for move in sorted(entries):
+            moves[cursor] = (int(move),) + _move_counters(move_stats, win_stats, key, move)
+            cursor += 1
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, MODEL_TYPES.index(model_type),
+                         len(positions), len(moves))
+    with open(filename, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(positions.tobytes())
+        f.write(moves.tobytes())
+
+
+class ModelStore:
+    """mmap 方式读取的二进制模型"""
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            magic, version, model_type, n_positions, n_moves = struct.unpack(
+                HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是有效的模型文件：{filename}")
+
+        self.filename = filename
+        self.model_type = MODEL_TYPES[model_type]
+        self.positions = np.memmap(filename, dtype=POSITION_DTYPE, mode='r',
+                                   offset=HEADER_SIZE, shape=(n_positions,)) if n_positions else \
+            np.zeros(0, dtype=POSITION_DTYPE)
+        self.moves = np.memmap(filename, dtype=MOVE_DTYPE, mode='r',
+                               offset=HEADER_SIZE + n_positions * POSITION_DTYPE.itemsize,
+                               shape=(n_moves,)) if n_moves else np.zeros(0, dtype=MOVE_DTYPE)
+        self.keys = self.positions['key']
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, key):
+        return self.find(key) >= 0
+
+    def find(self, key):
+        """二分查找局面，返回局面表下标，找不到返回 -1"""
+        i = int(np.searchsorted(self.keys, np.uint64(key)))
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return -1
+
+    def lookup(self, key):
+        """返回局面的走法记录（MOVE_DTYPE 数组视图），找不到返回 None"""
+        i = self.find(key)
+        if i < 0:
+            return None
+        start, length = int(self.positions['start'][i]), int(self.positions['length'][i])
+        return self.moves[start:start + length]
+
+    def to_dicts(self):
+        """展开成 move_stats / win_stats 字典（胜率为 (visits, wins, draws) 元组，用于继续训练）"""
+        move_stats, win_stats = {}, {}
+        for key, start, length in self.positions:
+            counts, outcomes = {}, {}
+            for move, count, wins, draws in self.moves[start:start + length].tolist():
+                move_str = f"{move:04d}"
+                counts[move_str] = count
+                outcomes[move_str] = (count, wins, draws)
+            move_stats[int(key)] = counts
+            win_stats[int(key)] = outcomes
+        return move_stats, win_stats
+
+
+def convert_pickle_model(src, dst):
+    """把 pickle 模型转换为二进制模型文件"""
+    from chess_ai.model.chess_model import ChessModel
+
+    model = ChessModel.load(src)
+    write_model_store(dst, model.model_type, model.move_stats, model.win_stats)
+    print(f"已转换模型：{src} -> {dst}（{len(model.move_stats)} 个局面）")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+    if len(sys.argv) != 3:
+        print("用法：python -m chess_ai.model.model_store <模型.pkl> <模型.cxm>")
+        sys.exit(1)
+    convert_pickle_model(sys.argv[1], sys.argv[2])
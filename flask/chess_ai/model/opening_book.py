@@ -0,0 +1,204 @@
+"""离线开局库
+
+把 ChessModel 的走法统计和 chessdb 缓存中的 queryall 结果合并成一个按局面哈希排序的二进制文件，
+条目格式类似 Polyglot：(局面哈希, 走法, 权重)，同一局面的条目连续存放、按权重降序。
+局面哈希为规范方向的 Zobrist 哈希（与 ChessModel 的统计键一致），走法为规范方向的东萍走法。
+查询时 mmap 整个文件并二分查找，不需要网络和搜索。
+
+文件布局（小端）：
+    头部 64 字节      魔数 b'CXQB'、版本、条目数
+    条目表            BOOK_DTYPE 结构化数组
+用法：python -m chess_ai.model.opening_book --model 模型.pkl --chessdb-cache 缓存.sqlite3 --out 开局库.cxb
+"""
+import argparse
+import struct
+from collections import defaultdict
+
+import numpy as np
+
+from chess_ai.utils.board_engine import Board, BLACK
+from chess_ai.utils.board_utils import zobrist_hashes
+from chess_ai.utils.notation import fen_to_board, iccs_to_dp
+from chess_ai.model.chess_model import mirror_move
+
+MAGIC = b'CXQB'
+VERSION = 1
+HEADER_FORMAT = '<4sIQ'
+HEADER_SIZE = 64
+
+# key：规范方向的局面哈希；move：东萍走法 int('8987')；weight：同一局面内的相对权重
+BOOK_DTYPE = np.dtype([('key', '<u8'), ('move', '<u2'), ('weight', '<u2')])
+
+# chessdb 的 rank：2 最佳、1 可走、0 不宜
+CHESSDB_RANK_WEIGHTS = {2: 4, 1: 1, 0: 0}
+
+
+def parse_queryall(text):
+    """解析 queryall 返回（'move:h2e2,score:1,rank:2,...|move:...'），返回 [(ICCS 走法, rank)]"""
+    moves = []
+    for entry in text.split('|'):
+        fields = dict(field.split(':', 1) for field in entry.split(',') if ':' in field)
+        move = fields.get('move', '')
+        if len(move) == 4:
+            try:
+                rank = int(fields.get('rank', 1))
+            except ValueError:
+                rank = 1
+            moves.append((move, rank))
+    return moves
+
+
+def model_move_weights(model, min_count=1):
+    """ChessModel 的走法次数（规范方向），出现次数少于 min_count 的走法不收录"""
+    move_stats = model.store.to_dicts()[0] if model.store is not None else model.move_stats
+    weights = {}
+    for key, moves in move_stats.items():
+        kept = {move: count for move, count in moves.items() if count >= min_count}
+        if kept:
+            weights[key] = kept
+    return weights
+
+
+def chessdb_move_weights(rows):
+    """chessdb 缓存中 queryall 结果的走法权重（规范方向）；rows 为 (fen, 返回文本)"""
+    weights = defaultdict(dict)
+    for fen, text in rows:
+        if not text:
+            continue
+        try:
+            board_state, _ = fen_to_board(fen)
+        except ValueError:
+            continue
+        key, mirror_key = zobrist_hashes(board_state)
+        mirrored = mirror_key < key
+        for iccs, rank in parse_queryall(text):
+            weight = CHESSDB_RANK_WEIGHTS.get(rank, 0)
+            if not weight:
+                continue
+            move = iccs_to_dp(iccs)
+            if mirrored:
+                move = mirror_move(move)
+            weights[min(key, mirror_key)][move] = weight
+    return dict(weights)
+
+
+def merge_weights(sources):
+    """合并多个来源的走法权重；sources 为 [(权重表, 来源权重)]
+
+    每个来源在同一局面内先归一化，再按来源权重加权求和，最后缩放到 uint16（最大值 65535）。
+    """
+    merged = {}
+    for key in set().union(*(table for table, _ in sources)):
+        combined = defaultdict(float)
+        for table, source_weight in sources:
+            moves = table.get(key)
+            if not moves:
+                continue
+            moves_total = sum(moves.values())
+            for move, weight in moves.items():
+                combined[move] += source_weight * weight / moves_total
+        top = max(combined.values())
+        entries = {move: int(round(weight / top * 65535)) for move, weight in combined.items()}
+        merged[key] = {move: weight for move, weight in entries.items() if weight}
+    return merged
+
+
+def write_book(filename, weights):
+    """把 {局面哈希: {走法: 权重}} 写成开局库文件"""
+    entries = np.zeros(sum(len(moves) for moves in weights.values()), dtype=BOOK_DTYPE)
+    cursor = 0
+    for key in sorted(weights):
+        for move, weight in sorted(weights[key].items(), key=lambda item: -item[1]):
+            entries[cursor] = (key, int(move), weight)
+            cursor += 1
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(entries))
+    with open(filename, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(entries.tobytes())
+    return len(entries)
+
+
+def compile_book(filename, model=None, chessdb_rows=None, min_count=1, model_weight=1.0, chessdb_weight=2.0):
+    """编译开局库：合并 ChessModel 统计和 chessdb queryall 结果"""
+    sources = []
+    if model is not None:
+        sources.append((model_move_weights(model, min_count), model_weight))
+    if chessdb_rows is not None:
+        sources.append((chessdb_move_weights(chessdb_rows), chessdb_weight))
+    weights = merge_weights(sources) if sources else {}
+    count = write_book(filename, weights)
+    print(f"开局库已保存到 {filename}：{len(weights)} 个局面，{count} 个走法")
+    return count
+
+
+class OpeningBook:
+    """mmap 方式读取的开局库"""
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            magic, version, count = struct.unpack(HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是有效的开局库文件：{filename}")
+
+        self.filename = filename
+        self.entries = np.memmap(filename, dtype=BOOK_DTYPE, mode='r', offset=HEADER_SIZE,
+                                 shape=(count,)) if count else np.zeros(0, dtype=BOOK_DTYPE)
+        self.keys = self.entries['key']
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key):
+        """返回规范局面键的条目（BOOK_DTYPE 数组视图，按权重降序）"""
+        key = np.uint64(key)
+        lo = int(np.searchsorted(self.keys, key, 'left'))
+        hi = int(np.searchsorted(self.keys, key, 'right'))
+        return self.entries[lo:hi]
+
+    def probe(self, board_state):
+        """查询东萍棋盘字符串，返回原方向的 [(走法, 权重)]，按权重降序"""
+        key, mirror_key = zobrist_hashes(board_state)
+        mirrored = mirror_key < key
+        rows = self.lookup(mirror_key if mirrored else key)
+        moves = [(f"{move:04d}", weight) for move, weight in zip(rows['move'].tolist(), rows['weight'].tolist())]
+        if mirrored:
+            moves = [(mirror_move(move), weight) for move, weight in moves]
+        return moves
+
+    def best_move(self, board_state, side=BLACK, rng=None):
+        """选出 side 方的开局库走法，没有（合法的）记录返回 None
+
+        rng 为 random.Random 时按权重随机选择，否则取权重最高的走法。
+        """
+        board = Board(board_state, side)
+        pseudo = board.generate_moves(side)
+        moves = [(move, weight) for move, weight in self.probe(board_state)
+                 if int(move) in pseudo and board.is_legal(int(move), side)]
+        if not moves:
+            return None
+        if rng is None:
+            return moves[0][0]
+        return rng.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
+
+
+if __name__ == '__main__':
+    from chess_ai.model.chess_model import ChessModel
+    from chess_ai.utils.chessdb_client import ChessDBClient
+
+    parser = argparse.ArgumentParser(description="编译离线开局库")
+    parser.add_argument('--model', default=None, help="ChessModel 模型文件（.pkl 或 .cxm）")
+    parser.add_argument('--chessdb-cache', default=None, help="chessdb 缓存（SQLite）")
+    parser.add_argument('--out', required=True, help="输出的开局库文件")
+    parser.add_argument('--min-count', type=int, default=2, help="模型走法最少出现次数")
+    parser.add_argument('--model-weight', type=float, default=1.0, help="模型统计的来源权重")
+    parser.add_argument('--chessdb-weight', type=float, default=2.0, help="chessdb 结果的来源权重")
+    args = parser.parse_args()
+
+    model = ChessModel.load(args.model) if args.model else None
+    rows = None
+    if args.chessdb_cache:
+        client = ChessDBClient(cache_path=args.chessdb_cache)
+        rows = [(fen, text) for _, fen, text in client.iter_cached('queryall')]
+        client.close()
+    compile_book(args.out, model, rows, args.min_count, args.model_weight, args.chessdb_weight)
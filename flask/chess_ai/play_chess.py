@@ -9,18 +9,12 @@ def main():
     model_path = os.path.join('model', 'chess_ai_model.pkl')
     # model_path = "./chess_ai/model/chess_ai_model.pkl"
     try:
-        with open(model_path, 'rb') as f:
-            model_data = pickle.load(f)
+        model = ChessModel.load(model_path)
         print(f"已加载模型：{model_path}")
     except FileNotFoundError:
         print(f"模型文件未找到，请确保模型已训练并保存到 {model_path}")
         return
 
-    # 从字典数据中重新构建ChessModel实例
-    model = ChessModel(model_type=model_data['model_type'])
-    model.move_stats = model_data['move_stats']
-    model.win_stats = model_data['win_stats']
-
     # 初始化棋盘
     board_state = initial_board()
     print("初始棋盘状态：")
@@ -0,0 +1,218 @@
+"""Alpha-Beta 搜索
+
+负极大值 alpha-beta + 迭代加深，吃子静态搜索，
+走法排序：上一轮最佳走法 > 吃子（MVV-LVA）> 杀手走法 > 历史表。
+每次调用有时间/节点预算，超时后返回最后一轮完整搜索的结果。
+可选的置换表（transposition.TranspositionTable）在多次搜索之间复用。
+"""
+import time
+from collections import namedtuple
+
+from chess_ai.utils.board_engine import Board, CELL_PIECE
+from chess_ai.search.evaluate import evaluate, PIECE_VALUES
+from chess_ai.search.transposition import EXACT, LOWER, UPPER, shared_table
+
+MATE = 30000
+MATE_BOUND = MATE - 200
+MAX_PLY = 64
+CHECK_INTERVAL = 1024  # 每搜索多少个节点检查一次时间
+
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'nodes', 'elapsed'])
+
+# MVV-LVA：被吃子价值越高、攻击子价值越低越先搜
+_VICTIM_ORDER = tuple(PIECE_VALUES[piece % 7] if piece % 7 else 2000 for piece in range(14))
+_ATTACKER_ORDER = tuple(PIECE_VALUES[piece % 7] // 10 for piece in range(14))
+
+
+class SearchTimeout(Exception):
+    """搜索预算用完"""
+
+
+def _score_to_tt(score, ply):
+    """杀棋分存入置换表时换算成相对当前节点的距离"""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class Searcher:
+    """可复用的搜索器：杀手走法和历史表在多次调用之间保留（按比例衰减）"""
+
+    def __init__(self, tt=None):
+        self.tt = tt
+        self.history = [0] * 9000
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.nodes = 0
+        self.deadline = None
+        self.node_limit = None
+
+    def search(self, board, time_limit=1.0, max_depth=MAX_PLY, node_limit=None):
+        """迭代加深搜索 board 的走棋方，返回 SearchResult（无合法走法时 move 为 None）"""
+        if isinstance(board, str):
+            board = Board(board)
+        started = time.perf_counter()
+        self.deadline = started + time_limit if time_limit else None
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.history = [h >> 3 for h in self.history]
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        if self.tt is not None:
+            self.tt.new_search()
+
+        root_moves = board.legal_moves()
+        if not root_moves:
+            return SearchResult(None, -MATE, 0, 0, time.perf_counter() - started)
+
+        best_move, best_score, completed = root_moves[0], 0, 0
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self._search_root(board, root_moves, depth)
+            except SearchTimeout:
+                break
+            best_move, best_score, completed = move, score, depth
+            # 上一轮最佳走法排到最前
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if abs(score) >= MATE_BOUND:
+                break
+            # 下一轮大约要花本轮数倍的时间，剩余时间不够就不开始
+            if self.deadline and time.perf_counter() - started > time_limit * 0.5:
+                break
+
+        return SearchResult(best_move, best_score, completed, self.nodes, time.perf_counter() - started)
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            if self.deadline and time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+        if self.node_limit and self.nodes >= self.node_limit:
+            raise SearchTimeout()
+
+    def _search_root(self, board, root_moves, depth):
+        alpha, beta = -MATE, MATE
+        best_move = root_moves[0]
+        for move in root_moves:
+            board.make_move(move)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+            finally:
+                board.unmake_move()
+            if score > alpha:
+                alpha, best_move = score, move
+        return alpha, best_move
+
+    def _order(self, board, moves, ply, first=0):
+        mb = board.mailbox
+        killers = self.killers[ply]
+        history = self.history
+
+        def priority(move):
+            if move == first:
+                return 1 << 30
+            frm, to = divmod(move, 100)
+            victim = mb[to]
+            if victim:
+                return (1 << 24) + _VICTIM_ORDER[CELL_PIECE[victim]] * 64 - _ATTACKER_ORDER[CELL_PIECE[mb[frm]]]
+            if move == killers[0] or move == killers[1]:
+                return 1 << 22
+            return history[move]
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self._tick()
+        side = board.side
+        in_check = board.in_check(side)
+        if in_check:
+            depth += 1  # 被将军时延伸一层
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiesce(board, alpha, beta, ply)
+
+        tt = self.tt
+        tt_move = 0
+        if tt is not None:
+            key = board.search_key()
+            entry = tt.probe(key)
+            if entry is not None:
+                tt_depth, tt_score, tt_bound, tt_move = entry
+                if tt_depth >= depth:
+                    tt_score = _score_from_tt(tt_score, ply)
+                    if (tt_bound == EXACT or (tt_bound == LOWER and tt_score >= beta)
+                            or (tt_bound == UPPER and tt_score <= alpha)):
+                        return tt_score
+
+        alpha_orig = alpha
+        legal = 0
+        best, best_move = -MATE + ply, 0
+        for move in self._order(board, board.generate_moves(side), ply, tt_move):
+            board.make_move(move)
+            if board.in_check(side):
+                board.unmake_move()
+                continue
+            legal += 1
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move()
+            if score > best:
+                best, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not board.mailbox[move % 100]:
+                            killers = self.killers[ply]
+                            if killers[0] != move:
+                                killers[1], killers[0] = killers[0], move
+                            self.history[move] += depth * depth
+                        break
+
+        # 象棋中无子可走（困毙）也判负
+        if not legal:
+            best = -MATE + ply
+        if tt is not None:
+            bound = LOWER if best >= beta else EXACT if best > alpha_orig else UPPER
+            tt.store(key, depth, _score_to_tt(best, ply), bound, best_move)
+        return best
+
+    def _quiesce(self, board, alpha, beta, ply):
+        self._tick()
+        stand_pat = evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        side = board.side
+        for move in self._order(board, board.generate_moves(side, captures_only=True), ply):
+            board.make_move(move)
+            if board.in_check(side):
+                board.unmake_move()
+                continue
+            try:
+                score = -self._quiesce(board, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move()
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+
+def search_best_move(board_state, side, time_limit=1.0, max_depth=MAX_PLY, node_limit=None, searcher=None):
+    """对东萍棋盘字符串搜索 side 方的最佳走法，返回东萍走法字符串（无合法走法返回 None）"""
+    searcher = searcher or Searcher(shared_table())
+    result = searcher.search(Board(board_state, side), time_limit, max_depth, node_limit)
+    return f"{result.move:04d}" if result.move is not None else None
@@ -0,0 +1,106 @@
+"""局面评估：子力价值 + 位置分（piece-square table）
+
+PST[棋子编码][格子] 为以红方为正的分值，黑方棋子取上下翻转后的红方分值的相反数。
+分值表同时交给 board_engine.set_eval_table，Board 在走子/悔棋时按创建时的表增量维护 score，evaluate 只需 O(1)。
+权重可由 tools.texel_tune 从棋谱结果拟合，保存为紧凑的二进制文件（load_weights / use_weights）：
+    头部 16 字节  魔数 b'CXEV'、版本、拟合时的缩放系数 K（分值 -> 红方得分的 sigmoid 斜率）
+    分值表        7 x 90 个 int16，红方视角的 子力 + 位置分，按 类型*90+格子 排列
+"""
+import struct
+
+from chess_ai.utils.board_engine import (RED, ROOK, HORSE, ELEPHANT, ADVISOR, KING, CANNON, PAWN,
+                                         SLOT_PIECE, CAPTURED, set_eval_table)
+from chess_ai.search.transposition import clear_shared_table
+
+PIECE_VALUES = {ROOK: 600, HORSE: 270, ELEPHANT: 120, ADVISOR: 120, KING: 0, CANNON: 285, PAWN: 30}
+
+WEIGHTS_MAGIC = b'CXEV'
+WEIGHTS_VERSION = 1
+WEIGHTS_HEADER = '<4sIf4x'
+WEIGHTS_FORMAT = '<630h'
+
+# 上下翻转（纵坐标 y -> 9-y）后的格子：黑方棋子按翻转后的格子查红方分值
+FLIP_SQ = tuple(sq // 10 * 10 + 9 - sq % 10 for sq in range(90))
+
+
+def _red_bonus(kind, x, y):
+    """红方视角（红方在下，y=9 为底线）的位置加分"""
+    center = 4 - abs(x - 4)  # 0（边线）- 4（中线）
+    if kind == PAWN:
+        if y >= 5:
+            return 0
+        # 过河兵价值大增，越靠近九宫越好，底线兵作用下降
+        return 40 + (4 - y) * 8 + (12 if 3 <= x <= 5 else 0) - (25 if y == 0 else 0)
+    if kind == HORSE:
+        return center * 4 + (10 if 2 <= y <= 6 else 0) - (10 if y == 9 else 0)
+    if kind == CANNON:
+        return (10 if x == 4 else 0) + (6 if y == 7 else 0)
+    if kind == ROOK:
+        return center * 2 + (8 if y <= 4 else 0)
+    return 0
+
+
+def red_table(values=PIECE_VALUES, bonus=_red_bonus):
+    """红方视角的 7 x 90 分值表（子力 + 位置分）"""
+    return tuple(tuple(values[kind] + bonus(kind, *divmod(sq, 10)) for sq in range(90)) for kind in range(7))
+
+
+def pst_from_red(table):
+    """由红方视角的 7 x 90 分值表生成 14 x 90 的位置分表"""
+    red = tuple(tuple(int(v) for v in row) for row in table)
+    return red + tuple(tuple(-row[FLIP_SQ[sq]] for sq in range(90)) for row in red)
+
+
+def build_pst(values=PIECE_VALUES, bonus=_red_bonus):
+    """生成 14 x 90 的位置分表"""
+    return pst_from_red(red_table(values, bonus))
+
+
+PST = build_pst()
+set_eval_table(PST)
+
+
+def set_weights(table):
+    """换用红方视角的 7 x 90 分值表；只影响之后创建的 Board，并清空共享置换表中按旧表算出的分值"""
+    global PST
+    PST = pst_from_red(table)
+    set_eval_table(PST)
+    clear_shared_table()
+
+
+def save_weights(filename, table, scale=1.0):
+    """把红方视角的 7 x 90 分值表写成紧凑的权重文件（1 KB 多一点）"""
+    values = [max(-32768, min(32767, int(round(v)))) for row in table for v in row]
+    with open(filename, 'wb') as f:
+        f.write(struct.pack(WEIGHTS_HEADER, WEIGHTS_MAGIC, WEIGHTS_VERSION, scale))
+        f.write(struct.pack(WEIGHTS_FORMAT, *values))
+
+
+def load_weights(filename):
+    """读取权重文件，返回 (7 x 90 分值表, 缩放系数 K)"""
+    with open(filename, 'rb') as f:
+        data = f.read()
+    header_size = struct.calcsize(WEIGHTS_HEADER)
+    magic, version, scale = struct.unpack_from(WEIGHTS_HEADER, data)
+    if magic != WEIGHTS_MAGIC or version != WEIGHTS_VERSION:
+        raise ValueError(f"不是评估权重文件或版本不支持：{filename}")
+    values = struct.unpack_from(WEIGHTS_FORMAT, data, header_size)
+    return tuple(values[kind * 90:(kind + 1) * 90] for kind in range(7)), scale
+
+
+def use_weights(filename):
+    """加载权重文件并设为当前评估表"""
+    table, _ = load_weights(filename)
+    set_weights(table)
+    return table
+
+
+def evaluate_full(board):
+    """按 Board 创建时的评估表逐个棋子重新求和，返回红方视角的局面分（用于校验增量更新的 Board.score）"""
+    table = board.eval_table
+    return sum(table[SLOT_PIECE[slot]][sq] for slot, sq in enumerate(board.squares) if sq != CAPTURED)
+
+
+def evaluate(board):
+    """返回走棋方视角的局面分"""
+    return board.score if board.side == RED else -board.score
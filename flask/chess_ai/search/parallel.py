@@ -0,0 +1,250 @@
+"""多进程并行搜索（Lazy SMP）
+
+GIL 让一个进程内的搜索只能用一个核。ParallelSearcher 启动 processes-1 个辅助进程，
+与调用方进程同时从同一个根局面做迭代加深，彼此不通信，只共享放在 multiprocessing.shared_memory 里的置换表：
+    奇数号辅助进程每一轮比主搜索深一层，偶数号与主搜索同深度，靠置换表中别人写入的结果相互剪枝、错开搜索顺序；
+    主搜索结束（时间/节点用完或达到最大深度）时置停止标志，所有辅助进程随即停止并汇报结果；
+    取完成深度最深的结果（同深度优先主搜索），节点数为所有进程之和。
+共享置换表无锁，条目格式与 transposition.TranspositionTable 相同：每个槽两个 64 位字 (key ^ data, data)，
+读取时只有 key ^ data 还原出的哈希与查询局面相同才算命中，并发写入造成的撕裂条目自然被当作未命中。
+"""
+import atexit
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from chess_ai.utils import board_engine
+from chess_ai.utils.board_engine import Board
+from chess_ai.search.alphabeta import Searcher, SearchResult, SearchTimeout, CHECK_INTERVAL, MAX_PLY
+from chess_ai.search.transposition import DEFAULT_BUCKETS, pack_entry, unpack_entry
+
+GENERATION, STOP = 0, 1  # 共享头部：当前代数、停止标志
+HEADER_WORDS = 2
+RESULT_TIMEOUT = 5.0  # 置停止标志后等待辅助进程汇报的最长时间（秒）
+STARTUP_TIMEOUT = 60.0  # 等待辅助进程启动（导入模块、连接共享内存）的最长时间（秒）
+
+
+class SharedTranspositionTable:
+    """放在共享内存中的置换表，接口与 TranspositionTable 相同；name 给出时连接已有的表"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, name=None):
+        if buckets & (buckets - 1):
+            raise ValueError(f"桶数必须是 2 的幂：{buckets}")
+        size = buckets * 2
+        nbytes = (HEADER_WORDS + size * 2) * 8
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=nbytes if self.owner else 0)
+        self.name = self.shm.name
+        self.buckets = buckets
+        self.mask = buckets - 1
+        self.header = np.ndarray((HEADER_WORDS,), dtype=np.uint64, buffer=self.shm.buf)
+        self.entries = np.ndarray((size, 2), dtype=np.uint64, buffer=self.shm.buf, offset=HEADER_WORDS * 8)
+        if self.owner:
+            self.header.fill(0)
+            self.entries.fill(0)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def advance(self):
+        """推进共享的代数（每次并行搜索开始时由主进程调用一次）"""
+        self.header[GENERATION] = (int(self.header[GENERATION]) + 1) & 0xFF
+
+    def new_search(self):
+        """同步共享的代数；各进程的 Searcher.search 开始时调用"""
+        self.generation = int(self.header[GENERATION])
+
+    @property
+    def stopped(self):
+        return bool(self.header[STOP])
+
+    def set_stop(self, value):
+        self.header[STOP] = 1 if value else 0
+
+    def clear(self):
+        self.entries.fill(0)
+        self.hits = self.misses = self.stores = 0
+
+    def probe(self, key):
+        """查找局面，命中返回 (depth, score, bound, move)，否则返回 None"""
+        i = (key & self.mask) << 1
+        entries = self.entries
+        for slot in (i, i + 1):
+            data = entries.item(slot, 1)
+            if data and entries.item(slot, 0) ^ data == key:
+                self.hits += 1
+                return unpack_entry(data)
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        i = (key & self.mask) << 1
+        entries = self.entries
+        data = entries.item(i, 1)
+        # 槽 0：同一局面、更深的搜索或旧代条目才替换；否则写入槽 1（总是替换）
+        if (not data or entries.item(i, 0) ^ data == key or depth >= unpack_entry(data)[0]
+                or (data >> 48) & 0xFF != self.generation):
+            slot = i
+        else:
+            slot = i + 1
+        data = pack_entry(depth, score, bound, move, self.generation)
+        entries[slot, 1] = data
+        entries[slot, 0] = key ^ data
+        self.stores += 1
+
+    def stats(self):
+        """本进程的命中/未命中计数和整张表的占用率"""
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'stores': self.stores,
+            'filled': float(np.count_nonzero(self.entries[:, 1])) / len(self.entries),
+        }
+
+    def close(self):
+        """断开共享内存；创建者同时删除它"""
+        self.header = self.entries = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedSearcher(Searcher):
+    """在共享置换表上搜索：每轮多搜 depth_offset 层，停止标志置位时结束"""
+
+    def __init__(self, tt, depth_offset=0):
+        super().__init__(tt)
+        self.depth_offset = depth_offset
+        self.completed = 0
+
+    def _tick(self):
+        Searcher._tick(self)
+        if self.nodes % CHECK_INTERVAL == 0 and self.tt.stopped:
+            raise SearchTimeout()
+
+    def _search_root(self, board, root_moves, depth):
+        result = Searcher._search_root(self, board, root_moves, depth + self.depth_offset)
+        self.completed = depth + self.depth_offset
+        return result
+
+
+def _helper_main(index, table_name, buckets, tasks, results):
+    """辅助进程：连接共享置换表，循环执行搜索任务直到收到 None"""
+    tt = SharedTranspositionTable(buckets, table_name)
+    searcher = SharedSearcher(tt, depth_offset=index % 2)
+    results.put((0, None, 0, 0, 0))  # 搜索编号 0：已就绪
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            search_id, board_state, side, time_limit, max_depth, node_limit, eval_table = task
+            if eval_table != board_engine.EVAL_TABLE:
+                board_engine.set_eval_table(eval_table)
+            searcher.completed = 0
+            result = searcher.search(Board(board_state, side), time_limit, max_depth, node_limit)
+            results.put((search_id, result.move, result.score, searcher.completed, result.nodes))
+    finally:
+        tt.close()
+
+
+class ParallelSearcher:
+    """Lazy SMP 搜索器：调用方进程做主搜索，processes-1 个辅助进程共享置换表"""
+
+    def __init__(self, processes, buckets=DEFAULT_BUCKETS):
+        self.processes = max(1, processes)
+        self.tt = SharedTranspositionTable(buckets)
+        self.searcher = SharedSearcher(self.tt)
+        self._lock = threading.Lock()
+        self.search_id = 0
+        self.eval_table = None  # 上一次搜索的评估表；换表后共享置换表中的分值作废
+        context = multiprocessing.get_context('spawn')  # 调用方可能是多线程的 Flask 进程，不用 fork
+        self.results = context.Queue()
+        self.helpers = []
+        for index in range(1, self.processes):
+            tasks = context.Queue()
+            process = context.Process(target=_helper_main, args=(index, self.tt.name, buckets, tasks, self.results),
+                                      name=f"lazy-smp-{index}", daemon=True)
+            process.start()
+            self.helpers.append((process, tasks))
+        # 等辅助进程都就绪，第一次搜索的耗时不包含进程启动
+        for _ in self.helpers:
+            self.results.get(timeout=STARTUP_TIMEOUT)
+
+    def search(self, board, time_limit=1.0, max_depth=MAX_PLY, node_limit=None, blocking=True):
+        """与 Searcher.search 相同的参数和返回值；nodes 为所有进程的节点数之和。
+        同一时刻只进行一次并行搜索：blocking 为 False 且已有搜索在进行时立即返回 None，
+        调用方可改用单进程搜索，不必排队（排队时每个请求的耗时要加上前面所有搜索的时间）"""
+        if isinstance(board, str):
+            board = Board(board)
+        if not self._lock.acquire(blocking):
+            return None
+        try:
+            return self._search(board, time_limit, max_depth, node_limit)
+        finally:
+            self._lock.release()
+
+    def _search(self, board, time_limit, max_depth, node_limit):
+        started = time.perf_counter()
+        self.tt.advance()
+        self.tt.set_stop(False)
+        if board.eval_table is not self.eval_table:
+            if self.eval_table is not None:
+                self.tt.clear()
+            self.eval_table = board.eval_table
+        self.search_id += 1
+        task = (self.search_id, board.to_dongping(), board.side, time_limit, max_depth, node_limit,
+                board.eval_table)
+        for _, tasks in self.helpers:
+            tasks.put(task)
+        try:
+            result = self.searcher.search(board, time_limit, max_depth, node_limit)
+        finally:
+            self.tt.set_stop(True)
+        best = (result.depth, 1, result.move, result.score)
+        nodes = result.nodes
+        pending = len(self.helpers)
+        while pending:
+            try:
+                search_id, move, score, depth, helper_nodes = self.results.get(timeout=RESULT_TIMEOUT)
+            except queue.Empty:
+                print(f"并行搜索：{pending} 个辅助进程没有按时汇报，只使用已收到的结果")
+                break
+            if search_id != self.search_id:
+                continue  # 上一次搜索迟到的结果
+            pending -= 1
+            nodes += helper_nodes
+            if move is not None and depth > best[0]:
+                best = (depth, 0, move, score)
+        return SearchResult(best[2], best[3], best[0], nodes, time.perf_counter() - started)
+
+    def close(self):
+        """结束辅助进程并释放共享内存"""
+        for _, tasks in self.helpers:
+            tasks.put(None)
+        for process, _ in self.helpers:
+            process.join(timeout=RESULT_TIMEOUT)
+        self.helpers = []
+        if self.tt.header is not None:
+            self.tt.close()
+
+
+_parallel_searchers = {}
+_parallel_lock = threading.Lock()
+
+
+def parallel_searcher(processes, buckets=DEFAULT_BUCKETS):
+    """进程内共享的并行搜索器（按进程数各建一个，首次调用时启动辅助进程，退出时自动关闭）"""
+    with _parallel_lock:
+        searcher = _parallel_searchers.get(processes)
+        if searcher is None:
+            searcher = _parallel_searchers[processes] = ParallelSearcher(processes, buckets)
+            atexit.register(searcher.close)
+        return searcher
@@ -0,0 +1,113 @@
+"""置换表
+
+预分配的 NumPy 数组，每个桶两个槽：槽 0 深度优先替换，槽 1 总是替换。
+每个槽两个 64 位字 (key ^ data, data)，data 打包了 深度、分数、边界类型、最佳走法、代数：
+shared_table() 返回进程内共享的置换表，Flask 进程存活期间各请求线程同时读写它，写入不加锁，
+读取时只有 key ^ data 还原出的哈希与查询局面相同才算命中，另一个线程写到一半的条目自然被当作未命中。
+每次新搜索开始时取一个新的代数，该次搜索写入的条目都带这个代数，旧代的条目即使深度更深也可以被覆盖；
+代数按线程记录，其他线程开始新搜索不会改变正在进行的搜索所用的代数。
+"""
+import threading
+
+import numpy as np
+
+EXACT, LOWER, UPPER = 1, 2, 3  # 边界类型：精确值 / 下界（发生剪枝）/ 上界（全部走法都没超过 alpha）
+
+DEFAULT_BUCKETS = 1 << 18
+
+
+def pack_entry(depth, score, bound, move, age):
+    """把一个条目打包为 64 位整数（bound 非 0，所以有效条目的 data 不为 0）"""
+    return move | (score + 32768) << 16 | (depth & 0xFF) << 32 | bound << 40 | age << 48
+
+
+def unpack_entry(data):
+    """64 位整数 -> (depth, score, bound, move)"""
+    depth = (data >> 32) & 0xFF
+    return (depth - 256 if depth > 127 else depth, ((data >> 16) & 0xFFFF) - 32768,
+            (data >> 40) & 0xFF, data & 0xFFFF)
+
+
+class TranspositionTable:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        if buckets & (buckets - 1):
+            raise ValueError(f"桶数必须是 2 的幂：{buckets}")
+        self.mask = buckets - 1
+        self.entries = np.zeros((buckets * 2, 2), dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @property
+    def generation(self):
+        """当前线程正在进行的搜索所用的代数"""
+        return getattr(self._local, 'generation', self._last_generation)
+
+    def new_search(self):
+        """新一次搜索开始：取下一个代数，之前的条目老化"""
+        with self._lock:
+            self._last_generation = (self._last_generation + 1) & 0xFF
+            self._local.generation = self._last_generation
+
+    def clear(self):
+        self.entries.fill(0)
+        self.hits = self.misses = self.stores = 0
+
+    def probe(self, key):
+        """查找局面，命中返回 (depth, score, bound, move)，否则返回 None"""
+        i = (key & self.mask) << 1
+        entries = self.entries
+        for slot in (i, i + 1):
+            data = entries.item(slot, 1)
+            if data and entries.item(slot, 0) ^ data == key:
+                self.hits += 1
+                return unpack_entry(data)
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        i = (key & self.mask) << 1
+        entries = self.entries
+        generation = self.generation
+        data = entries.item(i, 1)
+        # 槽 0：同一局面、更深的搜索或旧代条目才替换；否则写入槽 1（总是替换）
+        if (not data or entries.item(i, 0) ^ data == key or depth >= unpack_entry(data)[0]
+                or (data >> 48) & 0xFF != generation):
+            slot = i
+        else:
+            slot = i + 1
+        data = pack_entry(depth, score, bound, move, generation)
+        entries[slot, 1] = data
+        entries[slot, 0] = key ^ data
+        self.stores += 1
+
+    def stats(self):
+        """命中/未命中计数和占用率"""
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'stores': self.stores,
+            'filled': float(np.count_nonzero(self.entries[:, 1])) / len(self.entries),
+        }
+
+
+_shared_table = None
+
+
+def shared_table(buckets=DEFAULT_BUCKETS):
+    """进程内共享的置换表（首次调用时创建）"""
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = TranspositionTable(buckets)
+    return _shared_table
+
+
+def clear_shared_table():
+    """清空进程内共享的置换表（评估表更换后旧的分值不再可信）；还没创建时什么也不做"""
+    if _shared_table is not None:
+        _shared_table.clear()
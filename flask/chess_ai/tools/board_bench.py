@@ -0,0 +1,95 @@
+"""棋盘相关热点函数的基准测试
+
+覆盖：apply_move、generate_legal_moves（字符串接口）、Board.legal_moves、batch_legal_moves（整批，
+并给出相对 generate_legal_moves 的加速比）、make_move/unmake_move、FEN 互转（board_to_fen / fen_to_board）、ChessModel.predict（命中统计 / 回退搜索）。
+局面取自随机对局，固定随机种子，结果可在不同提交之间对比；配合 perft --check 作为回归检查；
+同样的用例在 tests/test_benchmarks.py 中以 pytest-benchmark 运行，可保存并对比历史结果。
+用法：python -m chess_ai.tools.board_bench [--positions 200] [--repeat 5] [--search-time 0.05]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chess_ai.utils.board_engine import Board, RED
+from chess_ai.utils.batch_movegen import batch_legal_moves, squares_to_tensor
+from chess_ai.utils.encoder import squares_array
+from chess_ai.utils.board_utils import apply_move, generate_legal_moves
+from chess_ai.utils.notation import board_to_fen, fen_to_board
+from chess_ai.model.chess_model import ChessModel
+
+
+def random_positions(count, max_plies=60, seed=0):
+    """随机对局中的 (东萍棋盘, 走棋方, 一步合法走法) 列表"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board()
+        for _ in range(rng.randrange(max_plies)):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+        moves = board.legal_moves()
+        if moves:
+            positions.append((board.to_dongping(), board.side, f"{rng.choice(moves):04d}"))
+    return positions
+
+
+def bench(label, func, items, repeat):
+    """取 repeat 轮中最快的一轮，输出每次调用的耗时"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - started)
+    per_call = best / len(items)
+    print(f"{label:<24} {per_call * 1e6:10.2f} 微秒/次  {1 / per_call:12.0f} 次/秒")
+    return per_call
+
+
+def _make_unmake(item):
+    board, move = item
+    board.make_move(move)
+    board.unmake_move()
+
+
+def run_benchmark(count, repeat, search_time):
+    positions = random_positions(count)
+    boards = [(Board(state, side), int(move)) for state, side, move in positions]
+    fens = [board_to_fen(state, side) for state, side, _ in positions]
+
+    # 用随机局面训练一个小模型：一半局面命中统计，另一半走回退搜索
+    model = ChessModel(search_time=search_time)
+    model.train([{'movelist': "", 'result': 'unknown', 'board_states': [state], 'moves': [move]}
+                 for state, _, move in positions[::2]])
+    book = [(state, side) for state, side, _ in positions[::2]]
+    searched = [(state, side) for state, side, _ in positions[1::2]][:max(1, count // 20)]
+
+    bench('apply_move', lambda p: apply_move(p[0], p[2]), positions, repeat)
+    single = bench('generate_legal_moves', lambda p: generate_legal_moves(p[0], p[1]), positions, repeat)
+    bench('Board.legal_moves', lambda b: b[0].legal_moves(), boards, repeat)
+    tensor = squares_to_tensor(squares_array([state for state, _, _ in positions]))
+    sides = np.array([side for _, side, _ in positions])
+    batched = bench('batch_legal_moves（整批）', lambda _: batch_legal_moves(tensor, sides), [None], repeat) / count
+    print(f"{'  折合每个局面':<20} {batched * 1e6:10.2f} 微秒/次  相对 generate_legal_moves {single / batched:.1f} 倍")
+    bench('make/unmake', _make_unmake, boards, repeat)
+    bench('board_to_fen', lambda p: board_to_fen(p[0], p[1]), positions, repeat)
+    bench('fen_to_board', fen_to_board, fens, repeat)
+    bench('predict（统计命中）', lambda p: model.predict(p[0], p[1]), book, repeat)
+    bench(f'predict（搜索 {search_time}s）', lambda p: model.predict(p[0], p[1]), searched, 1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="棋盘热点函数基准测试")
+    parser.add_argument('--positions', type=int, default=200, help="随机局面数")
+    parser.add_argument('--repeat', type=int, default=5, help="每项重复轮数（取最快一轮）")
+    parser.add_argument('--search-time', type=float, default=0.05, help="回退搜索的时间预算（秒）")
+    args = parser.parse_args()
+    run_benchmark(args.positions, args.repeat, args.search_time)
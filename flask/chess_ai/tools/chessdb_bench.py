@@ -0,0 +1,102 @@
+"""chessdb 客户端基准测试
+
+在本地启动一个模拟 chessdb.cn 的 HTTP 服务（固定延迟），比较：
+    直接 requests.get（原 getApiMove 的做法）/ 冷缓存 / 热缓存 / 多线程并发查询同一批 FEN（请求合并）
+用法：python -m chess_ai.tools.chessdb_bench [--latency 0.05] [--fens 50] [--threads 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chess_ai.utils.chessdb_client import ChessDBClient
+
+
+def start_stub_server(latency=0.05, port=0):
+    """启动模拟 chessdb 服务：FEN 首字符为 'r' 时 querybest 有走法，否则返回 nobestmove；返回 (server, url)"""
+    calls = {'count': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            calls['count'] += 1
+            time.sleep(latency)
+            fen = query.get('board', [''])[0]
+            if query.get('action', [''])[0] == 'querybest' and not fen.startswith('r'):
+                body = 'nobestmove'
+            else:
+                body = 'move:h2e2,score:1,rank:2,note:! (00-00),winrate:50.00'
+            data = body.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.calls = calls
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/chessdb.php"
+
+
+def _timed(label, func, count):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<16} {elapsed:8.3f} 秒  {elapsed / count * 1000:8.2f} 毫秒/次")
+
+
+def run_benchmark(latency, fen_count, threads):
+    server, url = start_stub_server(latency)
+    # 一半局面 querybest 能命中，另一半需要再查 queryall
+    fens = [f"{'r' if i % 2 else 'R'}nbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR b {i}"
+            for i in range(fen_count)]
+
+    def direct():
+        for fen in fens:
+            res = requests.get(url, params={'action': 'querybest', 'board': fen}).text
+            if len(res.split(':')) < 2:
+                requests.get(url, params={'action': 'queryall', 'board': fen})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = ChessDBClient(url, cache_path=os.path.join(tmp, 'cache.sqlite3'))
+        _timed('直接请求', direct, fen_count)
+        _timed('冷缓存', lambda: [client.best_move(fen) for fen in fens], fen_count)
+        _timed('热缓存(内存)', lambda: [client.best_move(fen) for fen in fens], fen_count)
+        client.close()
+
+        # 新客户端：内存为空，只命中磁盘
+        client = ChessDBClient(url, cache_path=os.path.join(tmp, 'cache.sqlite3'))
+        _timed('热缓存(磁盘)', lambda: [client.best_move(fen) for fen in fens], fen_count)
+        client.close()
+
+        # 多线程同时查询同一批 FEN：每个 FEN 只应访问一次上游
+        client = ChessDBClient(url, cache_path=None)
+        before = server.calls['count']
+        with ThreadPoolExecutor(threads) as pool:
+            _timed(f'并发 x{threads}', lambda: list(pool.map(client.best_move, fens * threads)), fen_count * threads)
+        print(f"并发上游请求数：{server.calls['count'] - before}（不合并时为 {int(fen_count * 1.5) * threads}）")
+        print(f"客户端统计：{client.stats}")
+        client.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="chessdb 缓存客户端基准测试")
+    parser.add_argument('--latency', type=float, default=0.05, help="模拟服务的响应延迟（秒）")
+    parser.add_argument('--fens', type=int, default=50, help="查询的局面数")
+    parser.add_argument('--threads', type=int, default=8, help="并发线程数")
+    args = parser.parse_args()
+    run_benchmark(args.latency, args.fens, args.threads)
@@ -0,0 +1,157 @@
+"""走法生成的 perft 测试
+
+perft(n)：从给定局面出发走 n 步的叶子节点数，与参考值比对，用来检验 Board 的走法生成和走子/悔棋。
+    --check           对 REFERENCE 中的局面逐层比对参考值，并检查左右镜像、红黑互换后的计数是否一致；
+                      另外用东萍字符串接口（generate_legal_moves + apply_move）复算较浅的层数
+    --divide N        按第一步走法分别列出 perft(N-1)，用于与其他引擎逐步对照定位错误
+    --fen FEN         指定局面（缺省为初始局面，红方先走）
+任何不一致都会以非零状态退出，可作为修改棋盘代码后的回归检查。
+用法：python -m chess_ai.tools.perft [--check] [--depth 3] [--divide N] [--fen FEN]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chess_ai.utils.board_engine import Board
+from chess_ai.utils.board_utils import generate_legal_moves, apply_move
+from chess_ai.utils.notation import fen_to_board, squares_to_fen
+
+INITIAL_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w"
+
+# (名称, FEN, {深度: 叶子节点数})
+# 初始局面为公开参考值；其余为常用的残局 / 杀局测试局面，计数经字符串接口（3 层）及镜像、互换（4 层）交叉核对
+REFERENCE = [
+    ("初始局面", INITIAL_FEN, {1: 44, 2: 1920, 3: 79666, 4: 3290240, 5: 133312995}),
+    ("车马炮对车马", "5a3/3k5/3aR4/9/5r3/5n3/9/3A1A3/5K3/2BC2B2 w", {1: 25, 2: 424, 3: 9850, 4: 202884}),
+    ("炮车马杀局", "CRN1k1b2/3ca4/4ba3/9/2nr5/9/9/4B4/4A4/4KA3 w", {1: 28, 2: 516, 3: 14808, 4: 395483}),
+    ("车马杀局", "R1N1k1b2/9/3aba3/9/2nr5/2B6/9/4B4/4A4/4KA3 w", {1: 21, 2: 364, 3: 7626, 4: 162837}),
+    ("双炮马对双马双卒", "C1nNk4/9/9/9/9/9/n1pp5/B3C4/9/3A1K3 w", {1: 28, 2: 222, 3: 6241, 4: 64971}),
+    ("马炮对炮马卒", "4ka3/4a4/9/9/4N4/p8/9/4C3c/7n1/2BK5 w", {1: 23, 2: 345, 3: 8124, 4: 149272}),
+    ("马炮对马卒", "2b1ka3/9/b3N4/4n4/9/9/9/4C4/2p6/2BK5 w", {1: 21, 2: 195, 3: 3883, 4: 48060}),
+]
+
+# 只做镜像 / 互换一致性检查的中局局面（没有参考值）
+SYMMETRY_FENS = [
+    "r1bakab1r/9/1cn4cn/p1p1p1p1p/9/2P6/P3P1P1P/1CN3NC1/9/R1BAKAB1R w",
+    "2bakab2/9/4c4/p3p1p1p/2p3n2/4P4/P1P3P1P/2N1C4/4A4/2BAK1B2 b",
+    "3k5/4a4/5a3/9/9/9/9/4C4/4A4/4K4 w",
+]
+
+
+def board_from_fen(fen):
+    board_state, side = fen_to_board(fen)
+    return Board(board_state, side)
+
+
+def perft(board, depth):
+    """叶子节点数；最后一层直接用合法走法数计数"""
+    moves = board.legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board, depth):
+    """{第一步走法: 该走法之后的 perft(depth-1)}"""
+    counts = {}
+    for move in board.legal_moves():
+        board.make_move(move)
+        counts[move] = perft(board, depth - 1)
+        board.unmake_move()
+    return counts
+
+
+def perft_strings(board_state, side, depth):
+    """用东萍字符串接口计算 perft，与 Board 的结果互相校验"""
+    if depth == 0:
+        return 1
+    moves = generate_legal_moves(board_state, side)
+    if depth == 1:
+        return len(moves)
+    return sum(perft_strings(apply_move(board_state, move), side ^ 1, depth - 1) for move in moves)
+
+
+def mirror_fen(fen):
+    """左右镜像"""
+    rows, side = fen.split()[:2]
+    return f"{'/'.join(_expand(row)[::-1] for row in rows.split('/'))} {side}"
+
+
+def flip_fen(fen):
+    """旋转 180 度并交换红黑，走棋方随之交换"""
+    rows, side = fen.split()[:2]
+    flipped = [_expand(row)[::-1].swapcase() for row in rows.split('/')[::-1]]
+    return f"{'/'.join(flipped)} {'b' if side == 'w' else 'w'}"
+
+
+def _expand(row):
+    return "".join('1' * int(ch) if ch.isdigit() else ch for ch in row)
+
+
+def timed_perft(board, depth):
+    started = time.perf_counter()
+    nodes = perft(board, depth)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    return nodes, elapsed
+
+
+def run_check(max_depth, string_depth=2):
+    """比对参考值与对称性，返回不一致的数量"""
+    failures = 0
+    for name, fen, expected in REFERENCE:
+        board = board_from_fen(fen)
+        for depth in sorted(d for d in expected if d <= max_depth):
+            nodes, elapsed = timed_perft(board, depth)
+            ok = nodes == expected[depth]
+            failures += not ok
+            print(f"{name} perft({depth}) = {nodes:>10}  期望 {expected[depth]:>10}  "
+                  f"{'通过' if ok else '失败'}  {nodes / elapsed:10.0f} 节点/秒")
+
+    for fen in [fen for _, fen, _ in REFERENCE] + SYMMETRY_FENS:
+        board = board_from_fen(fen)
+        depth = min(max_depth, 3)
+        nodes = perft(board, depth)
+        shallow = min(depth, string_depth)
+        checks = {
+            '镜像': (perft(board_from_fen(mirror_fen(fen)), depth), nodes),
+            '互换': (perft(board_from_fen(flip_fen(fen)), depth), nodes),
+            '字符串接口': (perft_strings(board.to_dongping(), board.side, shallow), perft(board, shallow)),
+        }
+        bad = [label for label, (count, expected) in checks.items() if count != expected]
+        failures += len(bad)
+        print(f"{fen}  perft({depth}) = {nodes}  {'一致' if not bad else '不一致：' + '、'.join(bad)}")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="走法生成 perft 测试")
+    parser.add_argument('--fen', default=INITIAL_FEN, help="起始局面（FEN）")
+    parser.add_argument('--depth', type=int, default=3, help="perft 深度")
+    parser.add_argument('--divide', type=int, default=None, help="按第一步走法分别计数的深度")
+    parser.add_argument('--check', action='store_true', help="比对参考值和对称性")
+    args = parser.parse_args()
+
+    if args.check:
+        failures = run_check(args.depth)
+        print("全部通过" if not failures else f"{failures} 项不一致")
+        sys.exit(1 if failures else 0)
+
+    board = board_from_fen(args.fen)
+    print(squares_to_fen(board.squares, board.side))
+    if args.divide:
+        counts = divide(board, args.divide)
+        for move, nodes in sorted(counts.items()):
+            print(f"{move:04d}: {nodes}")
+        print(f"走法数 {len(counts)}，合计 {sum(counts.values())}")
+    else:
+        for depth in range(1, args.depth + 1):
+            nodes, elapsed = timed_perft(board, depth)
+            print(f"perft({depth}) = {nodes:>10}  {elapsed:8.3f} 秒  {nodes / elapsed:10.0f} 节点/秒")
@@ -0,0 +1,171 @@
+"""自我对弈生成训练棋局
+
+每个进程加载一次开局库 / 统计模型，逐局对弈：
+    开局库（按权重随机）-> 统计模型（ChessModel.predict_book）-> alpha-beta 搜索（按节点数限制，结果可复现）
+前 explore_plies 步以 explore 的概率随机走一步合法走法，增加棋局多样性。
+每局的随机种子由 (seed, 局号) 决定，同样的参数重跑得到同样的棋局。
+输出：目录下的 selfplay_XXXXXX.jsonl 分片，每行 {"movelist": ..., "result": ..., "seed": ..., "plies": ...}，
+与 wanzhen.json 的字段相同，可直接交给 load_and_process_data / dataset_store（支持 JSON Lines）。
+分片写完才改名为正式文件名，中断后重跑会跳过已完成的分片。
+用法：python -m chess_ai.tools.self_play --out DIR --games 1000 [--workers N] [--book FILE] [--model FILE]
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chess_ai.utils.board_engine import Board, RED
+from chess_ai.search.alphabeta import Searcher
+from chess_ai.search.transposition import TranspositionTable
+
+SHARD_SIZE = 100
+MAX_PLIES = 300
+REPETITIONS = 3  # 同一局面（含走棋方）出现的次数达到此值判和
+TT_BUCKETS = 1 << 16
+
+_worker = {}
+
+
+def game_seed(seed, index):
+    """第 index 局的随机种子"""
+    return seed * 1000003 + index
+
+
+def _init_worker(book_path, model_path, node_limit, explore, explore_plies, max_plies):
+    """进程池初始化：每个进程只加载一次开局库和模型"""
+    from chess_ai.model.opening_book import OpeningBook
+    from chess_ai.model.chess_model import ChessModel
+    _worker.update(
+        book=OpeningBook(book_path) if book_path else None,
+        model=ChessModel.load(model_path) if model_path else None,
+        tt=TranspositionTable(TT_BUCKETS),
+        node_limit=node_limit, explore=explore, explore_plies=explore_plies, max_plies=max_plies,
+    )
+
+
+def _choose_move(board, rng, moves, searcher):
+    """按 随机探索 / 开局库 / 统计模型 / 搜索 的顺序选出走法"""
+    if len(board.history) < _worker['explore_plies'] and rng.random() < _worker['explore']:
+        return rng.choice(moves)
+    board_state = board.to_dongping()
+    for source in (_worker['book'], _worker['model']):
+        if source is None:
+            continue
+        move = (source.best_move(board_state, board.side, rng) if source is _worker['book']
+                else source.predict_book(board_state, board.side))
+        if move is not None:
+            return int(move)
+    return searcher.search(board, time_limit=None, node_limit=_worker['node_limit']).move
+
+
+def play_game(task):
+    """对弈一局，task 为 (局号, 种子)，返回与语料相同格式的字典"""
+    index, seed = task
+    rng = random.Random(seed)
+    tt = _worker['tt']
+    tt.clear()  # 每局从空表开始，结果与在哪个进程、之前下过哪些棋无关
+    searcher = Searcher(tt)
+    board = Board()
+    seen = {}
+    result = 'draw'
+    for _ in range(_worker['max_plies']):
+        moves = board.legal_moves()
+        if not moves:
+            # 无子可走（被将死或困毙）判负
+            result = 'black_win' if board.side == RED else 'red_win'
+            break
+        board.make_move(_choose_move(board, rng, moves, searcher))
+        position = board.search_key()
+        seen[position] = seen.get(position, 0) + 1
+        if seen[position] >= REPETITIONS:
+            break
+    movelist = "".join(f"{move:04d}" for move, _, _, _ in board.history)
+    return {"movelist": movelist, "result": result, "seed": seed, "plies": len(board.history), "index": index}
+
+
+def _shard_path(out_dir, shard):
+    return os.path.join(out_dir, f"selfplay_{shard:06d}.jsonl")
+
+
+def _write_shard(out_dir, shard, games):
+    path = _shard_path(out_dir, shard)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        for game in sorted(games, key=lambda g: g['index']):
+            game = dict(game)
+            del game['index']
+            f.write(json.dumps(game) + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def run_self_play(out_dir, games, workers=None, seed=0, shard_size=SHARD_SIZE, book_path=None, model_path=None,
+                  node_limit=2000, explore=0.1, explore_plies=20, max_plies=MAX_PLIES):
+    """生成 games 局自我对弈，返回统计字典"""
+    os.makedirs(out_dir, exist_ok=True)
+    shards = range((games + shard_size - 1) // shard_size)
+    pending = [shard for shard in shards if not os.path.exists(_shard_path(out_dir, shard))]
+    tasks = [(index, game_seed(seed, index)) for shard in pending
+             for index in range(shard * shard_size, min((shard + 1) * shard_size, games))]
+    print(f"共 {len(shards)} 个分片，已完成 {len(shards) - len(pending)} 个，待下 {len(tasks)} 局")
+
+    stats = {'games': 0, 'plies': 0, 'red_win': 0, 'black_win': 0, 'draw': 0}
+    started = time.perf_counter()
+    buffers = {}
+    initargs = (book_path, model_path, node_limit, explore, explore_plies, max_plies)
+    with multiprocessing.Pool(workers or os.cpu_count() or 1, _init_worker, initargs) as pool:
+        for game in pool.imap_unordered(play_game, tasks):
+            shard = game['index'] // shard_size
+            buffers.setdefault(shard, []).append(game)
+            stats['games'] += 1
+            stats['plies'] += game['plies']
+            stats[game['result']] += 1
+            if len(buffers[shard]) == min(shard_size, games - shard * shard_size):
+                _write_shard(out_dir, shard, buffers.pop(shard))
+                elapsed = time.perf_counter() - started
+                print(f"分片 {shard} 完成：累计 {stats['games']} 局，{stats['games'] / elapsed * 3600:.0f} 局/小时")
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    stats.update(seconds=elapsed, games_per_hour=stats['games'] / elapsed * 3600,
+                 plies_per_sec=stats['plies'] / elapsed)
+    print(f"完成 {stats['games']} 局（红胜 {stats['red_win']} / 黑胜 {stats['black_win']} / 和 {stats['draw']}），"
+          f"{stats['games_per_hour']:.0f} 局/小时，{stats['plies_per_sec']:.1f} 步/秒")
+    return stats
+
+
+def merge_shards(out_dir, filename):
+    """把全部分片按顺序合并为一个 JSON Lines 文件"""
+    count = 0
+    with open(filename, 'w', encoding='utf-8') as out:
+        for path in sorted(glob.glob(os.path.join(out_dir, 'selfplay_*.jsonl'))):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    out.write(line)
+                    count += 1
+    print(f"已合并 {count} 局到 {filename}")
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="自我对弈生成训练棋局")
+    parser.add_argument('--out', required=True, help="输出目录")
+    parser.add_argument('--games', type=int, default=1000, help="总局数")
+    parser.add_argument('--workers', type=int, default=None, help="进程数（缺省为 CPU 核数）")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help="每个分片的局数")
+    parser.add_argument('--book', default=None, help="开局库文件（.cxb）")
+    parser.add_argument('--model', default=None, help="ChessModel 模型文件")
+    parser.add_argument('--nodes', type=int, default=2000, help="每步搜索的节点数上限")
+    parser.add_argument('--explore', type=float, default=0.1, help="开局阶段随机走子的概率")
+    parser.add_argument('--explore-plies', type=int, default=20, help="允许随机走子的步数")
+    parser.add_argument('--max-plies', type=int, default=MAX_PLIES, help="超过此步数判和")
+    parser.add_argument('--merge', default=None, help="完成后把分片合并到此 JSON Lines 文件")
+    args = parser.parse_args()
+    run_self_play(args.out, args.games, args.workers, args.seed, args.shard_size, args.book, args.model,
+                  args.nodes, args.explore, args.explore_plies, args.max_plies)
+    if args.merge:
+        merge_shards(args.out, args.merge)
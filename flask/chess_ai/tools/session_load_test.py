@@ -0,0 +1,80 @@
+"""backend_mock 多会话压力测试
+
+每个并发会话用独立的 game 参数下一局棋：红方随机走合法着法，请求 AI 应着并回写，
+同时在本地维护棋盘，检查 AI 走法在本会话的局面下是否合法（会话之间互相干扰时会出现不合法走法）。
+先启动服务（python backend_mock.py，可设置 CHESS_SESSION_DB 让多个 worker 共享对局），再运行：
+    python -m chess_ai.tools.session_load_test --url http://127.0.0.1:8080 --sessions 1 2 4 8 --moves 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chess_ai.utils.board_engine import Board
+
+
+def play_session(url, game_id, moves, seed):
+    """下一局棋，返回 (请求数, 各请求耗时, 错误数, 不合法的 AI 走法数)"""
+    rng = random.Random(seed)
+    http = requests.Session()
+    latencies, errors, illegal = [], 0, 0
+
+    def call(path, **params):
+        started = time.perf_counter()
+        response = http.get(f"{url}/api/suggest/{path}", params=dict(params, game=game_id), timeout=60)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        return response.json()
+
+    board = Board()
+    try:
+        call('restart')
+        for _ in range(moves):
+            red_moves = board.legal_moves()
+            if not red_moves:
+                break
+            move = rng.choice(red_moves)
+            board.make_move(move)
+            reply = call(f"{move:04d}")
+            ai_move = reply.get('data')
+            if reply.get('code') != 200 or not ai_move:
+                break
+            if int(ai_move) not in board.legal_moves():
+                illegal += 1
+                break
+            board.make_move(int(ai_move))
+            call('current_apply_ai_step', move=ai_move)
+    except (requests.exceptions.RequestException, ValueError):
+        errors += 1
+    return len(latencies), latencies, errors, illegal
+
+
+def run_load(url, sessions, moves, seed=0):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(sessions) as pool:
+        results = list(pool.map(lambda i: play_session(url, f"load-{seed}-{i}", moves, seed * 1000 + i),
+                                range(sessions)))
+    elapsed = time.perf_counter() - started
+
+    requests_done = sum(r[0] for r in results)
+    latencies = sorted(latency for r in results for latency in r[1])
+    p50 = latencies[len(latencies) // 2] if latencies else 0
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    print(f"会话 {sessions:3d}：{requests_done / elapsed:8.1f} 请求/秒  p50 {p50 * 1000:7.1f} 毫秒  "
+          f"p95 {p95 * 1000:7.1f} 毫秒  错误 {sum(r[2] for r in results)}  不合法走法 {sum(r[3] for r in results)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="backend_mock 多会话压力测试")
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help="服务地址")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8, 16], help="并发会话数")
+    parser.add_argument('--moves', type=int, default=10, help="每个会话的回合数")
+    args = parser.parse_args()
+    for n in args.sessions:
+        run_load(args.url, n, args.moves, seed=n)
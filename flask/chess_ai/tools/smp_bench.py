@@ -0,0 +1,69 @@
+"""并行搜索（Lazy SMP）的扩展性测试
+
+对每个进程数分别测：
+    到达深度的时间  每个局面清空置换表后搜索到固定深度（不限时间），取总耗时，并给出相对 1 个进程的加速比；
+    每秒节点数      每个局面固定时间搜索，所有进程的节点数之和除以耗时。
+局面取自 board_bench 的随机对局（固定种子）。进程数超过 CPU 核数时数字没有意义，会给出提示。
+用法：python -m chess_ai.tools.smp_bench [--processes 1,2,4,8] [--depth 4] [--time 1.0] [--positions 8]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chess_ai.utils.board_engine import Board
+from chess_ai.search.parallel import ParallelSearcher
+from chess_ai.tools.board_bench import random_positions
+
+
+def bench_processes(processes, positions, depth, time_limit, buckets):
+    """返回 {'processes', 'time_to_depth', 'nps', 'depth'}"""
+    searcher = ParallelSearcher(processes, buckets)
+    try:
+        time_to_depth = 0.0
+        for state, side, _ in positions:
+            searcher.tt.clear()
+            started = time.perf_counter()
+            searcher.search(Board(state, side), time_limit=None, max_depth=depth)
+            time_to_depth += time.perf_counter() - started
+
+        nodes, elapsed, depths = 0, 0.0, 0
+        for state, side, _ in positions:
+            searcher.tt.clear()
+            result = searcher.search(Board(state, side), time_limit=time_limit)
+            nodes += result.nodes
+            elapsed += result.elapsed
+            depths += result.depth
+    finally:
+        searcher.close()
+    return {'processes': processes, 'time_to_depth': time_to_depth, 'nps': nodes / max(elapsed, 1e-9),
+            'depth': depths / len(positions)}
+
+
+def run_benchmark(process_counts, depth, time_limit, count, buckets):
+    positions = random_positions(count, seed=1)
+    cores = os.cpu_count() or 1
+    if max(process_counts) > cores:
+        print(f"注意：本机只有 {cores} 个 CPU 核，超过核数的进程数只会互相抢占")
+    print(f"{'进程数':>6} {f'到深度 {depth}（秒）':>14} {'加速比':>8} {'节点/秒':>10} {'扩展':>6} {'平均深度':>8}")
+    rows = []
+    for processes in process_counts:
+        row = bench_processes(processes, positions, depth, time_limit, buckets)
+        base = rows[0] if rows else row
+        rows.append(row)
+        print(f"{processes:>6} {row['time_to_depth']:>14.2f} {base['time_to_depth'] / row['time_to_depth']:>8.2f} "
+              f"{row['nps']:>10.0f} {row['nps'] / base['nps']:>6.2f} {row['depth']:>8.1f}")
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="并行搜索扩展性测试")
+    parser.add_argument('--processes', default='1,2,4,8', help="逗号分隔的进程数")
+    parser.add_argument('--depth', type=int, default=4, help="到达深度测试的搜索深度")
+    parser.add_argument('--time', type=float, default=1.0, help="每秒节点数测试中每个局面的搜索时间（秒）")
+    parser.add_argument('--positions', type=int, default=8, help="测试局面数")
+    parser.add_argument('--buckets', type=int, default=1 << 18, help="共享置换表的桶数（2 的幂）")
+    args = parser.parse_args()
+    run_benchmark([int(p) for p in args.processes.split(',')], args.depth, args.time, args.positions, args.buckets)
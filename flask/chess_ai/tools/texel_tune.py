@@ -0,0 +1,199 @@
+"""Texel 方法拟合评估表
+
+用棋谱的最终结果作为每个局面的标签（红方得分 1 / 0.5 / 0），拟合 search.evaluate 的 7 x 90 分值表：
+    预测红方得分 = sigmoid(K * 局面分)，最小化与标签的均方误差。
+每个局面编码为 32 个 (特征下标, 符号)：红方棋子为 类型*90+格子、符号 +1，黑方棋子取上下翻转后的格子、符号 -1，
+局面分即 sum(w[下标] * 符号)，梯度用 np.bincount 一次累加，整批向量化。左右对称的格子共享权重。
+先用初始分值表拟合 K，再固定 K 用 Adam 做小批量梯度下降；按棋局划出验证集，保存验证误差最低的一轮。
+数据可以是棋谱 JSON（与 load_and_process_data 相同的重放流程）或 dataset_store 生成的数据集目录。
+用法：python -m chess_ai.tools.texel_tune <棋局.json | 数据集目录> --out model/evaluation.cxe [--epochs 20]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chess_ai.utils.board_engine import RED, CAPTURED, SLOT_TYPE, SLOT_COLOR, MIRROR_SQ
+from chess_ai.utils.encoder import squares_array
+from chess_ai.search.evaluate import FLIP_SQ, red_table, load_weights, save_weights, PIECE_VALUES
+
+NUM_FEATURES = 7 * 90
+PAD_FEATURE = NUM_FEATURES  # 被吃掉的棋子，符号为 0
+
+SLOT_KIND = np.array(SLOT_TYPE, dtype=np.int16)
+SLOT_SIGN = np.where(np.array(SLOT_COLOR) == RED, 1, -1).astype(np.int8)
+# 黑方棋子的格子上下翻转到红方视角；被吃（99）保持不变
+_FLIP = np.array(FLIP_SQ + (CAPTURED,) * 10, dtype=np.int16)
+_IDENTITY = np.arange(100, dtype=np.int16)
+# 每个特征左右镜像后的特征（共享权重时两者的梯度取平均）
+MIRROR_FEATURE = np.array([kind * 90 + MIRROR_SQ[sq] for kind in range(7) for sq in range(90)] + [PAD_FEATURE])
+
+
+def encode_features(squares):
+    """(N, 32) 槽位坐标数组 -> (特征下标 (N, 32) int16, 符号 (N, 32) int8)"""
+    squares = squares_array(squares).astype(np.int16)
+    red_sq = np.where(SLOT_SIGN > 0, _IDENTITY[squares], _FLIP[squares])
+    present = squares != CAPTURED
+    index = np.where(present, SLOT_KIND * 90 + red_sq, PAD_FEATURE).astype(np.int16)
+    return index, np.where(present, SLOT_SIGN, 0).astype(np.int8)
+
+
+def load_positions(source, skip_plies=10, workers=None):
+    """读取局面，返回 (槽位数组 (N, 32), 红方得分 (N,), 棋局编号 (N,))；跳过每局前 skip_plies 步和结果未知的棋局"""
+    squares, outcomes, games = [], [], []
+    from chess_ai.utils.dataset_store import KNOWN_RESULTS, UNKNOWN_RESULT
+    if os.path.isdir(source):
+        from chess_ai.utils.dataset_store import Dataset
+        dataset = Dataset(source)
+        first_game = 0
+        for arrays in dataset.shards:
+            lengths = np.diff(arrays['games'])
+            game = np.repeat(np.arange(first_game, first_game + len(lengths)), lengths)
+            results = np.asarray(arrays['results'])
+            keep = (np.asarray(arrays['plies']) >= skip_plies) & (results != UNKNOWN_RESULT)
+            squares.append(np.asarray(arrays['positions'])[keep])
+            outcomes.append((results[keep].astype(np.float32) + 1) / 2)
+            games.append(game[keep])
+            first_game += len(lengths)
+    else:
+        from chess_ai.utils.data_loader import iter_processed_games
+        from chess_ai.model.chess_model import game_outcome
+        stats = {}
+        for game_id, processed in enumerate(iter_processed_games(source, workers, stats=stats)):
+            if processed['result'] not in KNOWN_RESULTS:
+                continue
+            states = processed['board_states'][skip_plies:]
+            if not states:
+                continue
+            squares.append(squares_array(states))
+            outcomes.append(np.full(len(states), game_outcome(processed['result']), dtype=np.float32))
+            games.append(np.full(len(states), game_id))
+        print(f"重放 {stats.get('games', 0)} 局，{stats.get('games_per_sec', 0):.1f} 局/秒")
+    if not squares:
+        return np.zeros((0, 32), np.uint8), np.zeros(0, np.float32), np.zeros(0, np.int64)
+    return np.concatenate(squares), np.concatenate(outcomes), np.concatenate(games)
+
+
+def predict_scores(weights, index, sign):
+    """红方视角的局面分"""
+    return (weights[index] * sign).sum(axis=1)
+
+
+def _loss(weights, index, sign, outcomes, scale, batch_size=1 << 18):
+    total = 0.0
+    for start in range(0, len(outcomes), batch_size):
+        stop = start + batch_size
+        p = 1 / (1 + np.exp(-scale * predict_scores(weights, index[start:stop], sign[start:stop])))
+        total += float(((p - outcomes[start:stop]) ** 2).sum())
+    return total / max(len(outcomes), 1)
+
+
+def fit_scale(weights, index, sign, outcomes, low=0.01, high=3.0, iterations=30):
+    """黄金分割搜索 K（以“每 400 分胜率比提高 10 倍”为单位），返回使误差最小的 K"""
+    unit = math.log(10) / 400
+    ratio = (math.sqrt(5) - 1) / 2
+    a, b = low, high
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    fc, fd = (_loss(weights, index, sign, outcomes, k * unit) for k in (c, d))
+    for _ in range(iterations):
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - ratio * (b - a)
+            fc = _loss(weights, index, sign, outcomes, c * unit)
+        else:
+            a, c, fc = c, d, fd
+            d = a + ratio * (b - a)
+            fd = _loss(weights, index, sign, outcomes, d * unit)
+    return (a + b) / 2
+
+
+def gradient(weights, index, sign, outcomes, scale):
+    """一批局面的均方误差对各特征权重的梯度，返回 (梯度, 误差)"""
+    p = 1 / (1 + np.exp(-scale * predict_scores(weights, index, sign)))
+    error = p - outcomes
+    d_score = (2 * scale / len(outcomes)) * error * p * (1 - p)
+    grad = np.bincount(index.ravel(), weights=(d_score[:, None] * sign).ravel(), minlength=NUM_FEATURES + 1)
+    grad = (grad + grad[MIRROR_FEATURE]) / 2
+    grad[PAD_FEATURE] = 0
+    return grad, float((error ** 2).mean())
+
+
+def tune(index, sign, outcomes, games, initial, scale=None, epochs=20, batch_size=1 << 16, lr=2.0,
+         validation=0.1, seed=0):
+    """Adam 小批量梯度下降，返回 (红方视角 7 x 90 分值表, K, 历史记录)"""
+    rng = np.random.default_rng(seed)
+    weights = np.append(np.asarray(initial, dtype=np.float64).ravel(), 0.0)
+    held_out = rng.random(int(games.max()) + 1 if len(games) else 0) < validation
+    val = held_out[games]
+    train_rows = np.flatnonzero(~val)
+    val_index, val_sign, val_outcomes = index[val], sign[val], outcomes[val]
+    if scale is None:
+        scale = fit_scale(weights, index[train_rows], sign[train_rows], outcomes[train_rows])
+    k = scale * math.log(10) / 400
+    print(f"训练 {len(train_rows)} 个局面，验证 {len(val_outcomes)} 个局面，K = {scale:.4f}")
+
+    m = np.zeros_like(weights)
+    v = np.zeros_like(weights)
+    beta1, beta2, step = 0.9, 0.999, 0
+    val_loss = _loss(weights, val_index, val_sign, val_outcomes, k) if len(val_outcomes) else float('inf')
+    best = (val_loss, weights.copy())
+    history = [{'epoch': 0, 'val_loss': best[0]}]
+    print(f"初始验证误差 {best[0]:.6f}")
+    for epoch in range(1, epochs + 1):
+        started = time.perf_counter()
+        order = rng.permutation(train_rows)
+        train_loss = 0.0
+        for start in range(0, len(order), batch_size):
+            rows = np.sort(order[start:start + batch_size])
+            grad, loss = gradient(weights, index[rows], sign[rows], outcomes[rows], k)
+            train_loss += loss * len(rows)
+            step += 1
+            m = beta1 * m + (1 - beta1) * grad
+            v = beta2 * v + (1 - beta2) * grad * grad
+            weights -= lr * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + 1e-12)
+        val_loss = _loss(weights, val_index, val_sign, val_outcomes, k) if len(val_outcomes) else train_loss
+        elapsed = time.perf_counter() - started
+        history.append({'epoch': epoch, 'train_loss': train_loss / max(len(order), 1), 'val_loss': val_loss,
+                        'seconds': elapsed})
+        print(f"第 {epoch} 轮：训练误差 {train_loss / max(len(order), 1):.6f}，验证误差 {val_loss:.6f}，"
+              f"{len(order) / elapsed:.0f} 局面/秒")
+        if val_loss < best[0] or not len(val_outcomes):
+            best = (val_loss, weights.copy())
+    table = best[1][:NUM_FEATURES].reshape(7, 90)
+    return table, scale, history
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Texel 方法拟合评估表")
+    parser.add_argument('source', help="棋谱 JSON 文件或 dataset_store 数据集目录")
+    parser.add_argument('--out', required=True, help="输出的权重文件（.cxe）")
+    parser.add_argument('--init', default=None, help="初始权重文件（缺省为内置分值表）")
+    parser.add_argument('--epochs', type=int, default=20, help="训练轮数")
+    parser.add_argument('--batch-size', type=int, default=1 << 16, help="每步的局面数")
+    parser.add_argument('--lr', type=float, default=2.0, help="Adam 学习率（分）")
+    parser.add_argument('--k', type=float, default=None, help="固定缩放系数 K（缺省从数据拟合）")
+    parser.add_argument('--skip-plies', type=int, default=10, help="跳过每局开头的步数")
+    parser.add_argument('--validation', type=float, default=0.1, help="作为验证集的棋局比例")
+    parser.add_argument('--workers', type=int, default=None, help="重放棋谱的进程数")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    squares, outcomes, games = load_positions(args.source, args.skip_plies, args.workers)
+    index, sign = encode_features(squares)
+    print(f"读取并编码 {len(outcomes)} 个局面，用时 {time.perf_counter() - started:.1f} 秒")
+    if not len(outcomes):
+        sys.exit("没有可用的局面")
+    initial = load_weights(args.init)[0] if args.init else red_table()
+    table, scale, _ = tune(index, sign, outcomes, games, initial, args.k, args.epochs, args.batch_size, args.lr,
+                           args.validation, args.seed)
+    save_weights(args.out, table, scale)
+    material = ", ".join(f"{name} {table[kind].mean():.0f}" for kind, name in
+                         zip(PIECE_VALUES, ('车', '马', '象', '士', '将', '炮', '兵')))
+    print(f"平均子力：{material}")
+    print(f"已保存到 {args.out}（{os.path.getsize(args.out)} 字节），总用时 {time.perf_counter() - started:.1f} 秒")
@@ -1,37 +1,61 @@
+import argparse
 import os
 import pickle
 import numpy as np
 import sys
 from tqdm import tqdm
-from utils.data_loader import load_and_process_data
-from model.chess_model import ChessModel
-from utils.data_loader import get_test_file
 
-def train_model():
+# 与其他脚本相同用 chess_ai. 前缀导入，并行训练的子进程中不会出现同一模块的两份副本
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chess_ai.utils.data_loader import load_and_process_data, iter_training_samples
+from chess_ai.model.chess_model import ChessModel
+from chess_ai.utils.data_loader import get_test_file
+
+def train_model(workers=1, incremental=False, data_file=None, stream=False, checkpoint_dir=None):
     # 数据路径
     current_dir = os.path.dirname(os.path.abspath(__file__))
     data_dir = os.path.join(current_dir, 'data')
-    json_file_path = os.path.join(data_dir, get_test_file())
-
-    # 加载和预处理数据
-    processed_data = load_and_process_data(json_file_path)
-
-    if not processed_data:
-        print("No valid data to train on.")
-        return
-
-    # 初始化模型
-    model = ChessModel(model_type='winrate')  # 选择模型类型：'freq' 或 'winrate'
+    json_file_path = os.path.join(data_dir, data_file or get_test_file())
+    model_save_path = os.path.join(current_dir,  'model', 'chess_ai_model.pkl')
 
-    # 训练模型
-    model.train(processed_data)
+    # 初始化模型；增量模式下在已保存的模型上继续累加新棋局
+    if incremental and os.path.exists(model_save_path):
+        model = ChessModel.load(model_save_path)
+        print(f"增量训练：在已有模型 {model_save_path} 上累加新棋局")
+    else:
+        model = ChessModel(model_type='winrate')  # 选择模型类型：'freq' 或 'winrate'
+
+    if stream:
+        # 流式训练：重放得到的样本直接计入模型，不保存每局的棋盘历史
+        stats = {}
+        model.train_stream(iter_training_samples(json_file_path, workers=workers, stats=stats,
+                                                 invalid_moves_path=os.path.join(data_dir, 'invalid_moves.tsv'),
+                                                 checkpoint_dir=checkpoint_dir))
+        print(f"吞吐量：{stats['games_per_sec']:.1f} 局/秒，{stats['moves_per_sec']:.1f} 步/秒")
+    else:
+        # 加载和预处理数据
+        processed_data = load_and_process_data(json_file_path, workers=workers)
+
+        if not processed_data:
+            print("No valid data to train on.")
+            return
+
+        # 训练模型
+        model.train(processed_data, workers=workers)
 
     # 保存训练好的模型
-    model_save_path = os.path.join(current_dir,  'model', 'chess_ai_model.pkl')
     model.save(model_save_path)
 
     print(f"模型训练完成，并已保存到 {model_save_path}")
 
 
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="训练象棋走法统计模型")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="并行训练的进程数")
+    parser.add_argument('--incremental', action='store_true', help="在已保存的模型上累加新棋局")
+    parser.add_argument('--data', default=None, help="data 目录下的棋局文件名")
+    parser.add_argument('--stream', action='store_true', help="流式训练，峰值内存与语料规模无关")
+    parser.add_argument('--checkpoint', default=None, help="流式训练时保存样本分块的目录")
+    args = parser.parse_args()
+    train_model(args.workers, args.incremental, args.data, args.stream, args.checkpoint)
@@ -0,0 +1,222 @@
+"""批量合法走法生成（NumPy 向量化）
+
+输入 (N, 10, 9) 的棋子编码张量（行为 y、列为 x，值为 颜色*7+类型，空格为 -1，与 board_to_matrix 相同）
+和每个局面的走棋方，一次算出全部局面的合法走法：
+    moves    (M,) uint16  整数走法 起点*100+终点（与 Board.legal_moves 相同）
+    offsets  (N+1,) int64 第 i 个局面的走法为 moves[offsets[i]:offsets[i+1]]，局面内按走法数值升序
+做法：
+    1. 车/炮：取每个棋子四条射线上的格子，累计途经的棋子数，一次判断整条射线；
+    2. 马、象、士、将、兵：导入时按 (棋子, 起点) 展开候选走法表（终点 + 马腿/象眼），查表后检查阻挡和终点；
+    3. 走后是否被将军：先按将帅的射线和马腿算出每个局面的“危险格”，只有正被将军的局面、将帅自身的走法
+       以及起点/终点落在危险格上的走法才逐个检查，检查规则与 Board.in_check 相同。
+内部先把棋子编码换成相对走棋方的编码（己方 0-6、对方 7-13，类型不变），“对方车”等判断都是与常数比较；
+将帅周围要检查的格子（四条射线、马和马腿、兵）导入时按 (走棋方, 将帅位置) 拼成一张表，检查时一次取出。
+"""
+import numpy as np
+
+from chess_ai.utils.board_engine import (RED, ROOK, HORSE, ELEPHANT, ADVISOR, KING, CANNON, PAWN, RAYS,
+                                         HORSE_MOVES, HORSE_ATTACKS, ELEPHANT_MOVES, ADVISOR_MOVES, KING_MOVES,
+                                         PAWN_MOVES, PAWN_ATTACKS, SLOT_PIECE, CAPTURED)
+
+EMPTY = -1
+PAD = 90  # 补位格：扩展后的第 91 列，永远为空
+MAX_RAY = 9
+ENEMY = 7  # 相对编码中对方棋子的偏移
+IS_SLIDER = np.array([kind in (ROOK, CANNON) for kind in range(7)])
+# 黑方走棋时换成相对编码：红黑互换，空格（下标 -1）落在最后一项
+SWAP_COLOR = np.array([(piece + ENEMY) % 14 for piece in range(14)] + [EMPTY], dtype=np.int8)
+
+
+def _build_step_candidates():
+    """马、象、士、将、兵：按 (棋子编码, 起点) 展开候选走法，得到终点和阻挡格（马腿/象眼，没有为 PAD）"""
+    to_list, block_list = [], []
+    starts = np.zeros(14 * 90 + 1, dtype=np.int64)
+    for piece in range(14):
+        color, kind = divmod(piece, 7)
+        for sq in range(90):
+            starts[piece * 90 + sq] = len(to_list)
+            if kind == HORSE:
+                candidates = HORSE_MOVES[sq]
+            elif kind == ELEPHANT:
+                candidates = ELEPHANT_MOVES[color][sq]
+            elif kind in (ADVISOR, KING, PAWN):
+                table = {ADVISOR: ADVISOR_MOVES, KING: KING_MOVES, PAWN: PAWN_MOVES}[kind]
+                candidates = [(to, PAD) for to in table[color][sq]]
+            else:
+                candidates = []
+            for to, block in candidates:
+                to_list.append(to)
+                block_list.append(block)
+    starts[-1] = len(to_list)
+    return starts, np.array(to_list, dtype=np.int64), np.array(block_list, dtype=np.int64)
+
+
+def _build_attack_tables():
+    """RAY_CELLS：每个格子出发的四个方向射线（补 PAD）；
+    KING_CELLS[side, 将帅位置]：四条射线、对方马的位置和马腿、对方兵的位置依次拼接（补 PAD）；
+    RAY_ATTACKER[相对编码]：沿射线攻击将帅时该棋子需是射线上的第几个棋子（对方车、将为 1，对方炮为 2，其余为 -1），
+    空格（下标 -1）落在最后一项"""
+    rays = np.full((91, 4, MAX_RAY), PAD, dtype=np.int64)
+    king_cells = np.full((2, 91, KING_WIDTH), PAD, dtype=np.int64)
+    for sq in range(90):
+        for d, ray in enumerate(RAYS[sq]):
+            rays[sq, d, :len(ray)] = ray
+        horses = [cell for pair in HORSE_ATTACKS[sq] for cell in pair]
+        for side in range(2):
+            king_cells[side, sq, :4 * MAX_RAY] = rays[sq].ravel()
+            king_cells[side, sq, HORSE_SLICE.start:HORSE_SLICE.start + len(horses)] = horses
+            pawns = PAWN_ATTACKS[1 - side][sq]
+            king_cells[side, sq, PAWN_SLICE.start:PAWN_SLICE.start + len(pawns)] = pawns
+    attacker = np.full(15, -1, dtype=np.int8)
+    attacker[ENEMY + ROOK] = attacker[ENEMY + KING] = 1
+    attacker[ENEMY + CANNON] = 2
+    return rays, king_cells, attacker
+
+
+HORSE_SLICE = slice(4 * MAX_RAY, 4 * MAX_RAY + 16)
+PAWN_SLICE = slice(4 * MAX_RAY + 16, 4 * MAX_RAY + 19)
+KING_WIDTH = PAWN_SLICE.stop
+STEP_START, STEP_TO, STEP_BLOCK = _build_step_candidates()
+RAY_CELLS, KING_CELLS, RAY_ATTACKER = _build_attack_tables()
+
+
+def squares_to_tensor(squares):
+    """(N, 32) 槽位坐标数组（encoder.squares_array）转为 (N, 10, 9) 棋子编码张量"""
+    squares = np.asarray(squares).reshape(-1, 32)
+    n = len(squares)
+    flat = np.full((n, 91), EMPTY, dtype=np.int8)
+    rows, slots = np.nonzero(squares != CAPTURED)
+    flat[rows, squares[rows, slots]] = np.array(SLOT_PIECE, dtype=np.int8)[slots]
+    return flat[:, :90].reshape(n, 9, 10).transpose(0, 2, 1)
+
+
+def _expand(starts, counts):
+    """把若干区间 [start, start+count) 拼接展开，返回 (区间序号, 区间内的下标)"""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, starts[owner] + within
+
+
+def _attacked(rel, n, king, side, move=None):
+    """side 方位于 king 的将帅是否被攻击；move 为 (起点, 终点, 走子的相对编码) 时按走后的棋盘判断"""
+    cells = KING_CELLS[side, king]
+    pieces = rel.ravel()[n[:, None] * rel.shape[1] + cells]
+    if move is not None:
+        frm, to, mover = move
+        pieces[cells == frm[:, None]] = EMPTY
+        moved = cells == to[:, None]
+        pieces[moved] = np.broadcast_to(mover[:, None], cells.shape)[moved]
+
+    # 车和将帅：射线上第一个棋子；炮：射线上第二个棋子。按射线累计棋子数，与该棋子需要的序号比较
+    ray = pieces[:, :4 * MAX_RAY].reshape(-1, 4, MAX_RAY)
+    rank = np.cumsum(ray != EMPTY, axis=2, dtype=np.int8)
+    attacked = (RAY_ATTACKER[ray] == rank).any(axis=(1, 2))
+
+    horses = pieces[:, HORSE_SLICE].reshape(-1, 8, 2)
+    attacked |= ((horses[..., 0] == ENEMY + HORSE) & (horses[..., 1] == EMPTY)).any(axis=1)
+    return attacked | (pieces[:, PAWN_SLICE] == ENEMY + PAWN).any(axis=1)
+
+
+def _danger_maps(rel, kings):
+    """不被将军的局面中，非将帅走法只有以下情况可能走后被将：
+        起点是将帅某条射线上的第 1、2 个棋子，且该射线前 3 个棋子中有对方车、将、炮（让开后暴露）；
+        终点在射线上第一个棋子之前，且第一个棋子是对方炮（成为炮架）；
+        起点是对方马攻击将帅时的马腿。
+    返回 (起点危险格, 终点危险格) 两个 (N, 91) 布尔数组
+    """
+    n = np.arange(len(kings))
+    cells = RAY_CELLS[kings]
+    pieces = rel[n[:, None, None], cells]
+    occupied = pieces != EMPTY
+    rank = np.cumsum(occupied, axis=2)
+    threat = (rank <= 3) & (RAY_ATTACKER[pieces] > 0)
+    exposed = occupied & (rank <= 2) & threat.any(axis=2, keepdims=True)
+    first_cannon = ((rank == 1) & (pieces == ENEMY + CANNON)).any(axis=2, keepdims=True)
+    screen = (rank == 0) & first_cannon
+
+    danger_from = np.zeros(rel.shape, dtype=bool)
+    danger_to = np.zeros(rel.shape, dtype=bool)
+    rows = np.broadcast_to(n[:, None, None], cells.shape)
+    danger_from[rows[exposed], cells[exposed]] = True
+    danger_to[rows[screen], cells[screen]] = True
+
+    horses = KING_CELLS[0, kings, HORSE_SLICE].reshape(-1, 8, 2)
+    legs = rel[n[:, None], horses[..., 0]] == ENEMY + HORSE
+    danger_from[np.broadcast_to(n[:, None], legs.shape)[legs], horses[..., 1][legs]] = True
+    danger_from[:, PAD] = danger_to[:, PAD] = False
+    return danger_from, danger_to
+
+
+def batch_legal_moves(boards, sides=RED):
+    """批量生成合法走法，返回 (moves, offsets)；sides 为单个走棋方或长度为 N 的数组"""
+    boards = np.asarray(boards)
+    n_boards = len(boards)
+    sides = np.broadcast_to(np.asarray(sides, dtype=np.int64), (n_boards,))
+    # 转成按格子编号 x*10+y 排列的 (N, 91) 相对编码，最后一列为补位空格
+    rel = np.full((n_boards, 91), EMPTY, dtype=np.int8)
+    rel[:, :90] = boards.astype(np.int8).transpose(0, 2, 1).reshape(n_boards, 90)
+    black = sides != RED
+    rel[black] = SWAP_COLOR[rel[black]]
+
+    flat = rel.ravel()  # 局面 i 的格子 sq 位于 flat[i * 91 + sq]
+    occupied = flat != EMPTY
+    king_here = rel == KING
+    has_king = king_here.any(axis=1)
+    kings = np.where(has_king, np.argmax(king_here, axis=1), PAD)
+
+    addr = np.flatnonzero(occupied & (flat < ENEMY))
+    pos, frm = np.divmod(addr, 91)
+    piece = flat[addr]  # 己方棋子的相对编码即类型
+    slider = IS_SLIDER[piece]
+
+    # 车/炮：沿四条射线累计途经的棋子数；车吃第一个棋子，炮隔一个吃第二个，两者都能走到第一个棋子之前的空格
+    s_pos, s_frm = pos[slider], frm[slider]
+    cells = RAY_CELLS[s_frm].reshape(-1, 4 * MAX_RAY)
+    pieces = flat[(s_pos * 91)[:, None] + cells]
+    hit = pieces != EMPTY
+    before = np.cumsum(hit.reshape(-1, 4, MAX_RAY), axis=2, dtype=np.int8).reshape(hit.shape) - hit
+    cannon = (piece[slider] == CANNON)[:, None]
+    valid = (cells != PAD) & (((before == 0) & ~hit) | ((before == cannon) & (pieces >= ENEMY)))
+    j = np.flatnonzero(valid)
+    owner = j // (4 * MAX_RAY)
+    slide_moves = (s_pos[owner], s_frm[owner], cells.ravel()[j])
+
+    # 马、象、士、将、兵：按实际编码查表展开候选走法，检查马腿/象眼和终点
+    t_pos, t_frm, t_piece = pos[~slider], frm[~slider], piece[~slider]
+    keys = (t_piece + sides[t_pos] * 7) * 90 + t_frm
+    owner, cand = _expand(STEP_START[keys], STEP_START[keys + 1] - STEP_START[keys])
+    t_pos, t_frm, t_piece = t_pos[owner], t_frm[owner], t_piece[owner]
+    to = STEP_TO[cand]
+    target = flat[t_pos * 91 + to]
+    valid = ~occupied[t_pos * 91 + STEP_BLOCK[cand]] & ((target == EMPTY) | (target >= ENEMY))
+    step_moves = (t_pos[valid], t_frm[valid], to[valid])
+
+    pos, frm, to = (np.concatenate(pair) for pair in zip(slide_moves, step_moves))
+    moving_king = np.zeros(len(pos), dtype=bool)
+    moving_king[len(slide_moves[0]):] = t_piece[valid] == KING
+
+    # 走后是否被将军：只对可能受影响的走法逐个检查
+    with_king = has_king.nonzero()[0]
+    in_check = np.ones(n_boards, dtype=bool)
+    in_check[with_king] = _attacked(rel, with_king, kings[with_king], sides[with_king])
+    danger_from, danger_to = _danger_maps(rel, kings)
+    base = pos * 91
+    suspect = in_check[pos] | moving_king | danger_from.ravel()[base + frm] | danger_to.ravel()[base + to]
+    legal = has_king[pos]
+    idx = (suspect & legal).nonzero()[0]
+    if len(idx):
+        new_king = np.where(moving_king[idx], to[idx], kings[pos[idx]])
+        move = (frm[idx], to[idx], flat[base[idx] + frm[idx]])
+        legal[idx] = ~_attacked(rel, pos[idx], new_king, sides[pos[idx]], move)
+
+    # 按 (局面, 走法) 排序：合成一个整数键排序比 lexsort 快
+    pos = pos[legal]
+    keys = np.sort(pos * 10000 + frm[legal] * 100 + to[legal])
+    offsets = np.zeros(n_boards + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pos, minlength=n_boards), out=offsets[1:])
+    return (keys % 10000).astype(np.uint16), offsets
+
+
+def split_moves(moves, offsets):
+    """(moves, offsets) 拆成每个局面一个列表"""
+    return [moves[offsets[i]:offsets[i + 1]].tolist() for i in range(len(offsets) - 1)]
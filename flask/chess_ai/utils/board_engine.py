@@ -0,0 +1,367 @@
+"""数组棋盘引擎
+
+东萍棋盘字符串中每两位数字是一个棋子的坐标（横坐标在前，纵坐标在后），
+坐标 x*10+y 恰好落在 0-89 之间，因此直接把它当作 90 格 mailbox 的下标。
+Board 同时维护：
+    mailbox  90 格 bytearray，存 槽位号+1（0 表示空格）
+    squares  32 个槽位的坐标表（被吃掉记为 99），与东萍字符串一一对应
+走法用整数 起点*100+终点 表示，与东萍走法字符串 int('8987') 相同。
+局面的 64 位 Zobrist 哈希 key 及其左右镜像局面的哈希 mirror_key 在走子/悔棋时增量更新。
+评估分 score（红方视角的子力 + 位置分，按评估表查表求和）同样在走子/悔棋时增量更新；
+评估表由 search.evaluate 通过 set_eval_table 设置，Board 创建时记下当时的表，之后一直用它，
+中途换表不会让已有 Board 的 score 与重新求和的结果不一致。
+"""
+import random
+
+RED, BLACK = 0, 1
+ROOK, HORSE, ELEPHANT, ADVISOR, KING, CANNON, PAWN = range(7)
+CAPTURED = 99  # 被吃掉的棋子在东萍字符串中记为 99
+
+# 32 个槽位的棋子身份，顺序与 board_utils.initial_board() 一致：
+# 前 16 个为上方（黑方）车马象士将士象马车炮炮 + 红兵，后 16 个为红方车马相仕帅仕相马车炮炮 + 黑卒
+# （兵卒两组的归属与 invertToFen 中“错误补救措施”修正后的结果一致）
+_BACK_RANK = [ROOK, HORSE, ELEPHANT, ADVISOR, KING, ADVISOR, ELEPHANT, HORSE, ROOK]
+SLOT_TYPE = tuple((_BACK_RANK + [CANNON] * 2 + [PAWN] * 5) * 2)
+SLOT_COLOR = tuple([BLACK] * 11 + [RED] * 5 + [RED] * 11 + [BLACK] * 5)
+SLOT_PIECE = tuple(c * 7 + t for c, t in zip(SLOT_COLOR, SLOT_TYPE))  # 棋子编码：颜色*7+类型
+SIDE_SLOTS = (
+    tuple(i for i in range(32) if SLOT_COLOR[i] == RED),
+    tuple(i for i in range(32) if SLOT_COLOR[i] == BLACK),
+)
+KING_SLOT = (20, 4)
+
+# mailbox 中的值（槽位号+1）到颜色/棋子编码的查表，0 表示空格
+CELL_COLOR = (-1,) + SLOT_COLOR
+CELL_PIECE = (-1,) + SLOT_PIECE
+
+PIECE_CHARS = 'RNBAKCPrnbakcp'  # 棋子编码 -> FEN 字符
+
+POS_STR = tuple(f"{i:02d}" for i in range(100))
+POS_INDEX = {f"{x}{y}": x * 10 + y for x in range(9) for y in range(10)}
+POS_INDEX['99'] = CAPTURED
+
+# Zobrist 随机数表：按 棋子编码 x 格子 索引，固定种子保证模型文件中的哈希跨进程一致
+_rng = random.Random(0x5A0B1257)
+ZOBRIST = tuple(tuple(_rng.getrandbits(64) for _ in range(90)) for _ in range(14))
+ZOBRIST_SIDE = _rng.getrandbits(64)  # 黑方走棋时异或，仅用于搜索，不计入局面 key
+del _rng
+
+# 左右镜像（横坐标 x -> 8-x）后的格子，以及“镜像局面”的 Zobrist 表
+MIRROR_SQ = tuple((8 - sq // 10) * 10 + sq % 10 if sq < 90 else sq for sq in range(100))
+ZOBRIST_MIRROR = tuple(tuple(table[MIRROR_SQ[sq]] for sq in range(90)) for table in ZOBRIST)
+
+INITIAL_STATE = "0010203040506070801272062646668609192939495969798917770323436383"
+
+# 评估表：按 棋子编码 x 格子 索引的分值（红方为正），未设置时全为 0
+EVAL_TABLE = tuple((0,) * 90 for _ in range(14))
+
+
+def set_eval_table(table):
+    """设置评估表（14 x 90）；只影响之后创建的 Board，已有的 Board 继续用创建时的表"""
+    global EVAL_TABLE
+    EVAL_TABLE = tuple(tuple(row) for row in table)
+
+
+def _on_board(x, y):
+    return 0 <= x <= 8 and 0 <= y <= 9
+
+
+def _in_palace(color, x, y):
+    if not 3 <= x <= 5:
+        return False
+    return 7 <= y <= 9 if color == RED else 0 <= y <= 2
+
+
+def _own_half(color, y):
+    return y >= 5 if color == RED else y <= 4
+
+
+def _build_tables():
+    rays, horse_moves = [], []
+    elephant_moves = ([], [])
+    advisor_moves = ([], [])
+    king_moves = ([], [])
+    pawn_moves = ([], [])
+
+    for sq in range(90):
+        x, y = divmod(sq, 10)
+
+        # 车/炮的四个方向射线
+        sq_rays = []
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            ray, nx, ny = [], x + dx, y + dy
+            while _on_board(nx, ny):
+                ray.append(nx * 10 + ny)
+                nx, ny = nx + dx, ny + dy
+            sq_rays.append(tuple(ray))
+        rays.append(tuple(sq_rays))
+
+        # 马走日，蹩马腿
+        moves = []
+        for dx, dy in ((1, 2), (-1, 2), (1, -2), (-1, -2), (2, 1), (2, -1), (-2, 1), (-2, -1)):
+            nx, ny = x + dx, y + dy
+            if _on_board(nx, ny):
+                leg = (x + dx // 2) * 10 + y if abs(dx) == 2 else x * 10 + y + dy // 2
+                moves.append((nx * 10 + ny, leg))
+        horse_moves.append(tuple(moves))
+
+        for color in (RED, BLACK):
+            # 象走田，塞象眼，不过河
+            moves = []
+            for dx, dy in ((2, 2), (2, -2), (-2, 2), (-2, -2)):
+                nx, ny = x + dx, y + dy
+                if _on_board(nx, ny) and _own_half(color, ny):
+                    moves.append((nx * 10 + ny, (x + dx // 2) * 10 + y + dy // 2))
+            elephant_moves[color].append(tuple(moves))
+
+            # 士走斜线，不出九宫
+            advisor_moves[color].append(tuple(
+                (x + dx) * 10 + y + dy for dx, dy in ((1, 1), (1, -1), (-1, 1), (-1, -1))
+                if _in_palace(color, x + dx, y + dy)))
+
+            # 将帅走直线一步，不出九宫
+            king_moves[color].append(tuple(
+                (x + dx) * 10 + y + dy for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                if _in_palace(color, x + dx, y + dy)))
+
+            # 兵卒只进不退，过河后可以横走
+            forward = -1 if color == RED else 1
+            steps = [(0, forward)]
+            if not _own_half(color, y):
+                steps += [(1, 0), (-1, 0)]
+            pawn_moves[color].append(tuple(
+                (x + dx) * 10 + y + dy for dx, dy in steps if _on_board(x + dx, y + dy)))
+
+    # 反向表：哪些格子上的马/兵能攻击到目标格
+    horse_attacks = [[] for _ in range(90)]
+    for sq in range(90):
+        for to, leg in horse_moves[sq]:
+            horse_attacks[to].append((sq, leg))
+    pawn_attacks = ([[] for _ in range(90)], [[] for _ in range(90)])
+    for color in (RED, BLACK):
+        for sq in range(90):
+            for to in pawn_moves[color][sq]:
+                pawn_attacks[color][to].append(sq)
+
+    freeze = lambda table: tuple(tuple(v) for v in table)
+    return (tuple(rays), tuple(horse_moves), freeze(horse_attacks),
+            tuple(map(tuple, elephant_moves)), tuple(map(tuple, advisor_moves)),
+            tuple(map(tuple, king_moves)), tuple(map(tuple, pawn_moves)),
+            tuple(map(freeze, pawn_attacks)))
+
+
+(RAYS, HORSE_MOVES, HORSE_ATTACKS, ELEPHANT_MOVES, ADVISOR_MOVES,
+ KING_MOVES, PAWN_MOVES, PAWN_ATTACKS) = _build_tables()
+
+
+class Board:
+    """可走子/悔棋的棋盘对象，与东萍棋盘字符串保持同步"""
+
+    __slots__ = ('squares', 'mailbox', 'side', 'key', 'mirror_key', 'score', 'eval_table', 'history')
+
+    def __init__(self, board_state=None, side=RED):
+        if board_state is None:
+            board_state = INITIAL_STATE
+        self.squares = [POS_INDEX.get(board_state[i:i + 2], CAPTURED) for i in range(0, 64, 2)]
+        self.mailbox = bytearray(90)
+        self.key = self.mirror_key = self.score = 0
+        self.eval_table = EVAL_TABLE
+        for slot, sq in enumerate(self.squares):
+            if sq != CAPTURED:
+                self.mailbox[sq] = slot + 1
+                self.score += self.eval_table[SLOT_PIECE[slot]][sq]
+                self.key ^= ZOBRIST[SLOT_PIECE[slot]][sq]
+                self.mirror_key ^= ZOBRIST_MIRROR[SLOT_PIECE[slot]][sq]
+        self.side = side
+        self.history = []
+
+    def search_key(self):
+        """搜索用哈希：局面 key 再叠加走棋方"""
+        return self.key ^ ZOBRIST_SIDE if self.side else self.key
+
+    def canonical_key(self):
+        """规范方向的局面键：取局面与其镜像中哈希较小者，返回 (key, 是否镜像)"""
+        if self.mirror_key < self.key:
+            return self.mirror_key, True
+        return self.key, False
+
+    def to_dongping(self):
+        """导出东萍棋盘字符串"""
+        return "".join([POS_STR[sq] for sq in self.squares])
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.squares = self.squares[:]
+        board.mailbox = self.mailbox[:]
+        board.side = self.side
+        board.key = self.key
+        board.mirror_key = self.mirror_key
+        board.score = self.score
+        board.eval_table = self.eval_table
+        board.history = self.history[:]
+        return board
+
+    def piece_at(self, sq):
+        """返回格子上的棋子编码（颜色*7+类型），空格返回 -1"""
+        return CELL_PIECE[self.mailbox[sq]]
+
+    def make_move(self, move):
+        """走子，返回被吃棋子的槽位号（没有吃子返回 -1）"""
+        frm, to = divmod(move, 100)
+        cell = self.mailbox[frm]
+        if not cell:
+            raise ValueError(f"无效走法: {move:04d}，原因：起始位置没有棋子")
+        captured = self.mailbox[to] - 1
+        old_key, old_mirror_key = self.key, self.mirror_key
+        piece = SLOT_PIECE[cell - 1]
+        table, mirror_table = ZOBRIST[piece], ZOBRIST_MIRROR[piece]
+        key = old_key ^ table[frm] ^ table[to]
+        mirror_key = old_mirror_key ^ mirror_table[frm] ^ mirror_table[to]
+        eval_table = self.eval_table
+        values = eval_table[piece]
+        self.score += values[to] - values[frm]
+        if captured >= 0:
+            self.squares[captured] = CAPTURED
+            key ^= ZOBRIST[SLOT_PIECE[captured]][to]
+            mirror_key ^= ZOBRIST_MIRROR[SLOT_PIECE[captured]][to]
+            self.score -= eval_table[SLOT_PIECE[captured]][to]
+        self.mailbox[to] = cell
+        self.mailbox[frm] = 0
+        self.squares[cell - 1] = to
+        self.side ^= 1
+        self.key, self.mirror_key = key, mirror_key
+        self.history.append((move, captured, old_key, old_mirror_key))
+        return captured
+
+    def unmake_move(self):
+        """撤销上一步走子"""
+        move, captured, self.key, self.mirror_key = self.history.pop()
+        frm, to = divmod(move, 100)
+        cell = self.mailbox[to]
+        self.mailbox[frm] = cell
+        self.squares[cell - 1] = frm
+        eval_table = self.eval_table
+        values = eval_table[SLOT_PIECE[cell - 1]]
+        self.score -= values[to] - values[frm]
+        if captured >= 0:
+            self.mailbox[to] = captured + 1
+            self.squares[captured] = to
+            self.score += eval_table[SLOT_PIECE[captured]][to]
+        else:
+            self.mailbox[to] = 0
+        self.side ^= 1
+
+    def generate_moves(self, side=None, captures_only=False):
+        """生成伪合法走法（符合棋子走法规则，但未检查走后是否被将军）"""
+        if side is None:
+            side = self.side
+        mb = self.mailbox
+        squares = self.squares
+        moves = []
+        append = moves.append
+
+        for slot in SIDE_SLOTS[side]:
+            frm = squares[slot]
+            if frm == CAPTURED:
+                continue
+            kind = SLOT_TYPE[slot]
+            base = frm * 100
+
+            if kind == ROOK:
+                for ray in RAYS[frm]:
+                    for to in ray:
+                        cell = mb[to]
+                        if not cell:
+                            if not captures_only:
+                                append(base + to)
+                            continue
+                        if CELL_COLOR[cell] != side:
+                            append(base + to)
+                        break
+            elif kind == CANNON:
+                for ray in RAYS[frm]:
+                    screen = False
+                    for to in ray:
+                        cell = mb[to]
+                        if not screen:
+                            if not cell:
+                                if not captures_only:
+                                    append(base + to)
+                            else:
+                                screen = True
+                        elif cell:
+                            if CELL_COLOR[cell] != side:
+                                append(base + to)
+                            break
+            elif kind == HORSE:
+                for to, leg in HORSE_MOVES[frm]:
+                    if not mb[leg] and CELL_COLOR[mb[to]] != side and (mb[to] or not captures_only):
+                        append(base + to)
+            elif kind == ELEPHANT:
+                for to, eye in ELEPHANT_MOVES[side][frm]:
+                    if not mb[eye] and CELL_COLOR[mb[to]] != side and (mb[to] or not captures_only):
+                        append(base + to)
+            else:
+                if kind == PAWN:
+                    targets = PAWN_MOVES[side][frm]
+                elif kind == ADVISOR:
+                    targets = ADVISOR_MOVES[side][frm]
+                else:
+                    targets = KING_MOVES[side][frm]
+                for to in targets:
+                    if CELL_COLOR[mb[to]] != side and (mb[to] or not captures_only):
+                        append(base + to)
+        return moves
+
+    def in_check(self, side=None):
+        """判断 side 方的将/帅是否被攻击（含将帅照面），将帅已被吃也视为被将军"""
+        if side is None:
+            side = self.side
+        king_sq = self.squares[KING_SLOT[side]]
+        if king_sq == CAPTURED:
+            return True
+        enemy = side ^ 1
+        mb = self.mailbox
+        rook, king, cannon = enemy * 7 + ROOK, enemy * 7 + KING, enemy * 7 + CANNON
+
+        for ray in RAYS[king_sq]:
+            screened = False
+            for sq in ray:
+                cell = mb[sq]
+                if not cell:
+                    continue
+                piece = CELL_PIECE[cell]
+                if not screened:
+                    if piece == rook or piece == king:
+                        return True
+                    screened = True
+                else:
+                    if piece == cannon:
+                        return True
+                    break
+
+        horse = enemy * 7 + HORSE
+        for sq, leg in HORSE_ATTACKS[king_sq]:
+            if CELL_PIECE[mb[sq]] == horse and not mb[leg]:
+                return True
+
+        pawn = enemy * 7 + PAWN
+        for sq in PAWN_ATTACKS[enemy][king_sq]:
+            if CELL_PIECE[mb[sq]] == pawn:
+                return True
+        return False
+
+    def is_legal(self, move, side=None):
+        """判断伪合法走法走完后己方是否不被将军"""
+        if side is None:
+            side = self.side
+        self.make_move(move)
+        legal = not self.in_check(side)
+        self.unmake_move()
+        return legal
+
+    def legal_moves(self, side=None, captures_only=False):
+        """生成 side 方全部合法走法"""
+        if side is None:
+            side = self.side
+        return [move for move in self.generate_moves(side, captures_only) if self.is_legal(move, side)]
@@ -1,5 +1,8 @@
 import numpy as np
 
+from chess_ai.utils.board_engine import Board, RED, BLACK, ZOBRIST, ZOBRIST_MIRROR, SLOT_PIECE, POS_INDEX, CAPTURED
+from chess_ai.utils.encoder import squares_array, SLOT_PLANES
+
 def initial_board():
     """生成初始棋盘状态"""
     # 黑方棋子位置（横坐标在前，纵坐标在后）
@@ -24,131 +27,119 @@ def initial_board():
     return board
 
 
+def _find_piece(board_state, pos_str):
+    """返回坐标为 pos_str 的棋子在东萍字符串中的偏移（只匹配偶数位），找不到返回 -1"""
+    i = board_state.find(pos_str)
+    while i != -1 and i % 2:
+        i = board_state.find(pos_str, i + 1)
+    return i
+
+
 def apply_move(board_state, action):
     """应用走法到棋盘"""
-    start = int(action[:2])  # 起始位置（横坐标在前，纵坐标在后）
-    end = int(action[2:4])   # 目标位置（横坐标在前，纵坐标在后）
-
-    # 将棋盘转为列表便于修改
-    board_list = list(board_state)
-
-    # 查找要移动的棋子
-    moved = False
-    move_reason = ""  # 用于记录走法无效的原因
-    for i in range(0, len(board_list), 2):
-        # 检查当前位置是否有效
-        if i + 1 >= len(board_list):
-            continue
-
-        pos_str = board_list[i] + board_list[i + 1]
-        if pos_str == "99":
-            continue  # 跳过无效位置
-
-        pos = int(pos_str)
-        if pos == start:
-            # 移动棋子
-            board_list[i] = f"{end // 10}"  # 更新横坐标
-            board_list[i + 1] = f"{end % 10}"  # 更新纵坐标
-            moved = True
-
-            # 检查是否吃子
-            for j in range(0, len(board_list), 2):
-                if j == i:
-                    continue  # 跳过自身
-                if j + 1 >= len(board_list):
-                    continue
-
-                target_pos_str = board_list[j] + board_list[j + 1]
-                if target_pos_str == "99":
-                    continue
-
-                target_pos = int(target_pos_str)
-                if target_pos == end:
-                    # 吃掉对方棋子（将其位置设为99）
-                    board_list[j] = "9"
-                    board_list[j + 1] = "9"
-            break
-
-    if not moved:
-        # 检查起始位置是否有棋子
-        has_piece = False
-        for i in range(0, len(board_list), 2):
-            if i + 1 >= len(board_list):
-                continue
-            pos_str = board_list[i] + board_list[i + 1]
-            if pos_str != "99":
-                current_pos = int(pos_str)
-                if current_pos == start:
-                    has_piece = True
-                    break
-
-        if not has_piece:
-            move_reason = "起始位置没有棋子"
-        else:
-            move_reason = "目标位置被其他棋子占据且未吃子"
-
-        raise ValueError(f"无效走法: {action}，原因：{move_reason}，当前棋盘状态：{board_state}")
-
-    return "".join(board_list)
+    # 先检查格式：过短或含非数字的走法会截断/破坏棋盘字符串
+    if not isinstance(action, str) or len(action) != 4 or not action.isdigit():
+        raise ValueError(f"无效走法: {action}，原因：走法格式错误，当前棋盘状态：{board_state}")
 
+    start = action[:2]  # 起始位置（横坐标在前，纵坐标在后）
+    end = action[2:4]   # 目标位置（横坐标在前，纵坐标在后）
+
+    i = -1 if start == "99" else _find_piece(board_state, start)
+    if i < 0:
+        raise ValueError(f"无效走法: {action}，原因：起始位置没有棋子，当前棋盘状态：{board_state}")
+
+    # 检查是否吃子（将被吃棋子的位置设为99）
+    j = _find_piece(board_state, end)
+    if j == i:
+        j = _find_piece(board_state[i + 2:], end)
+        j = j + i + 2 if j >= 0 else -1
+    if j >= 0:
+        board_state = board_state[:j] + "99" + board_state[j + 2:]
+
+    return board_state[:i] + end + board_state[i + 2:]
+
+
+def zobrist_hash(board_state):
+    """计算东萍棋盘字符串的 64 位 Zobrist 哈希（与 Board.key 一致）"""
+    return zobrist_hashes(board_state)[0]
+
+
+def zobrist_hashes(board_state):
+    """同时计算局面哈希和其左右镜像局面的哈希（与 Board.key / Board.mirror_key 一致）"""
+    key = mirror_key = 0
+    for slot in range(32):
+        sq = POS_INDEX.get(board_state[slot * 2:slot * 2 + 2], CAPTURED)
+        if sq != CAPTURED:
+            key ^= ZOBRIST[SLOT_PIECE[slot]][sq]
+            mirror_key ^= ZOBRIST_MIRROR[SLOT_PIECE[slot]][sq]
+    return key, mirror_key
 
-def board_to_matrix(board_state):
-    """将棋盘状态转为矩阵表示（可选）"""
-    matrix = np.full((10, 9), -1)  # 10行（纵坐标0-9）9列（横坐标0-8）
 
-    for i in range(0, len(board_state), 2):
-        if i + 1 >= len(board_state):
-            continue
+def mirror_board(board_state):
+    """东萍棋盘字符串左右镜像（横坐标 x -> 8-x）"""
+    return "".join([pos if pos == "99" else f"{8 - int(pos[0])}{pos[1]}"
+                    for pos in (board_state[i:i + 2] for i in range(0, len(board_state), 2))])
 
-        pos_str = board_state[i:i + 2]
-        if pos_str == "99":
-            continue
 
-        pos = int(pos_str)
-        col = pos // 10  # 横坐标（列）
-        row = pos % 10   # 纵坐标（行）
+# 同类棋子（如两个红车）在东萍字符串中的槽位分组
+_SAME_PIECE_SLOTS = [[slot for slot in range(32) if SLOT_PIECE[slot] == piece] for piece in range(14)]
 
-        # 棋子类型由索引位置决定（这里可能需要更复杂的映射逻辑）
-        piece_index = i // 2
-        matrix[row][col] = piece_index  # 简单映射，实际可能需要调整
 
+def normalize_board(board_state):
+    """同类棋子的坐标排序后重排东萍字符串，同一局面得到同一字符串（与 Zobrist 哈希的等价关系一致）"""
+    parts = [board_state[i:i + 2] for i in range(0, 64, 2)]
+    for slots in _SAME_PIECE_SLOTS:
+        for slot, pos in zip(slots, sorted(parts[slot] for slot in slots)):
+            parts[slot] = pos
+    return "".join(parts)
+
+
+def _hash_delta(board_state, action, tables):
+    """走法 action 引起的 Zobrist 哈希变化量（tables 为 ZOBRIST 或 ZOBRIST_MIRROR）"""
+    start, end = POS_INDEX[action[:2]], POS_INDEX[action[2:4]]
+    i = _find_piece(board_state, action[:2])
+    table = tables[SLOT_PIECE[i // 2]]
+    delta = table[start] ^ table[end]
+
+    j = _find_piece(board_state, action[2:4])
+    if j == i:
+        j = _find_piece(board_state[i + 2:], action[2:4])
+        j = j + i + 2 if j >= 0 else -1
+    if j >= 0:
+        delta ^= tables[SLOT_PIECE[j // 2]][end]
+    return delta
+
+
+def apply_move_with_hash(board_state, action, key):
+    """应用走法并增量更新 Zobrist 哈希，返回 (新棋盘, 新哈希)"""
+    new_state = apply_move(board_state, action)
+    return new_state, key ^ _hash_delta(board_state, action, ZOBRIST)
+
+
+def apply_move_with_hashes(board_state, action, key, mirror_key):
+    """应用走法并同时增量更新局面哈希与镜像哈希，返回 (新棋盘, 新哈希, 新镜像哈希)"""
+    new_state = apply_move(board_state, action)
+    return (new_state, key ^ _hash_delta(board_state, action, ZOBRIST),
+            mirror_key ^ _hash_delta(board_state, action, ZOBRIST_MIRROR))
+
+
+def board_to_matrix(board_state):
+    """将棋盘状态转为 10x9 矩阵（行为纵坐标 y，列为横坐标 x），值为棋子编码（颜色*7+类型），空格为 -1
+
+    批量编码见 chess_ai.utils.encoder.encode_boards。
+    """
+    matrix = np.full((10, 9), -1)
+    squares = squares_array([board_state])[0]
+    on_board = squares != CAPTURED
+    matrix[squares[on_board] % 10, squares[on_board] // 10] = SLOT_PLANES[on_board]
     return matrix
 
 
-def generate_legal_moves(board_state):
-    """优化的合法走法生成器"""
-    legal_moves = []
-    pieces = []
-
-    # 提取所有棋子位置
-    for i in range(0, len(board_state), 2):
-        pos_str = board_state[i:i + 2]
-        if pos_str != "99":
-            pieces.append(int(pos_str))
-
-    # 针对每个棋子生成可能的目标位置（减少尝试次数）
-    for start in pieces:
-        start_x, start_y = start // 10, start % 10
-
-        # 根据棋子类型生成可能移动范围（简化版）
-        possible_moves = []
-        if start_y < 9: possible_moves.append(start + 1)  # 上
-        if start_y > 0: possible_moves.append(start - 1)  # 下
-        if start_x < 8: possible_moves.append(start + 10)  # 右
-        if start_x > 0: possible_moves.append(start - 10)  # 左
-
-        # 对角线移动（士、象等）
-        if start_x > 0 and start_y < 9: possible_moves.append(start - 9)  # 左上
-        if start_x < 8 and start_y < 9: possible_moves.append(start + 11)  # 右上
-        if start_x > 0 and start_y > 0: possible_moves.append(start - 11)  # 左下
-        if start_x < 8 and start_y > 0: possible_moves.append(start + 9)  # 右下
-
-        for end in possible_moves:
-            move_str = f"{start:02d}{end:02d}"
-            try:
-                apply_move(board_state, move_str)
-                legal_moves.append(move_str)
-            except ValueError:
-                continue
-
-    return legal_moves
\ No newline at end of file
+def generate_legal_moves(board_state, side=None):
+    """按棋子类型生成合法走法
+
+    side 为 RED/BLACK 时只生成该方的走法；为 None 时返回双方各自的合法走法
+    """
+    board = Board(board_state)
+    sides = (RED, BLACK) if side is None else (side,)
+    return [f"{move:04d}" for s in sides for move in board.legal_moves(s)]
@@ -0,0 +1,293 @@
+"""chessdb.cn 查询客户端
+
+- 内存 LRU + 磁盘 SQLite 两级缓存，按 (action, FEN) 为键，带 TTL；
+  查不到走法的结果（nobestmove/unknown 等）也缓存，但 TTL 更短（负缓存）
+- 复用连接池的 requests.Session，所有请求都有超时
+- 多个线程同时查询同一个 FEN 时只发一次上游请求，其余线程等待结果
+AsyncChessDBClient 是异步服务模式下的同名接口，使用 httpx.AsyncClient，缓存逻辑相同。
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = "https://www.chessdb.cn/chessdb.php"
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'chessdb_cache.sqlite3')
+
+
+def parse_move(response_text):
+    """从 querybest/queryall 的返回中取出第一个 ICCS 走法，没有走法返回 None"""
+    if not response_text:
+        return None
+    parts = response_text.split(':')
+    if len(parts) < 2 or len(parts[1]) < 4:
+        return None
+    return parts[1][0:4]
+
+
+class ResponseCache:
+    """内存 LRU + SQLite 的两级响应缓存"""
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, ttl=7 * 24 * 3600, negative_ttl=3600, lru_size=4096):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lru_size = lru_size
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'upstream': 0, 'coalesced': 0, 'negative': 0}
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if cache_path:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+            self._db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (action TEXT, fen TEXT, response TEXT, "
+                             "expires REAL, PRIMARY KEY (action, fen))")
+            self._db.commit()
+
+    def get(self, cache_key):
+        """命中返回缓存的文本，否则返回 None"""
+        text = self.get_memory(cache_key)
+        return text if text is not None else self.get_disk(cache_key)
+
+    def get_memory(self, cache_key):
+        """只查内存 LRU，不做磁盘 I/O（可以直接在事件循环中调用）"""
+        with self._lock:
+            cached = self._lru.get(cache_key)
+            if cached is not None and cached[0] > time.time():
+                self._lru.move_to_end(cache_key)
+                self.stats['memory_hits'] += 1
+                return cached[1]
+        return None
+
+    def get_disk(self, cache_key):
+        """查 SQLite，命中时放入内存 LRU"""
+        row = self._disk_get(cache_key, time.time())
+        if row is None:
+            return None
+        self.stats['disk_hits'] += 1
+        self._remember(cache_key, row[0], row[1])
+        return row[1]
+
+    def put(self, cache_key, text):
+        """保存上游返回；没有走法的结果使用较短的 TTL"""
+        self.persist(cache_key, self.remember(cache_key, text), text)
+
+    def remember(self, cache_key, text):
+        """只写入内存 LRU，返回过期时间"""
+        has_move = parse_move(text) is not None
+        if not has_move:
+            self.stats['negative'] += 1
+        expires = time.time() + (self.ttl if has_move else self.negative_ttl)
+        self._remember(cache_key, expires, text)
+        return expires
+
+    def persist(self, cache_key, expires, text):
+        """写入 SQLite"""
+        self._disk_put(cache_key, expires, text)
+
+    def _remember(self, cache_key, expires, text):
+        with self._lock:
+            self._lru[cache_key] = (expires, text)
+            self._lru.move_to_end(cache_key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _disk_get(self, cache_key, now):
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute("SELECT expires, response FROM cache WHERE action=? AND fen=?",
+                                   cache_key).fetchone()
+        if row is None or row[0] <= now:
+            return None
+        return row
+
+    def _disk_put(self, cache_key, expires, text):
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute("INSERT OR REPLACE INTO cache (action, fen, response, expires) VALUES (?, ?, ?, ?)",
+                             cache_key + (text, expires))
+            self._db.commit()
+
+    def iter_cached(self, action=None):
+        """遍历磁盘缓存中未过期的 (action, fen, response)"""
+        if self._db is None:
+            return
+        with self._db_lock:
+            sql = "SELECT action, fen, response FROM cache WHERE expires > ?"
+            args = (time.time(),)
+            if action:
+                sql += " AND action = ?"
+                args += (action,)
+            rows = self._db.execute(sql, args).fetchall()
+        yield from rows
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+
+
+class _Pending:
+    """正在进行中的上游请求，等待者共享结果"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ChessDBClient:
+    def __init__(self, api_url=API_URL, cache_path=DEFAULT_CACHE_PATH, ttl=7 * 24 * 3600, negative_ttl=3600,
+                 lru_size=4096, timeout=(3.05, 10), pool_size=16):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.cache = ResponseCache(cache_path, ttl, negative_ttl, lru_size)
+        self.stats = self.cache.stats
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def query(self, action, fen):
+        """查询 chessdb，返回原始文本（命中缓存时不访问网络）"""
+        cache_key = (action, fen)
+        text = self.cache.get(cache_key)
+        if text is not None:
+            return text
+
+        # 合并并发请求：同一个键只有第一个线程访问上游
+        with self._lock:
+            pending = self._pending.get(cache_key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[cache_key] = _Pending()
+            else:
+                self.stats['coalesced'] += 1
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+
+        try:
+            text = pending.result = self._fetch(action, fen)
+            self.cache.put(cache_key, text)
+            return text
+        except BaseException as e:
+            # 任何错误（包括缓存写入的 sqlite3.Error）都交给等待者，不能让它们当作查不到
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[cache_key]
+            pending.event.set()
+
+    def best_move(self, fen):
+        """先 querybest，查不到再 queryall，返回 (ICCS 走法或 None, 原始文本)"""
+        text = self.query('querybest', fen)
+        move = parse_move(text)
+        if move is None:
+            text = self.query('queryall', fen)
+            move = parse_move(text)
+        return move, text
+
+    def _fetch(self, action, fen):
+        self.stats['upstream'] += 1
+        response = self.session.get(self.api_url, params={'action': action, 'board': fen}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text.strip()
+
+    def iter_cached(self, action=None):
+        """遍历磁盘缓存中未过期的 (action, fen, response)"""
+        return self.cache.iter_cached(action)
+
+    def close(self):
+        self.session.close()
+        self.cache.close()
+
+
+class AsyncChessDBClient:
+    """异步版本：httpx.AsyncClient 连接池，同一事件循环内相同键的并发查询共享一个 Task
+
+    事件循环中只查内存 LRU；SQLite 的读写用 asyncio.to_thread 放到线程池，不阻塞事件循环。
+    网络错误抛出 httpx.HTTPError。
+    """
+
+    def __init__(self, api_url=API_URL, cache_path=DEFAULT_CACHE_PATH, ttl=7 * 24 * 3600, negative_ttl=3600,
+                 lru_size=4096, timeout=(3.05, 10), pool_size=16):
+        import httpx
+
+        self.api_url = api_url
+        self.cache = ResponseCache(cache_path, ttl, negative_ttl, lru_size)
+        self.stats = self.cache.stats
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+        self._pending = {}
+
+    async def query(self, action, fen):
+        cache_key = (action, fen)
+        text = self.cache.get_memory(cache_key)
+        if text is not None:
+            return text
+
+        # 上游查询放在独立的 Task 中，每个调用方 await shield(task)：
+        # 某个调用方被取消只影响它自己，查询继续进行，其他合并的调用方照常拿到结果
+        task = self._pending.get(cache_key)
+        if task is None:
+            task = self._pending[cache_key] = asyncio.ensure_future(self._load(action, fen, cache_key))
+            task.add_done_callback(lambda done: self._finish(cache_key, done))
+        else:
+            self.stats['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    async def _load(self, action, fen, cache_key):
+        text = await asyncio.to_thread(self.cache.get_disk, cache_key)
+        if text is not None:
+            return text
+        text = await self._fetch(action, fen)
+        expires = self.cache.remember(cache_key, text)
+        await asyncio.to_thread(self.cache.persist, cache_key, expires, text)
+        return text
+
+    def _finish(self, cache_key, task):
+        if self._pending.get(cache_key) is task:
+            del self._pending[cache_key]
+        # 所有调用方都已取消时没人取结果，避免 “Task exception was never retrieved” 警告
+        if not task.cancelled():
+            task.exception()
+
+    async def best_move(self, fen):
+        text = await self.query('querybest', fen)
+        move = parse_move(text)
+        if move is None:
+            text = await self.query('queryall', fen)
+            move = parse_move(text)
+        return move, text
+
+    async def _fetch(self, action, fen):
+        self.stats['upstream'] += 1
+        response = await self.client.get(self.api_url, params={'action': action, 'board': fen})
+        response.raise_for_status()
+        return response.text.strip()
+
+    def iter_cached(self, action=None):
+        return self.cache.iter_cached(action)
+
+    async def close(self):
+        for task in list(self._pending.values()):
+            task.cancel()
+        await self.client.aclose()
+        self.cache.close()
@@ -3,14 +3,21 @@ import os
 import numpy as np
 import pickle
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 
-# 添加项目根目录到系统路径
+# 添加项目根目录（flask 目录）到系统路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.abspath(os.path.join(current_dir, '..'))
+project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 sys.path.insert(0, project_root)
 
-from board_utils import initial_board, apply_move
+from chess_ai.utils.board_utils import initial_board, apply_move, apply_move_with_hashes, zobrist_hashes
+from chess_ai.model.chess_model import ChessModel, game_outcome
+
+# 流式训练样本：局面 Zobrist 哈希、东萍走法 int('8987')、红方得分
+SAMPLE_DTYPE = np.dtype([('key', '<u8'), ('move', '<u2'), ('outcome', '<f4')])
 
 
 test_file = 'wanzhen.json'
@@ -18,70 +25,251 @@ test_file = 'wanzhen.json'
 def get_test_file():
     return  test_file
 
-def load_and_process_data(json_file_path):
-    """加载并预处理棋局数据"""
-    # 加载数据
-    try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            games = json.load(f)
-        print(f"已加载 {len(games)} 场棋局数据，文件路径：{json_file_path}")
-    except json.JSONDecodeError as e:
-        print(f"解析 JSON 文件时出错，文件路径：{json_file_path}，错误信息：{e}")
-        return []
 
-    processed = []
-    invalid_move_details = []  # 用于记录无效走法的详细信息
+def iter_games(json_file_path, read_size=1 << 20):
+    """增量解析棋局文件，逐局产出，不一次性读入整个文件
 
-    for game in tqdm(games, desc="处理棋局"):
-        movelist = game['movelist']
-        result = game.get('result', 'unknown')  # 假设结果字段存在，如果没有则默认为未知
+    支持 JSON 数组（东萍导出的格式）和每行一局的 JSON Lines。
+    """
+    decoder = json.JSONDecoder()
+    with open(json_file_path, 'r', encoding='utf-8') as f:
+        buf = f.read(read_size)
+        pos = 0
+        eof = not buf
 
-        # 创建初始棋盘
-        board_state = initial_board()
-        board_history = [board_state]
-        moves = []
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(read_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        skip(' \t\r\n')
+        in_array = pos < len(buf) and buf[pos] == '['
+        if in_array:
+            pos += 1
+
+        while True:
+            skip(' \t\r\n,')
+            if pos >= len(buf) or (in_array and buf[pos] == ']'):
+                return
+            while True:
+                try:
+                    game, end = decoder.raw_decode(buf, pos)
+                    break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+            pos = end
+            yield game
+
+
+def _error_reason(error):
+    """从 “无效走法: X，原因：Y，...” 中取出 Y；信息格式不同时返回完整信息"""
+    message = str(error)
+    for part in message.split('，'):
+        if part.startswith('原因：'):
+            return part[len('原因：'):]
+    return message
 
-        # 将走法字符串转换为每四个字符一组的列表
-        game_moves = [movelist[i:i+4] for i in range(0, len(movelist), 4)]
 
-        for move in game_moves:
+def _invalid_record(game_id, ply, move, board_state, error):
+    """无效走法记录（局号、步数、走法、当前棋盘、原因）"""
+    return game_id, ply, move, board_state, _error_reason(error)
+
+
+def replay_game(game_id, game):
+    """重放一局棋，返回 (处理结果, 无效走法记录列表)"""
+    movelist = game['movelist']
+    result = game.get('result', 'unknown')  # 假设结果字段存在，如果没有则默认为未知
+
+    # 创建初始棋盘
+    board_state = initial_board()
+    board_history = [board_state]
+    moves = []
+    invalid = []
+
+    # 将走法字符串转换为每四个字符一组的列表
+    for ply, i in enumerate(range(0, len(movelist), 4)):
+        move = movelist[i:i + 4]
+        try:
+            # 应用走法到棋盘
+            board_state = apply_move(board_state, move)
+            board_history.append(board_state)
+            moves.append(move)
+        except ValueError as e:
+            invalid.append(_invalid_record(game_id, ply, move, board_state, e))
+
+    processed = {
+        'game_id': game_id,
+        'result': result,
+        'board_states': board_history,
+        'moves': moves
+    }
+    return processed, invalid
+
+
+def _replay_chunk(chunk):
+    """子进程任务：重放一批 (game_id, game)"""
+    results = [replay_game(game_id, game) for game_id, game in chunk]
+    return [processed for processed, _ in results], [r for _, invalid in results for r in invalid]
+
+
+def _sample_chunk(chunk):
+    """子进程任务：重放一批棋局，直接产出训练样本数组，不保留棋盘历史"""
+    sampler = ChessModel()
+    keys, moves, outcomes, invalid = [], [], [], []
+    for game_id, game in chunk:
+        movelist = game['movelist']
+        outcome = game_outcome(game.get('result', 'unknown'))
+        board_state = initial_board()
+        key, mirror_key = zobrist_hashes(board_state)
+        for ply, i in enumerate(range(0, len(movelist), 4)):
+            move = movelist[i:i + 4]
             try:
-                # 应用走法到棋盘
-                new_board = apply_move(board_state, move)
-                board_history.append(new_board)
-                moves.append(move)
-                board_state = new_board
+                new_state, new_key, new_mirror_key = apply_move_with_hashes(board_state, move, key, mirror_key)
             except ValueError as e:
-                # 记录无效走法的详细信息
-                invalid_move_details.append({
-                    'move': move,
-                    'movelist': movelist,  # 记录整个 movelist
-                    'board_state': board_state,
-                    'error': str(e)
-                })
-                print(f"跳过无效走法 {move}，原因：{e}")
+                invalid.append(_invalid_record(game_id, ply, move, board_state, e))
                 continue
+            sample_key, sample_move = sampler.canonical_sample(board_state, move, key, mirror_key)
+            keys.append(sample_key)
+            moves.append(int(sample_move))
+            outcomes.append(outcome)
+            board_state, key, mirror_key = new_state, new_key, new_mirror_key
+
+    samples = np.empty(len(keys), dtype=SAMPLE_DTYPE)
+    samples['key'] = keys
+    samples['move'] = moves
+    samples['outcome'] = outcomes
+    return samples, invalid
+
 
-        processed.append({
-            'game_id': len(processed),  # 临时游戏ID
-            'result': result,
-            'board_states': board_history,
-            'moves': moves
-        })
+def _chunks(json_file_path, chunk_size):
+    chunk = []
+    for game_id, game in enumerate(iter_games(json_file_path)):
+        chunk.append((game_id, game))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _map_chunks(json_file_path, task, workers, chunk_size, invalid_moves_path, stats):
+    """分块并行执行 task，按原始顺序产出 (分块结果, 局数)
+
+    workers 为 1 时在当前进程内执行；在途任务数有上限，内存占用不随语料规模增长。
+    无效走法以 TSV 写入 invalid_moves_path；stats 字典会被填入吞吐量统计。
+    """
+    workers = workers or os.cpu_count() or 1
+    invalid_file = open(invalid_moves_path, 'w', encoding='utf-8') if invalid_moves_path else None
+    if invalid_file:
+        invalid_file.write("game_id\tply\tmove\tboard_state\treason\n")
+    stats.update(games=0, moves=0, invalid=0)
+    started = time.perf_counter()
+
+    def consume(chunk, future_result):
+        result, invalid = future_result
+        stats['games'] += len(chunk)
+        stats['moves'] += sum((len(game['movelist']) + 3) // 4 for _, game in chunk) - len(invalid)
+        stats['invalid'] += len(invalid)
+        if invalid_file:
+            for record in invalid:
+                invalid_file.write("\t".join(map(str, record)) + "\n")
+        return result
+
+    try:
+        if workers == 1:
+            for chunk in _chunks(json_file_path, chunk_size):
+                yield consume(chunk, task(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                for chunk in _chunks(json_file_path, chunk_size):
+                    pending.append((chunk, executor.submit(task, chunk)))
+                    if len(pending) >= workers * 2:
+                        chunk, future = pending.popleft()
+                        yield consume(chunk, future.result())
+                while pending:
+                    chunk, future = pending.popleft()
+                    yield consume(chunk, future.result())
+    finally:
+        if invalid_file:
+            invalid_file.close()
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        stats.update(seconds=elapsed, games_per_sec=stats['games'] / elapsed,
+                     moves_per_sec=stats['moves'] / elapsed)
+
+
+def iter_processed_games(json_file_path, workers=None, chunk_size=256, invalid_moves_path=None, stats=None):
+    """分块并行重放棋局，按原始顺序逐局产出处理结果（含完整棋盘历史）"""
+    stats = stats if stats is not None else {}
+    for games in _map_chunks(json_file_path, _replay_chunk, workers, chunk_size, invalid_moves_path, stats):
+        yield from games
+
+
+def iter_training_samples(json_file_path, workers=None, chunk_size=256, invalid_moves_path=None, stats=None,
+                          checkpoint_dir=None):
+    """流式产出 (局面键, 走法, 红方得分) 训练样本，峰值内存与语料规模无关
+
+    指定 checkpoint_dir 时，每个分块的样本另存为 samples_XXXXXX.npy，之后可用 iter_checkpoint_samples 重放。
+    """
+    stats = stats if stats is not None else {}
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    chunks = _map_chunks(json_file_path, _sample_chunk, workers, chunk_size, invalid_moves_path, stats)
+    for index, samples in enumerate(chunks):
+        if checkpoint_dir:
+            np.save(os.path.join(checkpoint_dir, f"samples_{index:06d}.npy"), samples)
+        yield from _iter_sample_array(samples)
+
+
+def iter_checkpoint_samples(checkpoint_dir):
+    """按顺序重放 iter_training_samples 保存的样本分块（mmap 读取）"""
+    for name in sorted(os.listdir(checkpoint_dir)):
+        if name.startswith('samples_') and name.endswith('.npy'):
+            yield from _iter_sample_array(np.load(os.path.join(checkpoint_dir, name), mmap_mode='r'))
+
+
+def _iter_sample_array(samples):
+    for key, move, outcome in zip(samples['key'].tolist(), samples['move'].tolist(), samples['outcome'].tolist()):
+        yield key, f"{move:04d}", outcome
+
+
+def load_and_process_data(json_file_path, workers=None, chunk_size=256):
+    """加载并预处理棋局数据"""
+    data_dir = os.path.dirname(json_file_path)
+    invalid_moves_path = os.path.join(data_dir, 'invalid_moves.tsv')
+    stats = {}
+
+    try:
+        processed = list(tqdm(iter_processed_games(json_file_path, workers, chunk_size, invalid_moves_path, stats),
+                              desc="处理棋局"))
+    except json.JSONDecodeError as e:
+        print(f"解析 JSON 文件时出错，文件路径：{json_file_path}，错误信息：{e}")
+        return []
+
+    print(f"已处理 {stats['games']} 场棋局（{stats['moves']} 步），文件路径：{json_file_path}")
+    print(f"吞吐量：{stats['games_per_sec']:.1f} 局/秒，{stats['moves_per_sec']:.1f} 步/秒")
 
     # 保存处理后的数据
-    processed_data_path = os.path.join(os.path.dirname(json_file_path), 'processed_data.pkl')
+    processed_data_path = os.path.join(data_dir, 'processed_data.pkl')
     with open(processed_data_path, 'wb') as f:
         pickle.dump(processed, f)
 
     print(f"处理后的数据已保存，文件路径：{processed_data_path}")
-
-    # 保存无效走法的详细信息
-    invalid_moves_path = os.path.join(os.path.dirname(json_file_path), 'invalid_moves.json')
-    with open(invalid_moves_path, 'w', encoding='utf-8') as f:
-        json.dump(invalid_move_details, f, ensure_ascii=False, indent=4)
-
-    print(f"无效走法的详细信息已保存，文件路径：{invalid_moves_path}")
+    print(f"跳过 {stats['invalid']} 个无效走法，详细信息已保存，文件路径：{invalid_moves_path}")
     return processed
 
 
@@ -89,4 +277,4 @@ if __name__ == "__main__":
     current_dir = os.path.dirname(os.path.abspath(__file__))
     data_dir = os.path.join(current_dir, '..', 'data')
     json_file_path = os.path.join(data_dir, 'wanzhen.json')
-    load_and_process_data(json_file_path)
\ No newline at end of file
+    load_and_process_data(json_file_path)
@@ -0,0 +1,216 @@
+"""可 mmap 的训练数据集
+
+目录布局：
+    meta.json                 版本、总局面数、总局数、各分片的局面数和局数
+    shard_XXXXXX/positions.npy  (N, 32) uint8   走子前的局面，每个槽位一个字节（x*10+y，被吃为 99）
+    shard_XXXXXX/moves.npy      (N,) uint16     东萍走法 int('8987')
+    shard_XXXXXX/results.npy    (N,) int8       红方结果：1 胜 / 0 和 / -1 负 / -2 未知（UNKNOWN_RESULT）
+    shard_XXXXXX/plies.npy      (N,) uint16     该步在原棋谱中的步数（偶数为红方走）
+    shard_XXXXXX/games.npy      (G + 1,) int64  每局在分片内的起始行
+    shard_XXXXXX/game_ids.npy   (G,) int64      原始棋局编号
+读取时所有数组都用 mmap 打开，随机访问一个局面是 O(1)，打开数据集不需要读入数据。
+用法：python -m chess_ai.utils.dataset_store <棋局.json> <数据集目录> [--workers N]
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chess_ai.utils.encoder import squares_array, encode_boards
+from chess_ai.utils.data_loader import replay_game, _map_chunks
+
+VERSION = 2  # 版本 1 的 results 把未知结果记为 0，与和棋无法区分
+SHARD_POSITIONS = 1 << 20
+ARRAYS = ('positions', 'moves', 'results', 'plies')
+UNKNOWN_RESULT = -2
+KNOWN_RESULTS = {'red_win': 1, 'draw': 0, 'black_win': -1}
+
+
+def result_code(result):
+    """棋谱结果 -> results 数组中的值；不是 red_win / black_win / draw 的都记为 UNKNOWN_RESULT"""
+    return KNOWN_RESULTS.get(result, UNKNOWN_RESULT)
+
+
+def _dataset_chunk(chunk):
+    """子进程任务：重放一批棋局，返回 (数组字典, 无效走法记录)"""
+    positions, moves, results, plies, lengths, game_ids, invalid = [], [], [], [], [], [], []
+    for game_id, game in chunk:
+        processed, bad = replay_game(game_id, game)
+        invalid.extend(bad)
+        n = len(processed['moves'])
+        skipped = {record[1] for record in bad}
+        positions.append(squares_array(processed['board_states'][:-1]) if n else np.zeros((0, 32), np.uint8))
+        moves.append(np.array([int(move) for move in processed['moves']], dtype=np.uint16))
+        results.append(np.full(n, result_code(processed['result']), dtype=np.int8))
+        plies.append(np.array([ply for ply in range(n + len(skipped)) if ply not in skipped], dtype=np.uint16))
+        lengths.append(n)
+        game_ids.append(game_id)
+    arrays = {
+        'positions': np.concatenate(positions) if positions else np.zeros((0, 32), np.uint8),
+        'moves': np.concatenate(moves) if moves else np.zeros(0, np.uint16),
+        'results': np.concatenate(results) if results else np.zeros(0, np.int8),
+        'plies': np.concatenate(plies) if plies else np.zeros(0, np.uint16),
+        'lengths': np.array(lengths, dtype=np.int64),
+        'game_ids': np.array(game_ids, dtype=np.int64),
+    }
+    return arrays, invalid
+
+
+class DatasetWriter:
+    """按局追加数据，攒够 shard_positions 个局面写出一个分片"""
+
+    def __init__(self, directory, shard_positions=SHARD_POSITIONS):
+        self.directory = directory
+        self.shard_positions = shard_positions
+        self.shards = []
+        self._pending = []
+        self._pending_positions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def add_chunk(self, arrays):
+        """追加 _dataset_chunk 产出的一批棋局"""
+        self._pending.append(arrays)
+        self._pending_positions += len(arrays['moves'])
+        if self._pending_positions >= self.shard_positions:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        name = f"shard_{len(self.shards):06d}"
+        shard_dir = os.path.join(self.directory, name)
+        os.makedirs(shard_dir, exist_ok=True)
+        for field in ARRAYS + ('game_ids',):
+            np.save(os.path.join(shard_dir, f"{field}.npy"), np.concatenate([a[field] for a in self._pending]))
+        lengths = np.concatenate([a['lengths'] for a in self._pending])
+        np.save(os.path.join(shard_dir, 'games.npy'), np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64))
+        self.shards.append({'name': name, 'positions': int(lengths.sum()), 'games': len(lengths)})
+        self._pending, self._pending_positions = [], 0
+
+    def close(self):
+        self._flush()
+        meta = {
+            'version': VERSION,
+            'positions': sum(shard['positions'] for shard in self.shards),
+            'games': sum(shard['games'] for shard in self.shards),
+            'shards': self.shards,
+        }
+        with open(os.path.join(self.directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+
+def build_dataset(json_file_path, directory, workers=None, chunk_size=256, shard_positions=SHARD_POSITIONS,
+                  invalid_moves_path=None):
+    """并行重放棋局文件，写成 mmap 数据集，返回 meta 字典"""
+    writer = DatasetWriter(directory, shard_positions)
+    stats = {}
+    for arrays in _map_chunks(json_file_path, _dataset_chunk, workers, chunk_size, invalid_moves_path, stats):
+        writer.add_chunk(arrays)
+    meta = writer.close()
+    print(f"数据集已保存到 {directory}：{meta['games']} 局，{meta['positions']} 个局面，"
+          f"{len(meta['shards'])} 个分片（{stats['games_per_sec']:.1f} 局/秒）")
+    return meta
+
+
+class Dataset:
+    """mmap 方式读取的数据集"""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != VERSION:
+            raise ValueError(f"不支持的数据集版本：{self.meta['version']}，请用 dataset_store 重新生成")
+        self.directory = directory
+        self.shards = []
+        for shard in self.meta['shards']:
+            shard_dir = os.path.join(directory, shard['name'])
+            self.shards.append({field: np.load(os.path.join(shard_dir, f"{field}.npy"), mmap_mode='r')
+                                for field in ARRAYS + ('games', 'game_ids')})
+        # 各分片第一个局面 / 第一局的全局编号
+        self.position_starts = np.cumsum([0] + [s['positions'] for s in self.meta['shards']])
+        self.game_starts = np.cumsum([0] + [s['games'] for s in self.meta['shards']])
+
+    def __len__(self):
+        return int(self.position_starts[-1])
+
+    @property
+    def num_games(self):
+        return int(self.game_starts[-1])
+
+    def _locate(self, starts, index):
+        shard = int(np.searchsorted(starts, index, 'right')) - 1
+        return shard, index - int(starts[shard])
+
+    def __getitem__(self, index):
+        """单个局面：(槽位数组, 走法, 红方结果, 走棋方)"""
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        shard, row = self._locate(self.position_starts, index)
+        arrays = self.shards[shard]
+        return arrays['positions'][row], int(arrays['moves'][row]), int(arrays['results'][row]), \
+            int(arrays['plies'][row]) % 2
+
+    def game(self, index):
+        """第 index 局的全部局面（各数组的 mmap 切片，不复制）"""
+        shard, g = self._locate(self.game_starts, index)
+        arrays = self.shards[shard]
+        start, stop = int(arrays['games'][g]), int(arrays['games'][g + 1])
+        batch = {field: arrays[field][start:stop] for field in ARRAYS}
+        batch['game_id'] = int(arrays['game_ids'][g])
+        return batch
+
+    def batch(self, indices):
+        """按全局下标取一批局面，返回 positions/moves/results/sides 数组（只复制这一批）"""
+        indices = np.asarray(indices, dtype=np.int64)
+        shards = np.searchsorted(self.position_starts, indices, 'right') - 1
+        out = {
+            'positions': np.empty((len(indices), 32), dtype=np.uint8),
+            'moves': np.empty(len(indices), dtype=np.uint16),
+            'results': np.empty(len(indices), dtype=np.int8),
+            'sides': np.empty(len(indices), dtype=np.uint8),
+        }
+        for shard in np.unique(shards):
+            mask = shards == shard
+            rows = indices[mask] - self.position_starts[shard]
+            arrays = self.shards[shard]
+            out['positions'][mask] = arrays['positions'][rows]
+            out['moves'][mask] = arrays['moves'][rows]
+            out['results'][mask] = arrays['results'][rows]
+            out['sides'][mask] = arrays['plies'][rows] % 2
+        return out
+
+    def sample(self, batch_size, rng=None):
+        """有放回地随机抽取一批局面"""
+        rng = rng or np.random.default_rng()
+        return self.batch(rng.integers(0, len(self), batch_size))
+
+    def iter_batches(self, batch_size, shuffle=True, seed=None, worker=0, num_workers=1, drop_last=False):
+        """遍历一轮；多个 worker 使用相同的 seed 时各自取打乱后顺序中的第 worker::num_workers 个局面，互不重叠"""
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        order = order[worker::num_workers]
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            if drop_last and len(indices) < batch_size:
+                break
+            yield self.batch(np.sort(indices) if not shuffle else indices)
+
+    @staticmethod
+    def encode(batch, out=None):
+        """把一批局面编码为 (N, 15, 10, 9) 平面张量"""
+        return encode_boards(batch['positions'], batch['sides'], out=out)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="把棋局文件转换为 mmap 数据集")
+    parser.add_argument('json_file', help="棋局文件（JSON 数组或 JSON Lines）")
+    parser.add_argument('directory', help="输出目录")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="并行重放的进程数")
+    parser.add_argument('--shard-positions', type=int, default=SHARD_POSITIONS, help="每个分片的局面数")
+    args = parser.parse_args()
+    build_dataset(args.json_file, args.directory, args.workers, shard_positions=args.shard_positions,
+                  invalid_moves_path=os.path.join(args.directory, 'invalid_moves.tsv'))
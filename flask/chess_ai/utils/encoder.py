@@ -0,0 +1,80 @@
+"""局面批量编码为 NumPy 张量
+
+输出形状 (N, 15, 10, 9)：
+    平面 0-13   棋子编码（颜色*7+类型，见 board_engine）所在的格子为 1，行为 y（黑方在上），列为 x
+    平面 14     走棋方：黑方走棋时全为 1，红方走棋时全为 0
+输入可以是东萍棋盘字符串、Board 对象，或 (N, 32) 的格子数组（x*10+y，被吃为 99）。
+整批一次向量化完成；可以写入预先分配的数组或 np.lib.format.open_memmap 打开的 .npy 文件。
+"""
+import numpy as np
+
+from chess_ai.utils.board_engine import Board, CAPTURED, SLOT_PIECE
+
+NUM_PLANES = 15
+SIDE_PLANE = 14
+SLOT_PLANES = np.array(SLOT_PIECE, dtype=np.intp)
+
+
+def squares_array(boards):
+    """批量转为 (N, 32) uint8 格子数组（x*10+y，被吃为 99）"""
+    if isinstance(boards, np.ndarray):
+        return boards.astype(np.uint8, copy=False).reshape(-1, 32)
+    boards = list(boards)
+    if boards and isinstance(boards[0], Board):
+        return np.array([board.squares for board in boards], dtype=np.uint8).reshape(-1, 32)
+    # 东萍字符串：整批拼成一个字节串，两位数字一组解析
+    digits = np.frombuffer("".join(boards).encode('ascii'), dtype=np.uint8).reshape(-1, 32, 2) - ord('0')
+    return digits[:, :, 0] * 10 + digits[:, :, 1]
+
+
+def sides_array(boards, sides, n):
+    """走棋方数组：sides 为单个值、序列，或为 None 时取 Board 对象的走棋方（字符串缺省红方）"""
+    if sides is None:
+        if n and isinstance(boards, (list, tuple)) and isinstance(boards[0], Board):
+            return np.array([board.side for board in boards], dtype=np.uint8)
+        return np.zeros(n, dtype=np.uint8)
+    if np.isscalar(sides):
+        return np.full(n, sides, dtype=np.uint8)
+    return np.asarray(sides, dtype=np.uint8)
+
+
+def encode_boards(boards, sides=None, out=None, dtype=np.uint8):
+    """把一批局面编码为 (N, 15, 10, 9) 平面张量；out 给出时写入其中（需已清零或由本函数清零）"""
+    if not isinstance(boards, np.ndarray):
+        boards = list(boards)
+    squares = squares_array(boards)
+    n = len(squares)
+    if out is None:
+        out = np.zeros((n, NUM_PLANES, 10, 9), dtype=dtype)
+    else:
+        if out.shape != (n, NUM_PLANES, 10, 9):
+            raise ValueError(f"输出数组形状应为 {(n, NUM_PLANES, 10, 9)}，实际为 {out.shape}")
+        out[...] = 0
+
+    rows, slots = np.nonzero(squares != CAPTURED)
+    sq = squares[rows, slots]
+    out[rows, SLOT_PLANES[slots], sq % 10, sq // 10] = 1
+    out[:, SIDE_PLANE] = sides_array(boards, sides, n)[:, None, None]
+    return out
+
+
+def encode_to_npy(filename, boards, sides=None, chunk_size=65536, dtype=np.uint8):
+    """分块编码并写入内存映射的 .npy 文件，内存占用与 chunk_size 成正比，返回映射数组"""
+    if not isinstance(boards, np.ndarray):
+        boards = list(boards)
+    n = len(boards)
+    side_values = sides_array(boards, sides, n)
+    out = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=(n, NUM_PLANES, 10, 9))
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        encode_boards(boards[start:stop], side_values[start:stop], out=out[start:stop], dtype=dtype)
+    out.flush()
+    return out
+
+
+def planes_to_matrix(planes):
+    """(…, 15, 10, 9) 平面张量还原为 (…, 10, 9) 的棋子编码矩阵，空格为 -1"""
+    pieces = planes[..., :SIDE_PLANE, :, :]
+    matrix = np.argmax(pieces, axis=-3).astype(np.int8)
+    matrix[pieces.max(axis=-3) == 0] = -1
+    return matrix
@@ -0,0 +1,284 @@
+"""请求耗时分解与 Prometheus 指标
+
+span(stage)：计时一个阶段，写入 chess_stage_seconds 直方图，同时记入当前请求的耗时分解（响应头 Server-Timing）。
+计数器 / 直方图在进程内累计，render() 输出 Prometheus 文本格式，install_flask(app) 挂上 /metrics 路由和请求计时。
+慢请求采样：设置环境变量 CHESS_PROFILE_SLOW_MS 后，请求期间每隔几毫秒采样一次处理线程的调用栈，
+耗时超过阈值的请求把栈写成 CHESS_PROFILE_DIR（缺省 ./profiles）下的 .folded 文件，
+可直接交给 flamegraph.pl 或 speedscope 生成火焰图。
+"""
+import collections
+import contextvars
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in key) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """单调递增计数器"""
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self.values.items()]
+
+
+class Histogram:
+    """累积分桶直方图（桶上界单位为秒）"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.values = {}  # 标签 -> [各桶计数..., 总和, 次数]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            row = self.values.get(key)
+            if row is None:
+                row = self.values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            rows = [(key, list(row)) for key, row in self.values.items()]
+        out = []
+        for key, row in rows:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                out.append((f"{self.name}_bucket", key + (('le', repr(bound)),), cumulative))
+            out.append((f"{self.name}_bucket", key + (('le', '+Inf'),), row[-1]))
+            out.append((f"{self.name}_sum", key, row[-2]))
+            out.append((f"{self.name}_count", key, row[-1]))
+        return out
+
+
+class Collector:
+    """导出时才取值的指标（如 chessdb 客户端已有的统计字典）：func 返回 {标签字典的 key: 值}"""
+
+    def __init__(self, name, kind, help_text, func):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.func = func
+
+    def samples(self):
+        return [(self.name, key, value) for key, value in self.func().items()]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name, factory):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = factory()
+            return metric
+
+    def counter(self, name, help_text):
+        return self._get(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._get(name, lambda: Histogram(name, help_text, buckets))
+
+    def collect(self, name, kind, help_text, func):
+        """注册（或替换）按需取值的指标"""
+        with self._lock:
+            self.metrics[name] = Collector(name, kind, help_text, func)
+
+    def render(self):
+        """Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.histogram('chess_request_seconds', "请求处理耗时（秒），按路由")
+REQUESTS = REGISTRY.counter('chess_requests_total', "请求数，按路由和状态码")
+STAGE_SECONDS = REGISTRY.histogram('chess_stage_seconds', "各处理阶段耗时（秒）")
+BOOK_HITS = REGISTRY.counter('chess_book_hits_total', "开局库 / 统计模型命中次数，按来源")
+FALLBACKS = REGISTRY.counter('chess_fallbacks_total', "统计模型没有记录、回退到搜索的次数")
+UPSTREAM_MISSES = REGISTRY.counter('chess_upstream_misses_total', "chessdb 没有给出走法的次数")
+
+render = REGISTRY.render
+
+# 当前请求的阶段耗时列表 [(阶段, 秒)]，不在请求中时为 None
+_trace = contextvars.ContextVar('chess_trace', default=None)
+
+
+@contextmanager
+def span(stage):
+    """计时一个阶段"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((stage, elapsed))
+
+
+def start_trace():
+    """开始记录当前请求的耗时分解，返回阶段列表"""
+    trace = []
+    _trace.set(trace)
+    return trace
+
+
+def server_timing(trace, total=None):
+    """阶段列表转为 Server-Timing 响应头（毫秒）"""
+    parts = [f"{re.sub(r'[^A-Za-z0-9_-]', '_', stage)};dur={elapsed * 1000:.2f}" for stage, elapsed in trace]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class SlowRequestProfiler:
+    """采样式剖析：只采样正在处理请求的线程，慢请求的栈写成 folded 格式"""
+
+    def __init__(self, threshold, directory, interval=0.005):
+        self.threshold = threshold
+        self.directory = directory
+        self.interval = interval
+        self.active = {}  # 线程 id -> collections.Counter(折叠栈)
+        self.dumped = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        threading.Thread(target=self._run, name='slow-request-profiler', daemon=True).start()
+
+    def begin(self):
+        ident = threading.get_ident()
+        with self._lock:
+            self.active[ident] = collections.Counter()
+        return ident
+
+    def end(self, ident, elapsed, label):
+        """请求结束：超过阈值时写出栈，返回文件名（未写出返回 None）"""
+        with self._lock:
+            stacks = self.active.pop(ident, None)
+        if not stacks or elapsed < self.threshold:
+            return None
+        name = f"{re.sub(r'[^A-Za-z0-9_-]+', '_', label).strip('_') or 'request'}-{int(time.time() * 1000)}" \
+               f"-{int(elapsed * 1000)}ms.folded"
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self.dumped += 1
+        print(f"慢请求 {label} 耗时 {elapsed * 1000:.0f} 毫秒，调用栈已写入 {path}")
+        return path
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                idents = list(self.active)
+            if not idents:
+                continue
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                with self._lock:
+                    counts = self.active.get(ident)
+                    if counts is not None:
+                        counts[";".join(reversed(stack))] += 1
+
+
+def profiler_from_env():
+    """CHESS_PROFILE_SLOW_MS 设置时创建慢请求剖析器，否则返回 None"""
+    threshold = os.environ.get('CHESS_PROFILE_SLOW_MS')
+    if not threshold:
+        return None
+    return SlowRequestProfiler(float(threshold) / 1000, os.environ.get('CHESS_PROFILE_DIR', './profiles'))
+
+
+def install_flask(app, profiler=None):
+    """给 Flask 应用加上请求计时、Server-Timing 响应头和 /metrics 路由"""
+    from flask import Response, g, request
+
+    profiler = profiler or profiler_from_env()
+
+    @app.before_request
+    def _start_request():
+        g.metrics_started = time.perf_counter()
+        g.metrics_trace = start_trace()
+        g.metrics_profile = profiler.begin() if profiler else None
+
+    @app.after_request
+    def _finish_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(elapsed, route=route)
+        REQUESTS.inc(route=route, status=str(response.status_code))
+        response.headers['Server-Timing'] = server_timing(g.pop('metrics_trace', []), elapsed)
+        if profiler:
+            profiler.end(g.pop('metrics_profile', None), elapsed, route)
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', lambda: Response(render(), content_type=CONTENT_TYPE))
+    return app
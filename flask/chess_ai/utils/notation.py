@@ -0,0 +1,157 @@
+"""东萍 / FEN / ICCS 格式转换（查表实现）
+
+东萍棋盘：32 个槽位的坐标 "xy"（x 为列 0-8，y 为行 0-9，黑方在上），被吃记为 99
+东萍走法：起点 + 终点，如 "1747"，整数形式 int("1747")
+FEN：第一行为黑方底线，大写为红方，走棋方 w（红）/ b（黑）
+ICCS：列 a-i，行 0-9 自红方底线起算，如 "b2e2"（chessdb.cn 使用小写）
+所有坐标映射都在导入时预先计算；批量接口用于整局棋的转换。
+"""
+import re
+
+import numpy as np
+
+from chess_ai.utils.board_engine import Board, RED, BLACK, CAPTURED, SLOT_PIECE, PIECE_CHARS
+
+SLOT_CHARS = tuple(PIECE_CHARS[piece] for piece in SLOT_PIECE)
+SIDE_CHARS = ('w', 'b')
+
+# 坐标 -> FEN 网格下标 y*9+x
+_SQ_CELL = tuple((sq % 10) * 9 + sq // 10 for sq in range(90))
+_POS_CELL = {f"{x}{y}": y * 9 + x for x in range(9) for y in range(10)}
+_SLOT_OFFSETS = tuple((slot * 2, SLOT_CHARS[slot]) for slot in range(32))
+_EMPTY_RUN = re.compile('1+')
+# 一行棋子（空格为 '1'）-> FEN 行的缓存；实际对局中出现的行型只有几千种
+_ROW_CACHE = {}
+_ROW_CACHE_SIZE = 1 << 16
+
+# 同类棋子的空闲槽位（FEN -> 东萍时按顺序分配）
+_PIECE_SLOTS = tuple(tuple(slot for slot in range(32) if SLOT_PIECE[slot] == piece) for piece in range(14))
+# 部分 FEN 用 H/E 表示马/象
+_FEN_PIECES = {ch: PIECE_CHARS.index(ch) for ch in PIECE_CHARS}
+_FEN_PIECES.update({'H': _FEN_PIECES['N'], 'E': _FEN_PIECES['B'], 'h': _FEN_PIECES['n'], 'e': _FEN_PIECES['b']})
+
+# 坐标 "xy" <-> ICCS 坐标 "b2"
+DP_TO_ICCS_SQ = {f"{x}{y}": f"{'abcdefghi'[x]}{9 - y}" for x in range(9) for y in range(10)}
+ICCS_TO_DP_SQ = {iccs: dp for dp, iccs in DP_TO_ICCS_SQ.items()}
+ICCS_TO_DP_SQ.update({iccs.upper(): dp for dp, iccs in DP_TO_ICCS_SQ.items()})
+
+
+def _move_iccs(move):
+    frm, to = DP_TO_ICCS_SQ.get(f"{move // 100:02d}"), DP_TO_ICCS_SQ.get(f"{move % 100:02d}")
+    return frm + to if frm and to else ''
+
+
+# 整数走法 起点*100+终点 -> ICCS 字符串（非法坐标为空串），用于 NumPy 批量转换
+ICCS_BY_MOVE = np.array([_move_iccs(move) for move in range(9000)], dtype='<U4')
+
+
+def _run_length(match):
+    return str(len(match.group()))
+
+
+def _grid_to_fen(grid, side):
+    cells = "".join(grid)
+    rows = []
+    for start in range(0, 90, 9):
+        row = cells[start:start + 9]
+        fen_row = _ROW_CACHE.get(row)
+        if fen_row is None:
+            if len(_ROW_CACHE) >= _ROW_CACHE_SIZE:
+                _ROW_CACHE.clear()
+            fen_row = _ROW_CACHE[row] = _EMPTY_RUN.sub(_run_length, row)
+        rows.append(fen_row)
+    return f"{'/'.join(rows)} {SIDE_CHARS[side]}"
+
+
+def squares_to_fen(squares, side=BLACK):
+    """32 个槽位的格子编号（Board.squares）转为 FEN"""
+    grid = ['1'] * 90
+    for slot, sq in enumerate(squares):
+        if sq != CAPTURED:
+            grid[_SQ_CELL[sq]] = SLOT_CHARS[slot]
+    return _grid_to_fen(grid, side)
+
+
+def board_to_fen(board_state, side=BLACK):
+    """东萍棋盘字符串转为 FEN（缺省黑方走棋，与原 invertToFen.changetoFen 相同）"""
+    grid = ['1'] * 90
+    cell_of = _POS_CELL.get
+    for offset, ch in _SLOT_OFFSETS:
+        cell = cell_of(board_state[offset:offset + 2])
+        if cell is not None:
+            grid[cell] = ch
+    return _grid_to_fen(grid, side)
+
+
+def boards_to_fens(board_states, sides=BLACK):
+    """批量转换；sides 为单个走棋方或与 board_states 等长的序列"""
+    if sides in (RED, BLACK):
+        return [board_to_fen(board_state, sides) for board_state in board_states]
+    return [board_to_fen(board_state, side) for board_state, side in zip(board_states, sides)]
+
+
+def fen_to_board(fen):
+    """FEN 转为 (东萍棋盘字符串, 走棋方)；同类棋子按在 FEN 中出现的顺序分配槽位"""
+    fields = fen.split()
+    rows = fields[0].split('/') if fields else []
+    if len(rows) != 10:
+        raise ValueError(f"无效 FEN：{fen}")
+
+    parts = ["99"] * 32
+    used = [0] * 14
+    for y, row in enumerate(rows):
+        x = 0
+        for ch in row:
+            if ch.isdigit():
+                x += int(ch)
+                continue
+            piece = _FEN_PIECES.get(ch)
+            if piece is None or used[piece] >= len(_PIECE_SLOTS[piece]) or x > 8:
+                raise ValueError(f"无效 FEN：{fen}")
+            parts[_PIECE_SLOTS[piece][used[piece]]] = f"{x}{y}"
+            used[piece] += 1
+            x += 1
+        if x != 9:
+            raise ValueError(f"无效 FEN：{fen}")
+
+    side = BLACK if len(fields) > 1 and fields[1] == 'b' else RED
+    return "".join(parts), side
+
+
+def dp_to_iccs(move):
+    """东萍走法 "1747" -> ICCS "b2e2" """
+    return DP_TO_ICCS_SQ[move[:2]] + DP_TO_ICCS_SQ[move[2:4]]
+
+
+def iccs_to_dp(move):
+    """ICCS "b2e2"（大小写均可）-> 东萍走法 "1747" """
+    return ICCS_TO_DP_SQ[move[:2]] + ICCS_TO_DP_SQ[move[2:4]]
+
+
+def moves_to_iccs(moves):
+    """一串东萍走法（列表或连续的字符串 "17471242..."）批量转为 ICCS 列表"""
+    if isinstance(moves, str):
+        moves = [moves[i:i + 4] for i in range(0, len(moves), 4)]
+    table = DP_TO_ICCS_SQ
+    return [table[m[:2]] + table[m[2:4]] for m in moves]
+
+
+def moves_to_dp(moves):
+    """ICCS 走法列表批量转为东萍走法列表"""
+    table = ICCS_TO_DP_SQ
+    return [table[m[:2]] + table[m[2:4]] for m in moves]
+
+
+def move_array_to_iccs(moves):
+    """整数走法数组（int("1747") 形式）向量化转为 ICCS 字符串数组，非法走法为空串"""
+    return ICCS_BY_MOVE[np.asarray(moves, dtype=np.int64)]
+
+
+def game_to_fens(moves, board_state=None, side=RED):
+    """整局棋每一步之前的 FEN 列表（长度为走法数 + 1），在 Board 上增量走子"""
+    board = Board(board_state, side)
+    fens = [squares_to_fen(board.squares, board.side)]
+    for move in (moves_to_dp(moves) if moves and not moves[0].isdigit() else moves):
+        board.make_move(int(move))
+        fens.append(squares_to_fen(board.squares, board.side))
+    return fens
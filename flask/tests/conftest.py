@@ -0,0 +1,49 @@
+import json
+import os
+import random
+import sys
+
+import pytest
+
+# 与各脚本相同：把 flask 目录加入 sys.path，测试中用 chess_ai. 前缀导入
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from chess_ai.utils.board_engine import Board
+
+
+def play_random_game(rng, max_plies):
+    """固定种子的随机对局，返回 (走完后的 Board, 整数走法列表)"""
+    board = Board()
+    moves = []
+    for _ in range(rng.randrange(max_plies + 1)):
+        legal = board.legal_moves()
+        if not legal:
+            break
+        move = rng.choice(legal)
+        board.make_move(move)
+        moves.append(move)
+    return board, moves
+
+
+@pytest.fixture
+def random_games():
+    """random_games(count, max_plies=80, seed=0) -> [(Board, 走法列表)]"""
+    def make(count, max_plies=80, seed=0):
+        rng = random.Random(seed)
+        return [play_random_game(rng, max_plies) for _ in range(count)]
+    return make
+
+
+@pytest.fixture
+def processed_games(tmp_path, random_games):
+    """随机对局写成棋谱文件（结果轮流为红胜/黑胜/和），再经 load_and_process_data 重放"""
+    from chess_ai.utils.data_loader import load_and_process_data
+
+    results = ('red_win', 'black_win', 'draw')
+    games = [{'movelist': "".join(f"{move:04d}" for move in moves), 'result': results[i % 3]}
+             for i, (_, moves) in enumerate(random_games(40, max_plies=30, seed=6))]
+    # 重复几局开局，使部分局面出现多次、结果不同
+    games += [dict(game, result=results[(i + 1) % 3]) for i, game in enumerate(games[:10])]
+    path = tmp_path / "games.json"
+    path.write_text(json.dumps(games), encoding='utf-8')
+    return load_and_process_data(str(path), workers=1)
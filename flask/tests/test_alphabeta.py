@@ -0,0 +1,49 @@
+from chess_ai.utils.board_engine import Board, BLACK
+from chess_ai.utils.notation import fen_to_board
+from chess_ai.search.alphabeta import MATE, MATE_BOUND, Searcher, search_best_move
+from chess_ai.search.transposition import TranspositionTable
+
+# 红车在 1 路横线封住九宫上沿，另一车沉底即杀（黑将不能上将，也不能与红帅照面）
+MATE_IN_ONE = "3k5/R8/9/9/9/9/9/9/9/4K3R w"
+# 黑车无根，红车直接吃掉
+HANGING_ROOK = "4k4/9/9/9/r8/9/9/9/9/R2K5 w"
+
+
+def _board(fen):
+    return Board(*fen_to_board(fen))
+
+
+def test_finds_mate_in_one():
+    board = _board(MATE_IN_ONE)
+    result = Searcher().search(board, time_limit=None, max_depth=3)
+    assert result.score >= MATE_BOUND and result.depth == 1
+    board.make_move(result.move)
+    assert board.legal_moves() == []
+
+
+def test_wins_hanging_material():
+    board_state, side = fen_to_board(HANGING_ROOK)
+    result = Searcher(TranspositionTable(1 << 12)).search(Board(board_state, side), time_limit=None, max_depth=3)
+    assert f"{result.move:04d}" == '0904' and result.score > 500
+    assert search_best_move(board_state, side, time_limit=None, max_depth=3) == '0904'
+
+
+def test_search_leaves_board_unchanged():
+    board = _board(HANGING_ROOK)
+    before = (board.to_dongping(), board.side, board.key)
+    Searcher().search(board, time_limit=None, max_depth=3)
+    assert (board.to_dongping(), board.side, board.key) == before
+
+
+def test_no_legal_moves():
+    board = _board(MATE_IN_ONE)
+    board.make_move(Searcher().search(board, time_limit=None, max_depth=1).move)
+    result = Searcher().search(board, time_limit=None, max_depth=3)
+    assert result.move is None and result.score == -MATE
+    assert search_best_move(board.to_dongping(), BLACK, time_limit=None, max_depth=3) is None
+
+
+def test_node_limit_returns_completed_depth():
+    result = Searcher().search(Board(), time_limit=None, max_depth=20, node_limit=2000)
+    assert result.move in Board().legal_moves()
+    assert 1 <= result.depth < 20
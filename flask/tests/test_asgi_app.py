@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+from chess_ai.utils.board_engine import Board, BLACK, INITIAL_STATE
+from chess_ai.utils.board_utils import apply_move
+from chess_ai.api.asgi_app import SuggestServer
+
+
+def call(app, method, path, query=b'', body=b''):
+    """直接驱动 ASGI 应用，返回 (状态码, JSON)"""
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+@pytest.fixture
+def app(tmp_path):
+    # 模型文件不存在：与 backend_mock 相同回退到搜索
+    app = SuggestServer(model_path=str(tmp_path / "missing.pkl"), book_path=str(tmp_path / "missing.cxb"),
+                        workers=0, search_time=0.05)
+    yield app
+    asyncio.run(app.shutdown())
+
+
+def test_model_move_falls_back_to_search(app):
+    status, payload = call(app, 'GET', '/api/suggest/1927', b'game=g1')
+    assert status == 200 and payload['code'] == 200
+    board_state = apply_move(INITIAL_STATE, '1927')
+    assert int(payload['data']) in Board(board_state, BLACK).legal_moves()
+
+
+def test_process_pool_without_model_falls_back(tmp_path):
+    app = SuggestServer(model_path=str(tmp_path / "missing.pkl"), book_path=str(tmp_path / "missing.cxb"),
+                        workers=1, search_time=0.05)
+    try:
+        for _ in range(2):
+            move = asyncio.run(app.predict(INITIAL_STATE))
+            assert int(move) in Board(INITIAL_STATE, BLACK).legal_moves()
+    finally:
+        asyncio.run(app.shutdown())
+
+
+def test_illegal_move_returns_json_500(app):
+    status, payload = call(app, 'GET', '/api/suggest/4545')
+    assert status == 500 and payload['code'] == 500
+    # 出错之后服务照常可用，对局没有被改动
+    assert call(app, 'GET', '/api/suggest/restart') == (200, {"code": 200, "data": "restart"})
+    assert call(app, 'GET', '/api/suggest/current_apply_ai_step', b'move=1927') == \
+        (200, {"code": 200, "data": "applyOK"})
+
+
+def test_app_routes(app):
+    assert call(app, 'GET', '/move', b'board=' + INITIAL_STATE.encode() + b'&action=1927') == \
+        (200, {"new_board": apply_move(INITIAL_STATE, '1927')})
+    assert call(app, 'GET', '/move')[0] == 400
+    status, payload = call(app, 'GET', '/suggest/' + INITIAL_STATE)
+    assert status == 200 and int(payload['move']) in Board(INITIAL_STATE, BLACK).legal_moves()
+    assert call(app, 'GET', '/nowhere') == (404, {"error": "Not Found"})
+
+
+@pytest.mark.parametrize("body, status", [(b'{"move": "1927"}', 200), (b'', 200), (b'{bad', 400),
+                                          (b'\xff', 400), (b'[1]', 400)])
+def test_memorize(app, body, status):
+    code, payload = call(app, 'POST', '/memorize', body=body)
+    assert code == status
+    if status == 200:
+        assert payload['status'] == "learned"
+    else:
+        assert "error" in payload
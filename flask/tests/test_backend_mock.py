@@ -0,0 +1,25 @@
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask_cors")
+
+import backend_mock
+
+
+def _wait_loaded(timeout=30):
+    deadline = time.time() + timeout
+    while backend_mock.loaded["status"] == "warming" and time.time() < deadline:
+        time.sleep(0.05)
+
+
+def test_loader_starts_on_import_once():
+    assert backend_mock._loader_pid == os.getpid()
+    _wait_loaded()
+    assert backend_mock.loaded["status"] in ("ready", "failed")
+    backend_mock.start()
+    with backend_mock.app.test_client() as client:
+        assert client.get('/api/suggest/status').get_json()["data"] == backend_mock.loaded["status"]
+    assert not [t for t in threading.enumerate() if t.name == "model-loader"]
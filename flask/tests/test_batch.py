@@ -0,0 +1,90 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chess_ai.utils.board_engine import Board, RED, BLACK, INITIAL_STATE
+from chess_ai.utils.board_utils import apply_move
+from chess_ai.model.chess_model import ChessModel
+from chess_ai.api import batch
+from chess_ai.api.batch import parse_batch, iter_batch, MAX_TIME
+
+# 交换两个黑车的槽位：东萍字符串不同，局面相同
+SWAPPED = INITIAL_STATE[16:18] + INITIAL_STATE[2:16] + INITIAL_STATE[:2] + INITIAL_STATE[18:]
+AFTER_CANNON = apply_move(INITIAL_STATE, '7747')
+
+
+class CountingPool(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(2)
+        self.submitted = []
+
+    def submit(self, func, *args):
+        self.submitted.append(args)
+        return super().submit(func, *args)
+
+
+@pytest.fixture
+def model():
+    # 只记录初始局面（黑方走）的一步走法
+    model = ChessModel(search_time=0.05)
+    model.train([{'movelist': "", 'result': 'draw', 'board_states': [INITIAL_STATE], 'moves': ['1022']}])
+    return model
+
+
+def test_parse_batch():
+    items = parse_batch({"positions": [INITIAL_STATE, {"board": SWAPPED, "side": "red", "time": 99},
+                                       {"board": "x", "time": 0}], "time": 0.5})
+    assert items == [(0, INITIAL_STATE, BLACK, 0.5), (1, SWAPPED, RED, MAX_TIME), (2, "x", BLACK, 0.01)]
+    assert parse_batch([INITIAL_STATE], 2.0) == [(0, INITIAL_STATE, BLACK, 2.0)]
+
+
+@pytest.mark.parametrize("payload", [None, {}, {"positions": "x"}, {"positions": [1]},
+                                     {"positions": [{"board": INITIAL_STATE, "side": "green"}]}])
+def test_parse_batch_rejects(payload):
+    with pytest.raises(ValueError):
+        parse_batch(payload)
+
+
+def test_iter_batch_deduplicates(model):
+    items = parse_batch([AFTER_CANNON, INITIAL_STATE, SWAPPED, AFTER_CANNON, "bad"], 0.05)
+    with CountingPool() as pool:
+        results = list(iter_batch(model, items, pool))
+    summary = results.pop()
+    assert summary["done"] and summary["count"] == 5 and summary["unique"] == 2 and summary["book_hits"] == 1
+    # 换槽位的局面与初始局面合并，命中统计模型；重复的局面只搜索一次
+    assert len(pool.submitted) == 1
+    by_index = {r["index"]: r for r in results}
+    assert sorted(by_index) == [0, 1, 2, 3, 4]
+    assert by_index[1]["move"] == by_index[2]["move"] == "1022" and by_index[2]["source"] == "book"
+    assert by_index[2]["board"] == SWAPPED
+    assert by_index[0]["source"] == "search" and by_index[0]["move"] == by_index[3]["move"]
+    assert int(by_index[0]["move"]) in Board(AFTER_CANNON, BLACK).legal_moves()
+    assert "error" in by_index[4]
+
+
+def test_batch_pool_uses_spawn(monkeypatch):
+    monkeypatch.setattr(batch, '_pool', None)
+    pool = batch.batch_pool(1)
+    try:
+        assert pool._mp_context.get_start_method() == 'spawn'
+        move = pool.submit(batch.search_best_move, INITIAL_STATE, BLACK, 0.05).result(timeout=60)
+        assert int(move) in Board(INITIAL_STATE, BLACK).legal_moves()
+    finally:
+        pool.shutdown()
+
+
+def test_suggest_batch_streams_ndjson(model, monkeypatch):
+    from chess_ai.api import app as app_module
+    monkeypatch.setattr(app_module, '_model', model)
+    monkeypatch.setattr(batch, '_pool', ThreadPoolExecutor(2))
+    client = app_module.app.test_client()
+    response = client.post('/suggest/batch', json={"positions": [INITIAL_STATE, AFTER_CANNON], "time": 0.05})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[0] == {"index": 0, "board": INITIAL_STATE, "move": "1022", "source": "book"}
+    assert lines[1]["index"] == 1 and lines[1]["source"] == "search"
+    assert lines[-1]["done"] and len(lines) == 3
+    assert client.post('/suggest/batch', json={"positions": "x"}).status_code == 400
+    batch._pool.shutdown()
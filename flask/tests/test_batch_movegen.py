@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from chess_ai.utils.board_engine import Board, RED, BLACK, INITIAL_STATE
+from chess_ai.utils.batch_movegen import batch_legal_moves, split_moves, squares_to_tensor
+from chess_ai.utils.board_utils import board_to_matrix
+
+
+def _expected(states, sides):
+    return [sorted(Board(state, side).legal_moves(side)) for state, side in zip(states, sides)]
+
+
+def test_matches_board_on_random_positions(random_games):
+    boards = [board for board, _ in random_games(150, max_plies=120, seed=23)]
+    states = [board.to_dongping() for board in boards] * 2
+    sides = [RED] * len(boards) + [BLACK] * len(boards)
+    tensor = squares_to_tensor([board.squares for board in boards] * 2)
+    assert split_moves(*batch_legal_moves(tensor, np.array(sides))) == _expected(states, sides)
+
+
+@pytest.mark.parametrize("side", [RED, BLACK])
+def test_single_side_and_board_to_matrix(random_games, side):
+    states = [board.to_dongping() for board, _ in random_games(20, seed=24)]
+    tensor = np.array([board_to_matrix(state) for state in states])
+    assert split_moves(*batch_legal_moves(tensor, side)) == _expected(states, [side] * len(states))
+
+
+def test_empty_batch():
+    moves, offsets = batch_legal_moves(np.zeros((0, 10, 9), dtype=np.int8))
+    assert len(moves) == 0
+    assert offsets.tolist() == [0]
+    assert split_moves(moves, offsets) == []
+
+
+def test_missing_king_has_no_moves():
+    # 红帅（槽 20）被吃掉：与 Board 一致，红方没有合法走法，黑方照常生成
+    state = INITIAL_STATE[:40] + "99" + INITIAL_STATE[42:]
+    tensor = np.array([board_to_matrix(state)] * 2)
+    moves, offsets = batch_legal_moves(tensor, np.array([RED, BLACK]))
+    red, black = split_moves(moves, offsets)
+    assert red == [] == Board(state, RED).legal_moves(RED)
+    assert black == sorted(Board(state, BLACK).legal_moves(BLACK))
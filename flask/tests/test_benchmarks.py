@@ -0,0 +1,68 @@
+"""pytest-benchmark 基准：pytest tests/test_benchmarks.py --benchmark-autosave 保存结果，
+--benchmark-compare 与上次对比（--benchmark-compare-fail=mean:10% 可作为回归门槛）"""
+import timeit
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from chess_ai.utils.board_engine import Board
+from chess_ai.utils.board_utils import apply_move, generate_legal_moves
+from chess_ai.utils.batch_movegen import batch_legal_moves, squares_to_tensor
+from chess_ai.utils.encoder import squares_array
+from chess_ai.utils.notation import board_to_fen, fen_to_board
+from chess_ai.model.chess_model import ChessModel
+from chess_ai.tools.board_bench import random_positions
+
+
+@pytest.fixture(scope="module")
+def positions():
+    return random_positions(50)
+
+
+def _each(func, items):
+    for item in items:
+        func(item)
+
+
+def test_apply_move(benchmark, positions):
+    benchmark(_each, lambda p: apply_move(p[0], p[2]), positions)
+
+
+def test_generate_legal_moves(benchmark, positions):
+    benchmark(_each, lambda p: generate_legal_moves(p[0], p[1]), positions)
+
+
+def test_board_legal_moves(benchmark, positions):
+    boards = [Board(state, side) for state, side, _ in positions]
+    benchmark(_each, lambda board: board.legal_moves(), boards)
+
+
+def test_batch_legal_moves(benchmark, positions):
+    # 整批生成；extra_info['speedup'] 记录相对逐个调用 generate_legal_moves 的加速比
+    batch = positions * 20
+    tensor = squares_to_tensor(squares_array([state for state, _, _ in batch]))
+    sides = np.array([side for _, side, _ in batch])
+    single = min(timeit.repeat(lambda: _each(lambda p: generate_legal_moves(p[0], p[1]), batch), number=1, repeat=3))
+    batched = min(timeit.repeat(lambda: batch_legal_moves(tensor, sides), number=1, repeat=10))
+    benchmark.extra_info['speedup'] = round(single / batched, 1)
+    benchmark(batch_legal_moves, tensor, sides)
+
+
+def test_board_to_fen(benchmark, positions):
+    benchmark(_each, lambda p: board_to_fen(p[0], p[1]), positions)
+
+
+def test_fen_to_board(benchmark, positions):
+    fens = [board_to_fen(state, side) for state, side, _ in positions]
+    benchmark(_each, fen_to_board, fens)
+
+
+def test_model_predict(benchmark, positions):
+    # 统计命中的路径；回退搜索按时间预算运行，不适合作为基准
+    model = ChessModel()
+    model.train([{'movelist': "", 'result': 'unknown', 'board_states': [state], 'moves': [move]}
+                 for state, _, move in positions])
+    book = [(state, side) for state, side, _ in positions]
+    benchmark(_each, lambda p: model.predict(p[0], p[1]), book)
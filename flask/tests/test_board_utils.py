@@ -0,0 +1,51 @@
+import pytest
+
+from chess_ai.utils.board_engine import Board, INITIAL_STATE
+from chess_ai.utils.board_utils import (apply_move, apply_move_with_hash, apply_move_with_hashes, zobrist_hash,
+                                        zobrist_hashes, mirror_board, normalize_board)
+
+
+def test_apply_move_moves_piece():
+    assert apply_move(INITIAL_STATE, "1927")[34:36] == "27"  # 槽位 17：红方右马
+
+
+def test_apply_move_capture_marks_99():
+    state = apply_move(INITIAL_STATE, "1714")  # 红炮打到 14
+    state = apply_move(state, "1214")  # 黑炮吃红炮
+    assert "99" in state and len(state) == 64
+
+
+@pytest.mark.parametrize("action", ["001", "00100", "ab12", "1a27", "", "19 7", None])
+def test_apply_move_rejects_malformed_action(action):
+    with pytest.raises(ValueError):
+        apply_move(INITIAL_STATE, action)
+
+
+def test_apply_move_rejects_empty_start():
+    with pytest.raises(ValueError):
+        apply_move(INITIAL_STATE, "4545")
+
+
+def test_incremental_hashes_match_from_scratch(random_games):
+    for board, moves in random_games(30, seed=2):
+        state = INITIAL_STATE
+        key, mirror_key = zobrist_hashes(state)
+        replay = Board()
+        for move in moves:
+            action = f"{move:04d}"
+            expected = apply_move_with_hashes(state, action, key, mirror_key)
+            assert apply_move_with_hash(state, action, key) == expected[:2]
+            state, key, mirror_key = apply_move_with_hashes(state, action, key, mirror_key)
+            replay.make_move(move)
+            assert (key, mirror_key) == zobrist_hashes(state) == (replay.key, replay.mirror_key)
+            assert zobrist_hash(state) == key
+        assert state == board.to_dongping()
+
+
+def test_hash_ignores_slots_of_same_piece_kind(random_games):
+    for board, _ in random_games(20, seed=3):
+        state = board.to_dongping()
+        assert zobrist_hashes(normalize_board(state)) == zobrist_hashes(state)
+        # 镜像局面的哈希就是原局面的镜像哈希
+        key, mirror_key = zobrist_hashes(state)
+        assert zobrist_hashes(mirror_board(state)) == (mirror_key, key)
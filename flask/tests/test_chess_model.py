@@ -0,0 +1,90 @@
+from chess_ai.model.chess_model import ChessModel
+
+
+def _stats(model):
+    return ({k: dict(v) for k, v in model.move_stats.items()},
+            {k: {m: stat.to_tuple() for m, stat in v.items()} for k, v in model.win_stats.items()})
+
+
+def test_parallel_training_matches_single_process(processed_games):
+    single = ChessModel(model_type='winrate')
+    single.train(processed_games, workers=1)
+    parallel = ChessModel(model_type='winrate')
+    parallel.train(processed_games, workers=4, shard_size=7)
+    assert _stats(parallel) == _stats(single)
+    assert single.win_stats
+
+
+def test_mirrored_positions_share_one_key(random_games):
+    from chess_ai.utils.board_engine import Board
+    from chess_ai.utils.board_utils import mirror_board
+    from chess_ai.model.chess_model import mirror_move
+
+    model = ChessModel(check_collisions=True)
+    checked = 0
+    for board, _ in random_games(30, seed=8):
+        state, side = board.to_dongping(), board.side
+        mirrored_state = mirror_board(state)
+        key, flipped = model.position_key(state)
+        mirror_key, mirror_flipped = model.position_key(mirrored_state)
+        assert key == mirror_key and model.lookup_key(mirrored_state)[0] == key
+        moves = Board(state, side).legal_moves()
+        if not moves or flipped == mirror_flipped:
+            continue  # 左右对称的局面：两个方向相同
+        # 在一个方向上学到的走法，在镜像局面中预测出镜像后的走法
+        move = f"{moves[0]:04d}"
+        assert model.canonical_sample(mirrored_state, mirror_move(move)) == model.canonical_sample(state, move)
+        model.add_sample(*model.canonical_sample(state, move), 0.5)
+        assert model.predict_book(state, side) == move
+        assert model.predict_book(mirrored_state, side) == mirror_move(move)
+        model.move_stats.clear()
+        model.win_stats.clear()
+        checked += 1
+    assert checked > 20 and model.collisions == 0
+
+
+def test_win_stats_match_per_game_results(processed_games):
+    from collections import Counter
+    from chess_ai.model.chess_model import game_outcome
+
+    model = ChessModel(model_type='winrate')
+    model.train(processed_games)
+    expected = {}
+    for game in processed_games:
+        for state, move in zip(game['board_states'], game['moves']):
+            sample = model.canonical_sample(state, move)
+            expected.setdefault(sample, Counter())[game_outcome(game['result'])] += 1
+    assert sum(len(moves) for moves in model.win_stats.values()) == len(expected)
+    for (key, move), outcomes in expected.items():
+        stat = model.win_stats[key][move]
+        assert stat.to_tuple() == (sum(outcomes.values()), outcomes[1], outcomes[0.5])
+        assert model.move_stats[key][move] == stat.visits
+
+
+def test_winstat_mean_and_lower_bound():
+    from chess_ai.model.chess_model import WinStat
+    from chess_ai.utils.board_engine import RED, BLACK
+
+    stat = WinStat.from_outcomes([1, 1, 0.5, 0])
+    assert stat.to_tuple() == (4, 2, 1)
+    assert stat.mean(RED) == 0.625 and stat.mean(BLACK) == 0.375
+    assert 0 < stat.lower_bound(side=RED) < stat.mean(RED)
+    assert (stat + WinStat(2, 0, 2)).to_tuple() == (6, 2, 3)
+    assert WinStat().lower_bound() == 0.0
+
+
+def test_lcb_prefers_well_sampled_move():
+    from chess_ai.model.chess_model import WinStat
+    from chess_ai.utils.board_engine import RED, BLACK
+
+    model = ChessModel(model_type='winrate')
+    key = 42
+    # 1922 只有 2 局且全胜；1927 有 200 局，得分 70%
+    model.win_stats[key]['1922'] = WinStat(2, 2, 0)
+    model.win_stats[key]['1927'] = WinStat(200, 130, 20)
+    model.move_stats[key].update({'1922': 2, '1927': 200})
+    assert model.predict_canonical(key, RED) == '1922'  # 按平均得分：样本少的走法排第一
+    model.rank = 'lcb'
+    assert model.predict_canonical(key, RED) == '1927'
+    # 黑方视角：1922 黑方全负，1927 黑方得分 25%
+    assert model.predict_canonical(key, BLACK) == '1927'
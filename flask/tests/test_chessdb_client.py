@@ -0,0 +1,159 @@
+import asyncio
+import sqlite3
+import threading
+
+from chess_ai.utils.chessdb_client import AsyncChessDBClient, ChessDBClient
+
+FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w"
+RESPONSE = "move:h2e2,score:1,rank:2,note:! (10-00),winrate:50.00"
+
+
+def _async_client(tmp_path, fetched):
+    client = AsyncChessDBClient(cache_path=str(tmp_path / "cache.sqlite3"))
+
+    async def fetch(action, fen):
+        fetched.append((action, fen))
+        await asyncio.sleep(0.01)
+        return RESPONSE
+
+    client._fetch = fetch
+    return client
+
+
+def test_async_query_keeps_sqlite_off_the_event_loop(tmp_path):
+    disk_threads = []
+    fetched = []
+
+    async def run():
+        client = _async_client(tmp_path, fetched)
+        for name in ('_disk_get', '_disk_put'):
+            original = getattr(client.cache, name)
+
+            def traced(*args, _original=original):
+                disk_threads.append(threading.get_ident())
+                return _original(*args)
+
+            setattr(client.cache, name, traced)
+        loop_thread = threading.get_ident()
+        results = await asyncio.gather(*[client.best_move(FEN) for _ in range(5)])
+        await client.close()
+        return loop_thread, results
+
+    loop_thread, results = asyncio.run(run())
+    assert [move for move, _ in results] == ["h2e2"] * 5
+    assert fetched == [('querybest', FEN)]  # 并发的相同查询只访问一次上游
+    assert disk_threads and loop_thread not in disk_threads
+
+
+def test_async_query_reads_disk_cache_written_earlier(tmp_path):
+    sync_client = ChessDBClient(cache_path=str(tmp_path / "cache.sqlite3"))
+    sync_client.cache.put(('querybest', FEN), RESPONSE)
+    sync_client.close()
+
+    fetched = []
+
+    async def run():
+        client = _async_client(tmp_path, fetched)
+        move, _ = await client.best_move(FEN)
+        await client.close()
+        return move, client.stats
+
+    move, stats = asyncio.run(run())
+    assert move == "h2e2" and not fetched and stats['disk_hits'] == 1
+
+
+def test_async_cancelled_caller_does_not_cancel_others(tmp_path):
+    fetched = []
+
+    async def run():
+        client = _async_client(tmp_path, fetched)
+        first = asyncio.ensure_future(client.query('querybest', FEN))
+        await asyncio.sleep(0)
+        others = [asyncio.ensure_future(client.query('querybest', FEN)) for _ in range(3)]
+        await asyncio.sleep(0)
+        first.cancel()  # 发起上游查询的调用方被取消
+        results = await asyncio.gather(*others)
+        await client.close()
+        return first.cancelled(), results, client.stats
+
+    cancelled, results, stats = asyncio.run(run())
+    assert cancelled
+    assert results == [RESPONSE] * 3
+    assert fetched == [('querybest', FEN)] and stats['coalesced'] == 3
+
+
+def test_async_errors_are_shared(tmp_path):
+    fetched = []
+
+    async def run():
+        client = _async_client(tmp_path, fetched)
+
+        async def fail(action, fen):
+            fetched.append(action)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream broke")
+
+        client._fetch = fail
+        results = await asyncio.gather(*[client.query('querybest', FEN) for _ in range(3)], return_exceptions=True)
+        await client.close()
+        return results
+
+    results = asyncio.run(run())
+    assert fetched == ['querybest']
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def _threaded_queries(client, count):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = client.query('querybest', FEN)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_threaded_queries_coalesce(tmp_path):
+    client = ChessDBClient(cache_path=str(tmp_path / "cache.sqlite3"))
+    calls = []
+
+    def fetch(action, fen):
+        calls.append(action)
+        threading.Event().wait(0.1)
+        return RESPONSE
+
+    client._fetch = fetch
+    assert _threaded_queries(client, 6) == [RESPONSE] * 6
+    assert calls == ['querybest']
+    client.close()
+
+
+def test_threaded_errors_are_shared(tmp_path):
+    client = ChessDBClient(cache_path=str(tmp_path / "cache.sqlite3"))
+    calls = []
+    error = sqlite3.OperationalError("disk I/O error")
+
+    def fetch(action, fen):
+        calls.append(action)
+        threading.Event().wait(0.1)
+        return RESPONSE
+
+    def put(cache_key, text):
+        raise error
+
+    client._fetch = fetch
+    client.cache.put = put
+    results = _threaded_queries(client, 6)
+    assert calls == ['querybest']
+    # 非网络错误同样交给所有合并的调用方，而不是让它们得到 None
+    assert all(result is error for result in results)
+    client.close()
@@ -0,0 +1,18 @@
+from chess_ai.utils.board_engine import INITIAL_STATE
+from chess_ai.utils.data_loader import _invalid_record, replay_game
+
+
+def test_invalid_record_extracts_reason():
+    error = ValueError(f"无效走法: 4545，原因：起始位置没有棋子，当前棋盘状态：{INITIAL_STATE}")
+    assert _invalid_record(1, 2, "4545", INITIAL_STATE, error)[-1] == "起始位置没有棋子"
+
+
+def test_invalid_record_without_separator_keeps_message():
+    assert _invalid_record(1, 2, "4545", INITIAL_STATE, ValueError("bad move"))[-1] == "bad move"
+    assert _invalid_record(1, 2, "4545", INITIAL_STATE, ValueError(""))[-1] == ""
+
+
+def test_replay_game_records_invalid_moves():
+    processed, invalid = replay_game(7, {'movelist': "19274545", 'result': 'draw'})
+    assert processed['moves'] == ["1927"]
+    assert invalid == [(7, 1, "4545", processed['board_states'][-1], "起始位置没有棋子")]
@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pytest
+
+from chess_ai.utils.board_engine import Board
+from chess_ai.utils.dataset_store import Dataset, UNKNOWN_RESULT, VERSION, build_dataset, result_code
+from chess_ai.utils.encoder import encode_boards
+
+RESULTS = ['red_win', 'black_win', 'draw', 'unknown', '']
+
+
+@pytest.fixture
+def dataset(tmp_path, random_games):
+    """30 局随机对局，分片上限 100 个局面、每批 4 局，得到多个分片"""
+    games = [{'movelist': "".join(f"{move:04d}" for move in moves), 'result': RESULTS[i % len(RESULTS)]}
+             for i, (_, moves) in enumerate(random_games(30, max_plies=40, seed=41))]
+    source = tmp_path / "games.json"
+    source.write_text(json.dumps(games), encoding='utf-8')
+    meta = build_dataset(str(source), str(tmp_path / "ds"), workers=1, chunk_size=4, shard_positions=100)
+    return games, meta, Dataset(str(tmp_path / "ds"))
+
+
+def _replay(movelist):
+    """(走子前的槽位数组, 整数走法)"""
+    board = Board()
+    positions, moves = [], []
+    for i in range(0, len(movelist), 4):
+        positions.append(list(board.squares))
+        moves.append(int(movelist[i:i + 4]))
+        board.make_move(moves[-1])
+    return np.array(positions, dtype=np.uint8).reshape(-1, 32), moves
+
+
+def test_result_code():
+    assert [result_code(result) for result in RESULTS] == [1, -1, 0, UNKNOWN_RESULT, UNKNOWN_RESULT]
+    assert result_code(None) == UNKNOWN_RESULT
+
+
+def test_meta_and_shards(dataset):
+    games, meta, ds = dataset
+    assert meta['version'] == VERSION and len(meta['shards']) > 1
+    assert ds.num_games == meta['games'] == len(games)
+    assert len(ds) == meta['positions'] == sum(len(game['movelist']) // 4 for game in games)
+    for shard, info in zip(ds.shards, meta['shards']):
+        # 分片按整批写出，games 偏移从 0 开始、以分片局面数结束
+        assert len(shard['moves']) == info['positions']
+        assert len(shard['game_ids']) == info['games'] and len(shard['games']) == info['games'] + 1
+        assert shard['games'][0] == 0 and shard['games'][-1] == info['positions']
+        assert (np.diff(shard['games']) >= 0).all()
+
+
+def test_games_round_trip(dataset):
+    games, _, ds = dataset
+    for index, game in enumerate(games):
+        batch = ds.game(index)
+        positions, moves = _replay(game['movelist'])
+        assert batch['game_id'] == index
+        assert batch['moves'].tolist() == moves
+        assert (np.asarray(batch['positions']) == positions).all()
+        assert batch['plies'].tolist() == list(range(len(moves)))
+        assert (batch['results'] == result_code(game['result'])).all()
+
+
+def test_positions_across_shards(dataset):
+    games, _, ds = dataset
+    rows = [(positions[k], moves[k], result_code(game['result']), k % 2)
+            for game in games for positions, moves in [_replay(game['movelist'])] for k in range(len(moves))]
+    assert len(rows) == len(ds)
+    for index, (position, move, result, side) in enumerate(rows):
+        got = ds[index]
+        assert (got[0] == position).all() and got[1:] == (move, result, side)
+    with pytest.raises(IndexError):
+        ds[len(ds)]
+
+    indices = np.random.default_rng(0).integers(0, len(ds), 64)
+    batch = ds.batch(indices)
+    for i, index in enumerate(indices):
+        position, move, result, side = rows[index]
+        assert (batch['positions'][i] == position).all()
+        assert (batch['moves'][i], batch['results'][i], batch['sides'][i]) == (move, result, side)
+    assert (Dataset.encode(batch) == encode_boards(batch['positions'], batch['sides'])).all()
+
+
+def test_iter_batches_covers_all(dataset):
+    _, _, ds = dataset
+    seen = [np.concatenate([b['moves'] for b in ds.iter_batches(16, seed=3, worker=w, num_workers=2)])
+            for w in range(2)]
+    assert len(seen[0]) + len(seen[1]) == len(ds)
+    ordered = np.concatenate([b['moves'] for b in ds.iter_batches(16, shuffle=False)])
+    assert ordered.tolist() == [ds[i][1] for i in range(len(ds))]
+
+
+def test_rejects_old_version(dataset, tmp_path):
+    meta_path = tmp_path / "ds" / "meta.json"
+    meta = json.loads(meta_path.read_text(encoding='utf-8'))
+    meta_path.write_text(json.dumps(dict(meta, version=1)), encoding='utf-8')
+    with pytest.raises(ValueError):
+        Dataset(str(tmp_path / "ds"))
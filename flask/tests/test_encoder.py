@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from chess_ai.utils.board_engine import (RED, BLACK, ROOK, HORSE, KING, CANNON, PAWN, INITIAL_STATE,
+                                         CAPTURED, SLOT_PIECE)
+from chess_ai.utils.encoder import (NUM_PLANES, SIDE_PLANE, encode_boards, encode_to_npy, planes_to_matrix,
+                                    squares_array)
+
+
+def test_initial_plane_layout():
+    planes = encode_boards([INITIAL_STATE], RED)[0]
+    assert planes.shape == (NUM_PLANES, 10, 9) and planes.dtype == np.uint8
+    # 平面为 颜色*7+类型，行为 y（黑方在上），列为 x
+    assert planes[RED * 7 + KING, 9, 4] == 1 and planes[BLACK * 7 + KING, 0, 4] == 1
+    assert planes[RED * 7 + ROOK, 9, 0] == planes[RED * 7 + ROOK, 9, 8] == 1
+    assert planes[BLACK * 7 + HORSE, 0, 1] == planes[BLACK * 7 + HORSE, 0, 7] == 1
+    assert planes[RED * 7 + CANNON, 7, 1] == planes[BLACK * 7 + CANNON, 2, 7] == 1
+    assert planes[RED * 7 + PAWN, 6, ::2].all() and planes[BLACK * 7 + PAWN, 3, ::2].all()
+    counts = planes[:SIDE_PLANE].sum(axis=(1, 2)).tolist()
+    assert counts == [2, 2, 2, 2, 1, 2, 5] * 2
+    assert planes[:SIDE_PLANE].sum(axis=0).max() == 1
+    assert not planes[SIDE_PLANE].any()
+    assert encode_boards([INITIAL_STATE], BLACK)[0, SIDE_PLANE].all()
+
+
+def test_planes_match_board_slots(random_games):
+    boards = [board for board, _ in random_games(30, max_plies=120, seed=31)]
+    planes = encode_boards(boards)
+    for board, encoded in zip(boards, planes):
+        expected = np.zeros((SIDE_PLANE, 10, 9), dtype=np.uint8)
+        for slot, sq in enumerate(board.squares):
+            if sq != CAPTURED:
+                expected[SLOT_PIECE[slot], sq % 10, sq // 10] = 1
+        assert (encoded[:SIDE_PLANE] == expected).all()
+        # Board 对象缺省取自身的走棋方
+        assert (encoded[SIDE_PLANE] == board.side).all()
+    matrix = planes_to_matrix(planes)
+    assert matrix.shape == (len(boards), 10, 9)
+    assert ((matrix >= 0) == planes[:, :SIDE_PLANE].any(axis=1)).all()
+
+
+def test_input_forms_agree(random_games):
+    boards = [board for board, _ in random_games(20, seed=32)]
+    sides = [board.side for board in boards]
+    states = [board.to_dongping() for board in boards]
+    expected = encode_boards(boards)
+    assert (encode_boards(states, sides) == expected).all()
+    assert (encode_boards(squares_array(states), np.array(sides)) == expected).all()
+    assert encode_boards(states, sides, dtype=np.float32).dtype == np.float32
+
+
+def test_encode_into_out_and_npy(tmp_path, random_games):
+    boards = [board for board, _ in random_games(25, seed=33)]
+    expected = encode_boards(boards)
+    out = np.ones_like(expected)
+    assert encode_boards(boards, out=out) is out and (out == expected).all()
+    with pytest.raises(ValueError):
+        encode_boards(boards, out=np.zeros((1, NUM_PLANES, 10, 9), dtype=np.uint8))
+
+    mapped = encode_to_npy(tmp_path / "planes.npy", boards, chunk_size=7)
+    assert (np.asarray(mapped) == expected).all()
+    assert (np.load(tmp_path / "planes.npy", mmap_mode='r') == expected).all()
+
+
+def test_empty_batch():
+    assert encode_boards([]).shape == (0, NUM_PLANES, 10, 9)
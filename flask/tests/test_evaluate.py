@@ -0,0 +1,54 @@
+import pytest
+
+from chess_ai.utils.board_engine import Board
+from chess_ai.search import evaluate
+from chess_ai.search.evaluate import set_weights, evaluate_full, red_table, save_weights, load_weights
+from chess_ai.search.transposition import shared_table, EXACT
+
+
+@pytest.fixture
+def restore_weights():
+    yield
+    set_weights(red_table())
+
+
+def _shifted_table():
+    return [[v + (kind + 1) * 7 + sq % 5 for sq, v in enumerate(row)] for kind, row in enumerate(red_table())]
+
+
+def test_incremental_score_matches_full(random_games):
+    for board, moves in random_games(20, seed=24):
+        assert board.score == evaluate_full(board)
+        for _ in moves:
+            board.unmake_move()
+        assert board.score == evaluate_full(board) == evaluate_full(Board())
+
+
+def test_weight_swap_does_not_drift(restore_weights):
+    board = Board()
+    board.make_move(7747)  # 炮二平五
+    set_weights(_shifted_table())
+    board.unmake_move()
+    assert board.score == evaluate_full(board) == 0
+    assert board.copy().eval_table is board.eval_table
+    fresh = Board()
+    assert fresh.eval_table is not board.eval_table
+    assert fresh.score == evaluate_full(fresh)
+
+
+def test_weight_swap_clears_shared_table(restore_weights):
+    table = shared_table()
+    table.store(12345, 3, 100, EXACT, 7747)
+    assert table.probe(12345) is not None
+    set_weights(red_table())
+    assert table.probe(12345) is None
+
+
+def test_weights_file_round_trip(tmp_path, restore_weights):
+    path = tmp_path / "evaluation.cxe"
+    save_weights(path, _shifted_table(), 1.25)
+    table, scale = load_weights(path)
+    assert [list(row) for row in table] == _shifted_table()
+    assert scale == 1.25
+    evaluate.use_weights(path)
+    assert Board().eval_table == evaluate.PST
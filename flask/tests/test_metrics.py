@@ -0,0 +1,86 @@
+import pytest
+
+from chess_ai.utils import metrics
+from chess_ai.utils.metrics import Registry, server_timing, span, start_trace
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    requests = registry.counter('test_requests_total', "请求数")
+    requests.inc(route='/a', status='200')
+    requests.inc(2, route='/a', status='200')
+    requests.inc(route='say "hi"\n', status='500')
+    seconds = registry.histogram('test_seconds', "耗时", buckets=(0.001, 0.01))
+    seconds.observe(0.003, stage='search')
+    seconds.observe(20.0, stage='search')
+    registry.collect('test_cache_hits', 'gauge', "缓存命中", lambda: {(('kind', 'fen'),): 7})
+    assert registry.counter('test_requests_total', "另一个说明") is requests
+
+    assert registry.render().splitlines() == [
+        '# HELP test_requests_total 请求数',
+        '# TYPE test_requests_total counter',
+        'test_requests_total{route="/a",status="200"} 3',
+        'test_requests_total{route="say \\"hi\\"\\n",status="500"} 1',
+        '# HELP test_seconds 耗时',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{stage="search",le="0.001"} 0',
+        'test_seconds_bucket{stage="search",le="0.01"} 1',
+        'test_seconds_bucket{stage="search",le="+Inf"} 2',
+        'test_seconds_sum{stage="search"} 20.003',
+        'test_seconds_count{stage="search"} 2',
+        '# HELP test_cache_hits 缓存命中',
+        '# TYPE test_cache_hits gauge',
+        'test_cache_hits{kind="fen"} 7',
+    ]
+
+
+def test_span_records_trace():
+    trace = start_trace()
+    with span('book lookup'):
+        pass
+    with pytest.raises(ValueError):
+        with span('search'):
+            raise ValueError()
+    assert [stage for stage, _ in trace] == ['book lookup', 'search']
+    header = server_timing([('book lookup', 0.0015)], total=0.002)
+    assert header == "book_lookup;dur=1.50, total;dur=2.00"
+
+
+@pytest.fixture
+def client():
+    flask = pytest.importorskip("flask")
+    app = flask.Flask(__name__)
+
+    @app.route('/work')
+    def work():
+        with span('lookup'):
+            pass
+        with span('search'):
+            pass
+        return "ok"
+
+    metrics.install_flask(app)
+    return app.test_client()
+
+
+def _requests_total(route, status):
+    return metrics.REQUESTS.values.get((('route', route), ('status', status)), 0)
+
+
+def test_install_flask_server_timing_and_metrics(client):
+    before = _requests_total('/work', '200')
+    response = client.get('/work')
+    assert response.status_code == 200
+    stages = [part.split(';')[0] for part in response.headers['Server-Timing'].split(', ')]
+    assert stages == ['lookup', 'search', 'total']
+    assert all(';dur=' in part for part in response.headers['Server-Timing'].split(', '))
+    assert _requests_total('/work', '200') == before + 1
+
+    client.get('/missing')
+    response = client.get('/metrics')
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert f'chess_requests_total{{route="/work",status="200"}} {before + 1}' in text
+    assert 'chess_requests_total{route="unmatched",status="404"}' in text
+    assert 'chess_request_seconds_count{route="/work"}' in text
+    assert 'chess_stage_seconds_bucket{stage="lookup",le="+Inf"}' in text
@@ -0,0 +1,45 @@
+import pytest
+
+from chess_ai.model.chess_model import ChessModel
+from chess_ai.model.model_store import ModelStore, convert_pickle_model, is_model_store
+
+
+def _positions(games):
+    return [(state, side) for game in games for state in game['board_states'][:-1] for side in (0, 1)]
+
+
+@pytest.mark.parametrize("model_type", ['freq', 'winrate'])
+def test_convert_round_trip(tmp_path, processed_games, model_type):
+    model = ChessModel(model_type=model_type)
+    model.train(processed_games)
+    model.save(tmp_path / "model.pkl")
+    convert_pickle_model(tmp_path / "model.pkl", tmp_path / "model.cxm")
+    assert is_model_store(tmp_path / "model.cxm") and not is_model_store(tmp_path / "model.pkl")
+
+    store = ModelStore(tmp_path / "model.cxm")
+    assert len(store) == len(model.move_stats)
+    for key, moves in list(model.move_stats.items())[:50]:
+        rows = store.lookup(key)
+        assert {f"{int(r['move']):04d}": int(r['count']) for r in rows} == dict(moves)
+        for row in rows:
+            stat = model.win_stats[key][f"{int(row['move']):04d}"]
+            assert (int(row['wins']), int(row['draws'])) == (stat.wins, stat.draws)
+    missing = next(k for k in range(1, 1000) if k not in model.move_stats)
+    assert store.lookup(missing) is None and missing not in store
+
+    pickled = ChessModel.load(tmp_path / "model.pkl")
+    binary = ChessModel.load(tmp_path / "model.cxm")
+    assert binary.store is not None
+    for rank in ('mean', 'lcb'):
+        pickled.rank = binary.rank = rank
+        for state, side in _positions(processed_games):
+            assert binary.predict_book(state, side) == pickled.predict_book(state, side)
+
+
+def test_binary_model_rejects_collision_check(tmp_path, processed_games):
+    model = ChessModel()
+    model.train(processed_games)
+    model.save_store(tmp_path / "model.cxm")
+    with pytest.raises(ValueError):
+        ChessModel.load(tmp_path / "model.cxm", check_collisions=True)
+    assert ChessModel.load(tmp_path / "model.cxm").store is not None
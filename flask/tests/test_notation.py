@@ -0,0 +1,72 @@
+import pytest
+
+from chess_ai.utils.board_engine import Board, RED, BLACK, INITIAL_STATE, SLOT_PIECE, CAPTURED
+from chess_ai.utils.notation import (board_to_fen, fen_to_board, squares_to_fen, dp_to_iccs, iccs_to_dp,
+                                     moves_to_iccs, moves_to_dp, move_array_to_iccs, game_to_fens)
+from chess_ai.invertToFen import changetoFen
+
+INITIAL_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR"
+
+
+def _pieces(board_state):
+    """(棋子编码, 格子) 集合：同类棋子互换槽位不影响局面"""
+    board = Board(board_state)
+    return sorted((SLOT_PIECE[slot], sq) for slot, sq in enumerate(board.squares) if sq != CAPTURED)
+
+
+def test_initial_position():
+    assert board_to_fen(INITIAL_STATE, RED) == INITIAL_FEN + " w"
+    assert fen_to_board(INITIAL_FEN + " w") == (INITIAL_STATE, RED)
+    assert changetoFen(INITIAL_STATE) == INITIAL_FEN + " b"
+
+
+def test_dongping_fen_round_trip(random_games):
+    for board, _ in random_games(60, seed=16):
+        state = board.to_dongping()
+        for side in (RED, BLACK):
+            fen = board_to_fen(state, side)
+            assert fen == squares_to_fen(board.squares, side)
+            back, back_side = fen_to_board(fen)
+            assert back_side == side
+            assert _pieces(back) == _pieces(state)
+            assert board_to_fen(back, side) == fen
+
+
+def test_move_iccs_round_trip(random_games):
+    for _, moves in random_games(30, seed=17):
+        dp = [f"{move:04d}" for move in moves]
+        iccs = moves_to_iccs(dp)
+        assert iccs == [dp_to_iccs(move) for move in dp]
+        assert moves_to_iccs("".join(dp)) == iccs
+        assert moves_to_dp(iccs) == dp
+        assert [iccs_to_dp(move.upper()) for move in iccs] == dp
+        assert move_array_to_iccs(moves).tolist() == iccs
+
+
+def test_all_squares_iccs_round_trip():
+    for frm in range(90):
+        for to in (0, 45, 89):
+            move = f"{frm // 10}{frm % 10}{to // 10}{to % 10}"
+            assert iccs_to_dp(dp_to_iccs(move)) == move
+
+
+def test_game_to_fens_matches_per_move_board_to_fen(random_games):
+    for _, moves in random_games(20, seed=18):
+        state, side = INITIAL_STATE, RED
+        expected = [board_to_fen(state, side)]
+        board = Board()
+        for move in moves:
+            board.make_move(move)
+            side = board.side
+            state = board.to_dongping()
+            expected.append(board_to_fen(state, side))
+        dp = [f"{move:04d}" for move in moves]
+        assert game_to_fens(dp) == expected
+        assert game_to_fens(moves_to_iccs(dp)) == expected
+
+
+@pytest.mark.parametrize("fen", ["", "9/9/9", "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNRR w",
+                                 "rnbakabnx/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w"])
+def test_fen_to_board_rejects_invalid(fen):
+    with pytest.raises(ValueError):
+        fen_to_board(fen)
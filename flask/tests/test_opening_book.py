@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from chess_ai.model.chess_model import mirror_move
+from chess_ai.model.opening_book import OpeningBook, merge_weights, parse_queryall, write_book
+from chess_ai.utils.board_engine import BLACK, INITIAL_STATE
+from chess_ai.utils.board_utils import apply_move, zobrist_hashes
+
+# 红方跳左马后的局面和它的左右镜像（红方跳右马），黑方走棋
+STATE = apply_move(INITIAL_STATE, '1927')
+MIRRORED = apply_move(INITIAL_STATE, '7967')
+
+
+def _canonical(state, moves):
+    """原方向的 {走法: 权重} 转成 (规范局面键, 规范方向的走法权重)"""
+    key, mirror_key = zobrist_hashes(state)
+    if mirror_key < key:
+        return mirror_key, {mirror_move(move): weight for move, weight in moves.items()}
+    return key, dict(moves)
+
+
+def test_parse_queryall():
+    text = ("move:h2e2,score:1,rank:2,note:! (10-2),winrate:50.00|move:b0c2,score:0,rank:1"
+            "|move:xx,rank:2|move:a0a1,rank:bad|move:i0i1|unknown")
+    assert parse_queryall(text) == [('h2e2', 2), ('b0c2', 1), ('a0a1', 1), ('i0i1', 1)]
+    assert parse_queryall("") == []
+
+
+def test_merge_weights():
+    model = {1: {'a': 3, 'b': 1}, 2: {'c': 5}, 3: {'x': 1, 'y': 1000000}}
+    chessdb = {1: {'b': 1}}
+    merged = merge_weights([(model, 1.0), (chessdb, 2.0)])
+    # 局面 1：a = 0.75，b = 0.25 + 2 * 1，缩放到最大 65535
+    assert merged[1] == {'b': 65535, 'a': round(0.75 / 2.25 * 65535)}
+    assert merged[2] == {'c': 65535}
+    # 缩放后为 0 的走法丢弃
+    assert merged[3] == {'y': 65535}
+
+
+def test_write_book_round_trip(tmp_path):
+    key, moves = _canonical(STATE, {'1022': 100, '7062': 300, '1242': 200})
+    weights = {key: moves, key + 1: {'0010': 1}, 5: {'8988': 7}}
+    path = tmp_path / "book.cxb"
+    assert write_book(path, weights) == 5
+
+    book = OpeningBook(path)
+    assert len(book) == 5
+    assert list(book.keys) == sorted(book.keys)
+    rows = book.lookup(key)
+    assert [f"{move:04d}" for move in rows['move'].tolist()] == sorted(moves, key=moves.get, reverse=True)
+    assert rows['weight'].tolist() == [300, 200, 100]
+    assert len(book.lookup(key + 2)) == 0
+
+    # 镜像局面查到同一组条目，走法随之镜像
+    assert book.probe(STATE) == [('7062', 300), ('1242', 200), ('1022', 100)]
+    assert book.probe(MIRRORED) == [(mirror_move(move), weight) for move, weight in book.probe(STATE)]
+
+
+def test_empty_book_and_bad_file(tmp_path):
+    write_book(tmp_path / "empty.cxb", {})
+    book = OpeningBook(tmp_path / "empty.cxb")
+    assert len(book) == 0 and book.probe(STATE) == [] and book.best_move(STATE) is None
+
+    (tmp_path / "bad.cxb").write_bytes(b'XXXX' + b'\0' * 60)
+    with pytest.raises(ValueError):
+        OpeningBook(tmp_path / "bad.cxb")
+
+
+def test_best_move_skips_illegal_moves(tmp_path):
+    # 权重最高的两步不合法：红方的走法、马走日字以外的位置
+    key, moves = _canonical(STATE, {'1927': 900, '1012': 800, '7062': 300, '1022': 100})
+    write_book(tmp_path / "book.cxb", {key: moves})
+    book = OpeningBook(tmp_path / "book.cxb")
+
+    assert book.best_move(STATE, BLACK) == '7062'
+    assert book.best_move(MIRRORED, BLACK) == mirror_move('7062')
+    rng = random.Random(0)
+    assert {book.best_move(STATE, BLACK, rng) for _ in range(50)} == {'7062', '1022'}
+
+
+def test_best_move_without_legal_moves(tmp_path):
+    key, moves = _canonical(STATE, {'1927': 900, '1012': 800})
+    write_book(tmp_path / "book.cxb", {key: moves})
+    assert OpeningBook(tmp_path / "book.cxb").best_move(STATE, BLACK) is None
@@ -0,0 +1,35 @@
+import pytest
+
+from chess_ai.utils.board_engine import Board, BLACK, INITIAL_STATE
+from chess_ai.model import chess_model
+from chess_ai.model.chess_model import ChessModel
+from chess_ai.search.parallel import ParallelSearcher
+
+
+@pytest.fixture
+def searcher():
+    # 1 个进程：不启动辅助进程，只测共享置换表上的主搜索和加锁逻辑
+    searcher = ParallelSearcher(1, buckets=1 << 10)
+    yield searcher
+    searcher.close()
+
+
+def test_search_finds_move(searcher):
+    result = searcher.search(Board(), time_limit=None, max_depth=2)
+    assert result.move in Board().legal_moves()
+    assert result.depth == 2
+
+
+def test_busy_searcher_does_not_block(searcher):
+    with searcher._lock:
+        assert searcher.search(Board(), time_limit=None, max_depth=1, blocking=False) is None
+    assert searcher.search(Board(), time_limit=None, max_depth=1, blocking=False) is not None
+
+
+def test_model_falls_back_to_local_search_when_busy(searcher, monkeypatch):
+    monkeypatch.setattr(chess_model, 'parallel_searcher', lambda processes: searcher)
+    model = ChessModel(search_time=0.05, search_processes=2)
+    with searcher._lock:
+        move = model.fallback_strategy(INITIAL_STATE, BLACK)
+    assert int(move) in Board(INITIAL_STATE, BLACK).legal_moves()
+    assert model._local.searcher is not None
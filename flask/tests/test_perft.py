@@ -0,0 +1,43 @@
+import pytest
+
+from chess_ai.tools.perft import (INITIAL_FEN, REFERENCE, SYMMETRY_FENS, board_from_fen, perft, perft_strings,
+                                  mirror_fen, flip_fen, divide)
+
+
+@pytest.mark.parametrize("depth, expected", [(1, 44), (2, 1920), (3, 79666)])
+def test_initial_perft(depth, expected):
+    assert perft(board_from_fen(INITIAL_FEN), depth) == expected
+
+
+@pytest.mark.parametrize("name, fen, expected", REFERENCE[1:], ids=[name for name, _, _ in REFERENCE[1:]])
+def test_reference_perft(name, fen, expected):
+    board = board_from_fen(fen)
+    for depth in (1, 2, 3):
+        assert perft(board, depth) == expected[depth], f"{name} perft({depth})"
+
+
+def test_reference_perft_depth4():
+    _, fen, expected = REFERENCE[-1]
+    assert perft(board_from_fen(fen), 4) == expected[4]
+
+
+def test_perft_leaves_board_unchanged():
+    board = board_from_fen(INITIAL_FEN)
+    before = (board.to_dongping(), board.side, board.key, board.score)
+    perft(board, 2)
+    assert (board.to_dongping(), board.side, board.key, board.score) == before
+
+
+def test_divide_sums_to_perft():
+    board = board_from_fen(SYMMETRY_FENS[0])
+    counts = divide(board, 2)
+    assert sum(counts.values()) == perft(board, 2)
+
+
+@pytest.mark.parametrize("fen", [INITIAL_FEN] + SYMMETRY_FENS)
+def test_symmetry(fen):
+    nodes = perft(board_from_fen(fen), 3)
+    assert perft(board_from_fen(mirror_fen(fen)), 3) == nodes
+    assert perft(board_from_fen(flip_fen(fen)), 3) == nodes
+    board = board_from_fen(fen)
+    assert perft_strings(board.to_dongping(), board.side, 2) == perft(board, 2)
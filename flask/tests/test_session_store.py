@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from chess_ai.api import session_store
+from chess_ai.api.session_store import SessionStore, SQLiteSessionStore
+from chess_ai.utils.board_engine import INITIAL_STATE
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_store.time, 'time', lambda: now[0])
+    return now
+
+
+def test_lru_eviction(clock):
+    store = SessionStore(max_sessions=2)
+    store.put('a', 'A')
+    store.put('b', 'B')
+    assert store.get('a') == 'A'  # a 变为最近使用
+    store.put('c', 'C')
+    assert len(store) == 2 and store.evicted == 1
+    assert store.get('b') == INITIAL_STATE
+    assert store.get('c') == 'C'
+
+
+def test_idle_eviction(clock):
+    store = SessionStore(idle_timeout=60)
+    store.put('a', 'A')
+    clock[0] += 30
+    store.put('b', 'B')
+    clock[0] += 45
+    store.put('c', 'C')  # a 已空闲 75 秒，b 只有 45 秒
+    assert len(store) == 2 and store.evicted == 1
+    assert store.get('a') == INITIAL_STATE and store.get('b') == 'B'
+
+
+def test_update_keeps_state_on_error():
+    store = SessionStore()
+    assert store.update('a', lambda state: state + 'x') == INITIAL_STATE + 'x'
+
+    def fail(state):
+        raise ValueError(state)
+
+    with pytest.raises(ValueError):
+        store.update('a', fail)
+    assert store.get('a') == INITIAL_STATE + 'x'
+
+
+def test_sqlite_idle_expiry(tmp_path, clock):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), idle_timeout=60)
+    store.put('a', 'A')
+    assert store.get('a') == 'A' and store.get('missing') == INITIAL_STATE
+    clock[0] += 61
+    assert store.get('a') == INITIAL_STATE
+    store.put('b', 'B')  # 写入时清理过期对局
+    assert len(store) == 1
+
+
+def test_sqlite_update_is_serialized(tmp_path):
+    # 两个存储对象（两个连接）同时对同一局做读改写，BEGIN IMMEDIATE 保证不丢更新
+    path = str(tmp_path / "sessions.sqlite3")
+    stores = [SQLiteSessionStore(path), SQLiteSessionStore(path)]
+    stores[0].put('game', '0')
+
+    def increment(state):
+        value = int(state)
+        time.sleep(0.002)  # 拉长读和写之间的窗口
+        return str(value + 1)
+
+    def worker(store):
+        for _ in range(20):
+            store.update('game', increment)
+
+    threads = [threading.Thread(target=worker, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stores[0].get('game') == stores[1].get('game') == '40'
+
+
+def test_sqlite_update_rolls_back_on_error(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"))
+    store.put('game', 'A')
+
+    def fail(state):
+        raise ValueError(state)
+
+    with pytest.raises(ValueError):
+        store.update('game', fail)
+    assert store.get('game') == 'A'
+    assert store.update('game', lambda state: state + 'B') == 'AB'
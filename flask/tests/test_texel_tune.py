@@ -0,0 +1,32 @@
+import json
+
+import numpy as np
+
+from chess_ai.utils.dataset_store import build_dataset, Dataset, UNKNOWN_RESULT
+from chess_ai.tools.texel_tune import load_positions
+
+RESULTS = ['red_win', 'unknown', 'draw', 'black_win', '', 'draw']
+
+
+def _game_labels(outcomes, games):
+    return [float(outcomes[games == game][0]) for game in np.unique(games)]
+
+
+def test_dataset_and_json_use_same_labels(tmp_path, random_games):
+    games = [{'movelist': "".join(f"{move:04d}" for move in moves), 'result': result}
+             for (_, moves), result in zip(random_games(len(RESULTS), max_plies=40, seed=25), RESULTS)]
+    # 空棋谱补一步，保证每局都有局面
+    for game in games:
+        game['movelist'] = game['movelist'] or "7747"
+    source = tmp_path / "games.json"
+    source.write_text(json.dumps(games), encoding='utf-8')
+    build_dataset(str(source), str(tmp_path / "ds"), workers=1)
+
+    results = np.concatenate([np.asarray(s['results']) for s in Dataset(str(tmp_path / "ds")).shards])
+    assert (results == UNKNOWN_RESULT).any()
+
+    expected = [1.0, 0.5, 0.0, 0.5]
+    _, outcomes, game_index = load_positions(str(tmp_path / "ds"), skip_plies=0)
+    assert _game_labels(outcomes, game_index) == expected
+    _, outcomes, game_index = load_positions(str(source), skip_plies=0, workers=1)
+    assert _game_labels(outcomes, game_index) == expected
@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from chess_ai.search.transposition import TranspositionTable, EXACT, LOWER, UPPER, pack_entry, unpack_entry
+
+BUCKETS = 1 << 4
+KEY = 0x123456789ABCDE0  # 低位为 0：落在桶 0
+OTHER = KEY + (BUCKETS << 1)  # 同一个桶的另一个局面
+THIRD = KEY + (BUCKETS << 2)
+
+
+def test_pack_round_trip():
+    for entry in [(5, -29990, EXACT, 8987), (-1, 0, LOWER, 0), (127, 32767, UPPER, 9999), (0, -32768, EXACT, 1)]:
+        assert unpack_entry(pack_entry(*entry, 255)) == entry
+
+
+def test_probe_and_store():
+    tt = TranspositionTable(BUCKETS)
+    assert tt.probe(KEY) is None
+    tt.store(KEY, 3, -120, LOWER, 7747)
+    assert tt.probe(KEY) == (3, -120, LOWER, 7747)
+    assert tt.probe(KEY ^ 1) is None
+    tt.store(KEY, 1, 50, EXACT, 1022)  # 同一局面总是覆盖
+    assert tt.probe(KEY) == (1, 50, EXACT, 1022)
+    assert tt.stats()['hits'] == 2 and tt.stats()['stores'] == 2
+    tt.clear()
+    assert tt.probe(KEY) is None
+
+
+def test_replacement_prefers_depth_then_age():
+    tt = TranspositionTable(BUCKETS)
+    tt.new_search()
+    tt.store(KEY, 6, 1, EXACT, 1)
+    tt.store(OTHER, 2, 2, EXACT, 2)  # 较浅：进槽 1，槽 0 的深条目保留
+    assert tt.probe(KEY)[0] == 6 and tt.probe(OTHER)[0] == 2
+    tt.store(THIRD, 3, 3, EXACT, 3)  # 槽 1 总是替换
+    assert tt.probe(OTHER) is None and tt.probe(THIRD)[0] == 3
+    tt.new_search()
+    tt.store(OTHER, 1, 4, EXACT, 4)  # 槽 0 是旧代条目：即使更深也被替换
+    assert tt.probe(KEY) is None and tt.probe(OTHER) == (1, 4, EXACT, 4)
+
+
+def test_torn_entry_is_a_miss():
+    tt = TranspositionTable(BUCKETS)
+    tt.store(KEY, 4, 10, EXACT, 7747)
+    tt.entries[0, 1] = pack_entry(4, -500, LOWER, 1022, 0)  # 只写了一半的另一个条目
+    assert tt.probe(KEY) is None
+
+
+def test_generation_is_per_thread():
+    tt = TranspositionTable(BUCKETS)
+    tt.new_search()
+    mine = tt.generation
+    thread = threading.Thread(target=tt.new_search)
+    thread.start()
+    thread.join()
+    assert tt.generation == mine
+    tt.store(KEY, 2, 0, EXACT, 1)
+    assert tt.entries.item(0, 1) >> 48 == mine
+
+
+def test_concurrent_readers_never_see_mixed_entries():
+    tt = TranspositionTable(1)  # 所有局面挤在一个桶里，最大化写入冲突
+    keys = [KEY + i * 2 for i in range(8)]
+    expected = {key: (i % 50, i * 7 - 100, EXACT, i * 101) for i, key in enumerate(keys)}
+    bad = []
+
+    def writer():
+        for n in range(20000):
+            key = keys[n % len(keys)]
+            tt.store(key, *expected[key])
+
+    def reader():
+        for n in range(20000):
+            key = keys[n % len(keys)]
+            entry = tt.probe(key)
+            if entry is not None and entry != expected[key]:
+                bad.append((key, entry))
+
+    threads = [threading.Thread(target=f) for f in (writer, writer, reader, reader)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not bad
+
+
+def test_buckets_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        TranspositionTable(3)